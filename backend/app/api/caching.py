@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+from typing import Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response, status
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+_MIN_COMPRESS_SIZE = 1024
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token)
+    return accepted
+
+
+_ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def _etag(digest: str, encoding: str) -> str:
+    """Strong validator of one content-coding: ``"<digest>"`` for identity, ``"<digest>-<coding>"`` otherwise."""
+    return f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+
+
+def _etag_matches(header: str, digest: str) -> bool:
+    """Whether ``If-None-Match`` names any content-coding of the body with ``digest``."""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for suffix in _ENCODING_SUFFIXES:
+            if candidate.endswith(suffix):
+                candidate = candidate[: -len(suffix)]
+                break
+        if candidate == digest:
+            return True
+    return False
+
+
+class CachedJSONResponse:
+    """Encoded JSON body cached per data version, served with ETag and compression.
+
+    ``render`` is only invoked when ``version`` differs from the cached one, so
+    unchanged data costs neither model serialisation nor compression, and a
+    matching ``If-None-Match`` is answered with 304.  Each content-coding
+    gets its own strong ETag; any of them validates the current data.
+    """
+
+    def __init__(self, min_compress_size: int = _MIN_COMPRESS_SIZE) -> None:
+        self._min_compress_size = min_compress_size
+        self._version: Optional[Hashable] = None
+        self._digest = ""
+        self._bodies: Dict[str, bytes] = {}
+
+    def _refresh(self, version: Hashable, render: Callable[[], bytes]) -> None:
+        if self._bodies and version == self._version:
+            return
+        body = render()
+        self._version = version
+        self._digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._bodies = {"identity": body}
+
+    def _encoded(self, encoding: str) -> bytes:
+        body = self._bodies.get(encoding)
+        if body is None:
+            identity = self._bodies["identity"]
+            if encoding == "br":
+                body = brotli.compress(identity, quality=5)
+            else:
+                body = gzip.compress(identity, compresslevel=6)
+            self._bodies[encoding] = body
+        return body
+
+    def _negotiate(self, request: Request) -> str:
+        if len(self._bodies["identity"]) < self._min_compress_size:
+            return "identity"
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return "identity"
+
+    def respond(self, request: Request, version: Hashable, render: Callable[[], bytes]) -> Response:
+        self._refresh(version, render)
+        encoding = self._negotiate(request)
+        headers = {
+            "ETag": _etag(self._digest, encoding),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, self._digest):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self._encoded(encoding), media_type="application/json", headers=headers)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import DEFAULT_ACCOUNT_ID
+from app.services.accounts import Account, account_registry
+
+
+async def get_account(request: Request) -> Account:
+    """Account named by the ``{account_id}`` path segment; unprefixed routes use the default account.
+
+    Declared ``async`` so FastAPI resolves it inline instead of in the threadpool.
+    """
+    account_id = request.path_params.get("account_id", DEFAULT_ACCOUNT_ID)
+    account = account_registry.get(account_id)
+    if account is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Account {account_id} not found")
+    return account
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.models.account import AccountSummary
+from app.services.accounts import account_registry
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[AccountSummary])
+async def list_accounts() -> list[AccountSummary]:
+    return [
+        AccountSummary(
+            id=account.id,
+            configured=account.settings.current().is_configured(),
+            instrument_count=len(account.store.snapshot()),
+            trading=account.trading,
+        )
+        for account in account_registry
+    ]
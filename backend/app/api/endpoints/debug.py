@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import get_settings
+from app.core.profiling import ProfilerBusy, profile_event_loop
+from app.core.tracing import summarize, tracer
+from app.models.debug import TraceStageStats, TraceSummary, TracingUpdate
+
+router = APIRouter()
+
+
+def _summary() -> TraceSummary:
+    return TraceSummary(
+        enabled=tracer.enabled,
+        capacity=tracer.capacity,
+        committed=tracer.committed,
+        stages={stage: TraceStageStats(**stats) for stage, stats in summarize(tracer.records()).items()},
+    )
+
+
+@router.get("/traces", response_model=TraceSummary)
+async def get_traces(format: Literal["json", "binary"] = "json") -> Response | TraceSummary:
+    """Latency summary of the buffered traces; ``format=binary`` returns the raw ring buffer dump."""
+    if format == "binary":
+        return Response(tracer.dump(), media_type="application/octet-stream")
+    return _summary()
+
+
+@router.put("/tracing", response_model=TraceSummary)
+async def set_tracing(update: TracingUpdate) -> TraceSummary:
+    if update.enabled and not tracer.enabled:
+        tracer.clear()
+    tracer.enabled = update.enabled
+    return _summary()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, alias="intervalMs", ge=1),
+) -> PlainTextResponse:
+    """Collapsed stacks of the event loop thread, for flame-graph tools."""
+    if not get_settings().profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    try:
+        folded = await profile_event_loop(seconds, interval_ms / 1000)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return PlainTextResponse(folded)
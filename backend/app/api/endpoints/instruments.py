@@ -1,34 +1,90 @@
 from __future__ import annotations
 
-from pydantic import ValidationError
+from typing import Dict, List
 
-from fastapi import APIRouter, HTTPException, Response, status
+from pydantic import TypeAdapter, ValidationError
 
-from app.models.instrument import Instrument, InstrumentCreate, InstrumentUpdate
-from app.repositories.instrument_store import instrument_store
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from app.api.caching import CachedJSONResponse
+from app.api.deps import get_account
+from app.models.instrument import (
+    Instrument,
+    InstrumentBatchCreate,
+    InstrumentBatchResult,
+    InstrumentBatchUpdate,
+    InstrumentCreate,
+    InstrumentTemplateUpdate,
+    InstrumentUpdate,
+)
+from app.repositories.instrument_store import InstrumentStore
+from app.services.accounts import Account
 
 router = APIRouter()
 
+_instrument_list_adapter = TypeAdapter(List[Instrument])
+# One cached body per account, keyed by account id.
+_instruments_responses: Dict[str, CachedJSONResponse] = {}
+
+
+def _render_instruments(store: InstrumentStore) -> bytes:
+    return _instrument_list_adapter.dump_json(list(store.snapshot().values()), by_alias=True)
+
 
 @router.get("/", response_model=list[Instrument])
-async def list_instruments() -> list[Instrument]:
-    return await instrument_store.list()
+async def list_instruments(request: Request, account: Account = Depends(get_account)) -> Response:
+    cached = _instruments_responses.get(account.id)
+    if cached is None:
+        cached = _instruments_responses[account.id] = CachedJSONResponse()
+    return cached.respond(request, account.store.version, lambda: _render_instruments(account.store))
 
 
 @router.post("/", response_model=Instrument, status_code=status.HTTP_201_CREATED)
-async def create_instrument(payload: InstrumentCreate) -> Instrument:
+async def create_instrument(payload: InstrumentCreate, account: Account = Depends(get_account)) -> Instrument:
     try:
-        return await instrument_store.create(payload)
+        return await account.store.create(payload)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     except ValidationError as exc:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=exc.errors()) from exc
 
 
+def _batch_response(result: InstrumentBatchResult, response: Response, success_status: int) -> InstrumentBatchResult:
+    response.status_code = success_status if result.applied else status.HTTP_422_UNPROCESSABLE_ENTITY
+    return result
+
+
+# Batch routes are registered before "/{symbol}" so "batch" is never taken for a symbol.
+@router.post("/batch", response_model=InstrumentBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_instruments(
+    payload: InstrumentBatchCreate, response: Response, account: Account = Depends(get_account)
+) -> InstrumentBatchResult:
+    result = await account.store.create_many(payload.symbols)
+    return _batch_response(result, response, status.HTTP_201_CREATED)
+
+
+@router.patch("/batch", response_model=InstrumentBatchResult)
+async def update_instruments(
+    payload: InstrumentBatchUpdate, response: Response, account: Account = Depends(get_account)
+) -> InstrumentBatchResult:
+    result = await account.store.update_many([(item.symbol, item) for item in payload.items])
+    return _batch_response(result, response, status.HTTP_200_OK)
+
+
+@router.patch("/batch/template", response_model=InstrumentBatchResult)
+async def apply_instrument_template(
+    payload: InstrumentTemplateUpdate, response: Response, account: Account = Depends(get_account)
+) -> InstrumentBatchResult:
+    result = await account.store.apply_template(payload.filter, payload.update)
+    return _batch_response(result, response, status.HTTP_200_OK)
+
+
 @router.patch("/{symbol}", response_model=Instrument)
-async def update_instrument(symbol: str, payload: InstrumentUpdate) -> Instrument:
+async def update_instrument(
+    symbol: str, payload: InstrumentUpdate, account: Account = Depends(get_account)
+) -> Instrument:
     try:
-        return await instrument_store.update(symbol, payload)
+        return await account.store.update(symbol, payload)
     except ValueError as exc:
         message = str(exc)
         status_code = status.HTTP_404_NOT_FOUND if "not found" in message.lower() else status.HTTP_400_BAD_REQUEST
@@ -42,7 +98,7 @@ async def update_instrument(symbol: str, payload: InstrumentUpdate) -> Instrumen
     status_code=status.HTTP_204_NO_CONTENT,
     response_class=Response,
 )
-async def delete_instrument(symbol: str) -> Response:
-    await instrument_store.delete(symbol)
+async def delete_instrument(symbol: str, account: Account = Depends(get_account)) -> Response:
+    await account.store.delete(symbol)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_account
+from app.models.risk import RiskLimitsResponse, RiskSideExposure, RiskSummary
+from app.services.accounts import Account
+from app.services.risk import LONG, SHORT
+
+router = APIRouter()
+
+
+@router.get("/", response_model=RiskSummary)
+async def get_risk(account: Account = Depends(get_account)) -> RiskSummary:
+    risk = account.risk
+    limits = risk.limits
+    return RiskSummary(
+        account=account.id,
+        long=RiskSideExposure(planned_usdt=risk.planned[LONG], position_usdt=risk.positions[LONG]),
+        short=RiskSideExposure(planned_usdt=risk.planned[SHORT], position_usdt=risk.positions[SHORT]),
+        gross_usdt=risk.gross,
+        total_gross_usdt=risk.total_gross,
+        limits=RiskLimitsResponse(
+            symbol_side_usdt=limits.symbol_side_usdt,
+            side_usdt=limits.side_usdt,
+            account_usdt=limits.account_usdt,
+            total_usdt=limits.total_usdt,
+        ),
+    )
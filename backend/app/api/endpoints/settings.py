@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 
+from app.api.deps import get_account
 from app.core.security import verify_admin_password
 from app.models.settings import (
     SettingsAuthorizeRequest,
@@ -12,52 +12,50 @@ from app.models.settings import (
     SettingsStatus,
     SettingsUpdatePayload,
 )
-from app.services.bybit_specs import spec_registry
-from app.services.settings_service import settings_service
+from app.services.accounts import Account
+from app.services.bybit_specs import SPEC_SNAPSHOT_TTL_SECONDS, spec_registry
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("/status", response_model=SettingsStatus)
-async def get_settings_status() -> SettingsStatus:
-    current = settings_service.current()
+async def get_settings_status(account: Account = Depends(get_account)) -> SettingsStatus:
+    current = account.settings.current()
     return SettingsStatus(configured=current.is_configured())
 
 
 @router.post("/authorize", response_model=SettingsResponse)
-async def authorize_settings(payload: SettingsAuthorizeRequest) -> SettingsResponse:
+async def authorize_settings(
+    payload: SettingsAuthorizeRequest, account: Account = Depends(get_account)
+) -> SettingsResponse:
     if not verify_admin_password(payload.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный пароль",
         )
 
-    current = settings_service.current()
+    current = account.settings.current()
     return SettingsResponse(**current.model_dump(by_alias=False))
 
 
 @router.put("/", response_model=SettingsResponse)
-async def update_settings(payload: SettingsUpdatePayload) -> SettingsResponse:
+async def update_settings(payload: SettingsUpdatePayload, account: Account = Depends(get_account)) -> SettingsResponse:
     if not verify_admin_password(payload.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный пароль",
         )
 
-    previous = settings_service.current()
-    updated = await settings_service.update(payload)
+    previous = account.settings.current()
+    updated = await account.settings.update(payload)
 
     prev_keys = (previous.bybit_api_key.strip(), previous.bybit_secret_key.strip())
     new_keys = (updated.bybit_api_key.strip(), updated.bybit_secret_key.strip())
     if new_keys != prev_keys:
-        async def refresh_specs_background() -> None:
-            try:
-                await spec_registry.refresh()
-            except Exception as exc:  # pragma: no cover - logging only
-                logger.warning("Failed to refresh specs after settings update: %s", exc)
-
-        asyncio.create_task(refresh_specs_background())
+        account.client.set_credentials(*new_keys)
+        # Specs are public data, so a fresh snapshot does not need re-crawling for new keys.
+        spec_registry.schedule_refresh(max_age=SPEC_SNAPSHOT_TTL_SECONDS)
 
     return SettingsResponse(**updated.model_dump(by_alias=False))
 
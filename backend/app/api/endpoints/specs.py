@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import json
 
+from fastapi import APIRouter, Request, Response
+
+from app.api.caching import CachedJSONResponse
 from app.models.spec import SymbolSpecResponse
 from app.services.bybit_specs import spec_registry
 
 router = APIRouter()
 
+_specs_response = CachedJSONResponse()
 
-@router.get("/", response_model=list[SymbolSpecResponse])
-async def list_symbol_specs() -> list[SymbolSpecResponse]:
-    return [
-        SymbolSpecResponse(symbol=symbol, tick_size=data["tick_size"], qty_step=data["qty_step"])
-        for symbol, data in spec_registry.all().items()
-    ]
 
+def _render_specs() -> bytes:
+    payload = [spec.to_api() for spec in spec_registry.all().values()]
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@router.get("/", response_model=list[SymbolSpecResponse])
+async def list_symbol_specs(request: Request) -> Response:
+    return _specs_response.respond(request, spec_registry.content_hash, _render_specs)
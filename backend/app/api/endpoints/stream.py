@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Optional
+
+from fastapi import APIRouter, WebSocket, status
+
+from app.services.push_hub import PushClient, push_hub
+
+router = APIRouter()
+
+
+async def _send_frames(websocket: WebSocket, client: PushClient) -> None:
+    while True:
+        for frame in await client.next_frames():
+            await websocket.send_text(frame)
+
+
+@router.websocket("")
+async def stream(websocket: WebSocket, topics: Optional[str] = None) -> None:
+    """Push snapshots and per-symbol diffs; ``?topics=instruments,specs`` narrows the feed."""
+    wanted = [topic for topic in topics.split(",") if topic] if topics else list(push_hub.topics)
+    try:
+        client = push_hub.connect(wanted)
+    except ValueError as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(exc))
+        return
+
+    await websocket.accept()
+    sender = asyncio.create_task(_send_frames(websocket, client))
+    try:
+        while not sender.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    finally:
+        push_hub.disconnect(client)
+        sender.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await sender
@@ -1,11 +1,19 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import instruments, settings, specs
+from app.api.endpoints import accounts, debug, instruments, risk, settings, specs, stream
 
 api_router = APIRouter()
 
 api_router.include_router(specs.router, prefix="/specs", tags=["specs"])
 api_router.include_router(instruments.router, prefix="/instruments", tags=["instruments"])
 api_router.include_router(settings.router, prefix="/settings", tags=["settings"])
+api_router.include_router(risk.router, prefix="/risk", tags=["risk"])
+api_router.include_router(stream.router, prefix="/stream", tags=["stream"])
+api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
+# The unprefixed instrument, settings and risk routes above act on the default account.
+api_router.include_router(accounts.router, prefix="/accounts", tags=["accounts"])
+api_router.include_router(instruments.router, prefix="/accounts/{account_id}/instruments", tags=["instruments"])
+api_router.include_router(settings.router, prefix="/accounts/{account_id}/settings", tags=["settings"])
+api_router.include_router(risk.router, prefix="/accounts/{account_id}/risk", tags=["risk"])
 
 
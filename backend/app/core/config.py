@@ -1,11 +1,38 @@
 from functools import lru_cache
+from pathlib import Path
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+DEFAULT_ACCOUNT_ID = "default"
+
 
 class Settings(BaseSettings):
     api_prefix: str = "/api"
     app_name: str = "Grid Hedge Bot API"
     cors_origins: list[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
+    bybit_rest_url: str = "https://api.bybit.com"
+    bybit_recv_window: int = 5_000
+    bybit_timeout_seconds: float = 10.0
+    bybit_public_ws_url: str = "wss://stream.bybit.com/v5/public/linear"
+    bybit_private_ws_url: str = "wss://stream.bybit.com/v5/private"
+    trading_enabled: bool = False
+    spec_refresh_interval_seconds: float = 15 * 60
+    # Worst-case notional caps in USDT enforced before orders are placed; 0 disables a cap.
+    risk_max_symbol_side_usdt: float = 0.0
+    risk_max_side_usdt: float = 0.0
+    risk_max_account_usdt: float = 0.0
+    risk_max_total_usdt: float = 0.0
+    # Tick-to-order latency traces (see app.core.tracing) and the /api/debug/profile sampler.
+    tracing_enabled: bool = False
+    tracing_buffer_size: int = 4096
+    profiling_enabled: bool = False
+    state_dir: Optional[Path] = None
+    state_backend: Literal["json", "sqlite"] = "json"
+    # How often a trading account writes its restart checkpoint (plans, order link ids, execution seq).
+    checkpoint_interval_seconds: float = 5.0
+    # Sub-accounts served next to the default one, e.g. ACCOUNTS='["sub1", "sub2"]'.
+    accounts: list[str] = []
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -13,6 +40,16 @@ class Settings(BaseSettings):
         case_sensitive=False,
     )
 
+    def resolved_state_dir(self) -> Path:
+        return self.state_dir or Path.home() / ".grid_hedge_bot"
+
+    def account_state_dir(self, account_id: str) -> Path:
+        """State namespace of an account; the default account keeps the top-level files."""
+        state_dir = self.resolved_state_dir()
+        if account_id == DEFAULT_ACCOUNT_ID:
+            return state_dir
+        return state_dir / "accounts" / account_id
+
 
 @lru_cache
 def get_settings() -> Settings:
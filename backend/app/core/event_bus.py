@@ -0,0 +1,246 @@
+"""In-process event bus with one bounded, batching queue per consumer.
+
+Producers call ``bus.publish(event)``, which never blocks: the event is
+appended to the queue of every consumer subscribed to its type and the
+producer moves on.  Each consumer drains its own queue in a supervised task,
+handing its handler up to ``batch_size`` events at a time, so a slow stage
+only ever delays itself.  When a queue is full the consumer's own policy
+applies:
+
+* ``key`` -- a pending event with the same key is replaced by the newer one
+  (e.g. only the latest tick per symbol matters);
+* ``merge`` -- the newer event is folded into the newest pending one, so
+  nothing is lost and the queue stays bounded;
+* otherwise the oldest pending event is dropped and counted.
+
+Producers that can afford to wait use ``await bus.publish_wait(event)``, which
+applies backpressure instead of dropping.  Per consumer, the time events wait
+in the queue and the time the handler takes are recorded as histograms.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple, Type
+
+from app.core.metrics import counter, histogram
+from app.core.supervisor import SupervisedTask, Supervisor, supervisor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE = 1024
+DEFAULT_BATCH_SIZE = 256
+
+BatchHandler = Callable[[List[Any]], Optional[Awaitable[None]]]
+
+_queue_seconds = histogram("event_queue_seconds", "Time the oldest event of a batch waited in its queue", ("consumer",))
+_handler_seconds = histogram("event_handler_seconds", "Time a consumer spent handling one batch", ("consumer",))
+_dropped = counter("events_dropped_total", "Events dropped because a consumer queue was full", ("consumer",))
+_handler_errors = counter("event_handler_errors_total", "Event batches whose handler raised", ("consumer",))
+
+
+class Consumer:
+    """Queue and drain loop of one subscriber."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: BatchHandler,
+        *,
+        max_queue: int,
+        batch_size: int,
+        key: Optional[Callable[[Any], Hashable]] = None,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+        where: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.where = where
+        self.processed = 0
+        self.dropped = 0
+        self._handler = handler
+        self._key = key
+        self._merge = merge
+        # Entries are ``(enqueued_at, event)``; keyed consumers keep them by key.
+        self._queue: Deque[Tuple[float, Any]] = deque()
+        self._keyed: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task: Optional[SupervisedTask] = None
+        self._queue_seconds = _queue_seconds.labels(name)
+        self._handler_seconds = _handler_seconds.labels(name)
+
+    @property
+    def depth(self) -> int:
+        return len(self._keyed) if self._key is not None else len(self._queue)
+
+    def offer(self, event: Any, stamp: float) -> None:
+        if self._key is not None:
+            key = self._key(event)
+            previous = self._keyed.pop(key, None)
+            # A replaced event keeps its place in time, so the wait is still measured from the first one.
+            self._keyed[key] = (previous[0] if previous is not None else stamp, event)
+            if len(self._keyed) > self.max_queue:
+                self._keyed.popitem(last=False)
+                self._count_drop()
+        elif len(self._queue) >= self.max_queue:
+            if self._merge is not None:
+                enqueued, newest = self._queue[-1]
+                self._queue[-1] = (enqueued, self._merge(newest, event))
+            else:
+                self._queue.popleft()
+                self._count_drop()
+                self._queue.append((stamp, event))
+        else:
+            self._queue.append((stamp, event))
+        if self.depth >= self.max_queue:
+            self._space.clear()
+        self._idle.clear()
+        self._ready.set()
+
+    def _count_drop(self) -> None:
+        self.dropped += 1
+        _dropped.labels(self.name).inc()
+
+    def _take(self) -> List[Tuple[float, Any]]:
+        if self._key is not None:
+            count = min(self.batch_size, len(self._keyed))
+            return [self._keyed.popitem(last=False)[1] for _ in range(count)]
+        count = min(self.batch_size, len(self._queue))
+        return [self._queue.popleft() for _ in range(count)]
+
+    async def wait_for_space(self) -> None:
+        await self._space.wait()
+
+    async def drain(self) -> None:
+        await self._idle.wait()
+
+    def start(self, tasks: Supervisor) -> None:
+        if self._task is None or self._task.done():
+            self._task = tasks.spawn(f"consumer:{self.name}", self._run)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            await self._task.stop()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            entries = self._take()
+            if not self.depth:
+                self._ready.clear()
+            if self.depth < self.max_queue:
+                self._space.set()
+            if not entries:
+                self._idle.set()
+                continue
+
+            started = time.perf_counter()
+            self._queue_seconds.observe(started - min(entry[0] for entry in entries))
+            try:
+                result = self._handler([entry[1] for entry in entries])
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                _handler_errors.labels(self.name).inc()
+                logger.exception("Event consumer %s failed on a batch of %s events", self.name, len(entries))
+            self._handler_seconds.observe(time.perf_counter() - started)
+            self.processed += len(entries)
+            if not self.depth:
+                self._idle.set()
+
+
+class EventBus:
+    def __init__(self, tasks: Supervisor | None = None) -> None:
+        self._tasks = tasks or supervisor
+        self._consumers: Dict[Type[Any], List[Consumer]] = {}
+        self._all: Dict[str, Consumer] = {}
+        self._running = False
+
+    def subscribe(
+        self,
+        event_type: Type[Any],
+        handler: BatchHandler,
+        *,
+        name: str,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        key: Optional[Callable[[Any], Hashable]] = None,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+        where: Optional[Callable[[Any], bool]] = None,
+    ) -> Consumer:
+        """Deliver batches of ``event_type`` events to ``handler`` from consumer ``name``'s own queue.
+
+        ``where`` filters events before they are queued; see the module
+        docstring for ``key`` and ``merge``.
+        """
+        if name in self._all:
+            raise ValueError(f"Event consumer {name} is already subscribed")
+        consumer = Consumer(
+            name,
+            handler,
+            max_queue=max_queue,
+            batch_size=batch_size,
+            key=key,
+            merge=merge,
+            where=where,
+        )
+        self._consumers.setdefault(event_type, []).append(consumer)
+        self._all[name] = consumer
+        if self._running:
+            consumer.start(self._tasks)
+        return consumer
+
+    def publish(self, event: Any) -> None:
+        stamp = time.perf_counter()
+        for consumer in self._consumers.get(type(event), ()):
+            if consumer.where is None or consumer.where(event):
+                consumer.offer(event, stamp)
+
+    async def publish_wait(self, event: Any) -> None:
+        """Like ``publish``, but first wait until every target queue has room."""
+        for consumer in self._consumers.get(type(event), ()):
+            if consumer.where is None or consumer.where(event):
+                await consumer.wait_for_space()
+        self.publish(event)
+
+    def start(self) -> None:
+        self._running = True
+        for consumer in self._all.values():
+            consumer.start(self._tasks)
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Wait until every queue is empty and no handler is running."""
+
+        async def settle() -> None:
+            # Handlers may publish further events, so repeat until a full pass finds nothing to do.
+            while any(consumer.depth or not consumer._idle.is_set() for consumer in self._all.values()):
+                await asyncio.gather(*(consumer.drain() for consumer in self._all.values()))
+
+        await asyncio.wait_for(settle(), timeout)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._running:
+            try:
+                await self.drain(timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Timed out draining event consumers")
+        self._running = False
+        await asyncio.gather(*(consumer.stop() for consumer in self._all.values()))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"depth": consumer.depth, "processed": consumer.processed, "dropped": consumer.dropped}
+            for name, consumer in self._all.items()
+        }
+
+
+event_bus = EventBus()
@@ -0,0 +1,117 @@
+"""Sampling profiler for the running server, and a CLI to fetch its output.
+
+``sample_stacks`` polls the stack of one thread (the event loop) from a
+helper thread and counts identical stacks.  The result renders as collapsed
+stacks (``frame;frame;frame count`` per line), the input format of
+``flamegraph.pl``, speedscope and most other flame-graph viewers.
+
+    python -m app.core.profiling profile --seconds 10 --output api.folded
+    python -m app.core.profiling traces
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 60.0
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_qualname}"
+
+
+def _fold(frame: Optional[FrameType]) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float = 0.005) -> Counter[str]:
+    """Sample the stack of ``thread_id`` every ``interval`` seconds for ``seconds``; blocks the caller."""
+    stacks: Counter[str] = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        stacks[_fold(frame)] += 1
+        del frame
+        time.sleep(interval)
+    return stacks
+
+
+def render_collapsed(stacks: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+_profile_lock = asyncio.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+async def profile_event_loop(seconds: float, interval: float = 0.005) -> str:
+    """Collapsed stacks of the calling event loop's thread over ``seconds``; one profile at a time."""
+    if _profile_lock.locked():
+        raise ProfilerBusy("A profile is already being sampled")
+    async with _profile_lock:
+        seconds = min(seconds, MAX_PROFILE_SECONDS)
+        logger.info("Sampling the event loop for %.1f s every %.1f ms", seconds, interval * 1000)
+        stacks = await asyncio.to_thread(sample_stacks, threading.get_ident(), seconds, interval)
+        logger.info("Profile done: %s samples, %s distinct stacks", sum(stacks.values()), len(stacks))
+        return render_collapsed(stacks)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    import httpx
+
+    from app.core.tracing import load_traces, summarize
+
+    parser = argparse.ArgumentParser(description="Fetch a sampling profile or latency traces from a running server.")
+    parser.add_argument("command", choices=("profile", "traces"))
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api", help="API base URL")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    parser.add_argument("--output", help="Write the collapsed stacks or the binary trace dump to this file")
+    args = parser.parse_args(argv)
+
+    base = args.url.rstrip("/")
+    if args.command == "profile":
+        response = httpx.get(
+            f"{base}/debug/profile",
+            params={"seconds": args.seconds, "intervalMs": args.interval_ms},
+            timeout=args.seconds + 30,
+        )
+        response.raise_for_status()
+        if args.output:
+            Path(args.output).write_text(response.text, encoding="utf-8")
+        else:
+            sys.stdout.write(response.text)
+        return
+
+    response = httpx.get(f"{base}/debug/traces", params={"format": "binary"}, timeout=30)
+    response.raise_for_status()
+    if args.output:
+        Path(args.output).write_bytes(response.content)
+    print(json.dumps(summarize(load_traces(response.content)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Ownership of long-running background tasks.
+
+Every service loop is started through ``supervisor.spawn`` instead of a bare
+``asyncio.create_task``: the task is referenced until it ends, an unexpected
+exception is logged and the loop is restarted with exponential backoff, and
+``supervisor.stop()`` cancels whatever is still running at shutdown.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+TaskFactory = Callable[[], Awaitable[Any]]
+
+_failures = counter("supervised_task_failures_total", "Supervised tasks that ended with an exception", ("task",))
+_restarts = counter("supervised_task_restarts_total", "Supervised tasks restarted after a failure", ("task",))
+
+
+class SupervisedTask:
+    """Handle of a task started by ``Supervisor``; ``factory`` is called again for every restart."""
+
+    def __init__(
+        self,
+        name: str,
+        factory: TaskFactory,
+        *,
+        restart: bool,
+        backoff_base: float,
+        backoff_max: float,
+    ) -> None:
+        self.name = name
+        self.restart = restart
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self._factory = factory
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._task = asyncio.create_task(self._run(), name=name)
+
+    def done(self) -> bool:
+        return self._task.done()
+
+    def add_done_callback(self, callback: Callable[["SupervisedTask"], None]) -> None:
+        self._task.add_done_callback(lambda _: callback(self))
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def wait(self) -> None:
+        """Wait for the task to finish on its own (failures are already logged)."""
+        await asyncio.shield(self._task)
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                await self._factory()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = repr(exc)
+                _failures.labels(self.name).inc()
+                if not self.restart:
+                    logger.exception("Task %s failed", self.name)
+                    return
+                logger.exception("Task %s failed, restarting", self.name)
+
+            if time.monotonic() - started > self._backoff_max:
+                # It ran fine for a while: start the backoff over.
+                attempt = 0
+            delay = min(self._backoff_max, self._backoff_base * (2 ** attempt))
+            attempt += 1
+            self.restarts += 1
+            _restarts.labels(self.name).inc()
+            await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+
+class Supervisor:
+    def __init__(self, backoff_base: float = 0.5, backoff_max: float = 30.0) -> None:
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._tasks: Set[SupervisedTask] = set()
+
+    def spawn(self, name: str, factory: TaskFactory, *, restart: bool = True) -> SupervisedTask:
+        """Run ``factory()`` in the background, restarting it if it raises (unless ``restart`` is off)."""
+        task = SupervisedTask(
+            name,
+            factory,
+            restart=restart,
+            backoff_base=self.backoff_base,
+            backoff_max=self.backoff_max,
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def run_once(self, name: str, factory: TaskFactory) -> SupervisedTask:
+        """Tracked fire-and-forget task: kept referenced, failures logged, not restarted."""
+        return self.spawn(name, factory, restart=False)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return sorted(
+            (
+                {"name": task.name, "restart": task.restart, "restarts": task.restarts, "lastError": task.last_error}
+                for task in self._tasks
+            ),
+            key=lambda item: item["name"],
+        )
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        await asyncio.gather(*(task.stop() for task in tasks))
+
+
+supervisor = Supervisor()
@@ -0,0 +1,187 @@
+"""Opt-in tick-to-order latency traces.
+
+A trace follows one symbol of one account through the pipeline and holds a
+``time.perf_counter_ns`` stamp per stage:
+
+``tick``      ticker frame applied to the price book
+``dispatch``  tick consumer picked the (coalesced) tick off the event bus
+``plan``      order plan recomputed
+``send``      first batch request carrying the symbol sent to the exchange
+``ack``       response to that request received
+
+A trace is committed when it is acknowledged, or unfinished when the next
+plan for the same symbol replaces it (the plan did not require any order).
+Committed traces land in a fixed-size ring buffer of int64 stamps and feed
+the ``trace_stage_seconds`` histograms.  Every hook is guarded by
+``tracer.enabled`` at the call site, so disabled tracing costs one attribute
+read per event.
+"""
+from __future__ import annotations
+
+import struct
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import histogram
+
+STAGES = ("tick", "dispatch", "plan", "send", "ack")
+TICK, DISPATCH, PLAN, SEND, ACK = range(len(STAGES))
+
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+
+# Binary dump: header, then per trace the account and symbol (length-prefixed) and the stamps.
+_MAGIC = b"GHTR"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+_STAMPS = struct.Struct(f"<{len(STAGES)}q")
+
+_stage_seconds = histogram(
+    "trace_stage_seconds", "Latency from the previous traced stage", ("stage",), buckets=LATENCY_BUCKETS
+)
+_tick_to_ack = histogram(
+    "trace_tick_to_ack_seconds", "Latency from ticker frame to order acknowledgement", buckets=LATENCY_BUCKETS
+)
+
+TraceKey = Tuple[str, str]
+TraceRecord = Tuple[str, str, Tuple[int, ...]]
+
+
+class Tracer:
+    def __init__(self, capacity: int = 4096, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.capacity = capacity
+        self._ticks: Dict[str, int] = {}
+        self._open: Dict[TraceKey, List[int]] = {}
+        self._stamps = array("q", bytes(8 * capacity * len(STAGES)))
+        self._keys: List[Optional[TraceKey]] = [None] * capacity
+        self._next = 0
+        self.committed = 0
+        self._stage_children = [_stage_seconds.labels(stage) for stage in STAGES[DISPATCH:]]
+
+    now = staticmethod(time.perf_counter_ns)
+
+    def tick(self, symbol: str) -> None:
+        self._ticks[symbol] = time.perf_counter_ns()
+
+    def planned(self, account_id: str, symbol: str, dispatched: int) -> None:
+        key = (account_id, symbol)
+        previous = self._open.get(key)
+        if previous is not None:
+            self._commit(key, previous)
+        self._open[key] = [self._ticks.get(symbol, 0), dispatched, time.perf_counter_ns(), 0, 0]
+
+    def sent(self, account_id: str, symbols: Iterable[str]) -> None:
+        now = time.perf_counter_ns()
+        for symbol in symbols:
+            stamps = self._open.get((account_id, symbol))
+            if stamps is not None and not stamps[SEND]:
+                stamps[SEND] = now
+
+    def acked(self, account_id: str, symbols: Iterable[str]) -> None:
+        now = time.perf_counter_ns()
+        for symbol in symbols:
+            key = (account_id, symbol)
+            stamps = self._open.get(key)
+            if stamps is not None and stamps[SEND]:
+                stamps[ACK] = now
+                del self._open[key]
+                self._commit(key, stamps)
+
+    def _commit(self, key: TraceKey, stamps: List[int]) -> None:
+        slot = self._next
+        base = slot * len(STAGES)
+        self._stamps[base : base + len(STAGES)] = array("q", stamps)
+        self._keys[slot] = key
+        self._next = (slot + 1) % self.capacity
+        self.committed += 1
+
+        previous = stamps[TICK]
+        for stage in range(DISPATCH, len(STAGES)):
+            stamp = stamps[stage]
+            if not stamp:
+                break
+            if previous:
+                self._stage_children[stage - DISPATCH].observe((stamp - previous) / 1e9)
+            previous = stamp
+        if stamps[TICK] and stamps[ACK]:
+            _tick_to_ack.observe((stamps[ACK] - stamps[TICK]) / 1e9)
+
+    def records(self) -> Iterator[TraceRecord]:
+        """Committed traces, oldest first."""
+        count = min(self.committed, self.capacity)
+        start = (self._next - count) % self.capacity
+        width = len(STAGES)
+        for offset in range(count):
+            slot = (start + offset) % self.capacity
+            key = self._keys[slot]
+            if key is not None:
+                yield key[0], key[1], tuple(self._stamps[slot * width : (slot + 1) * width])
+
+    def clear(self) -> None:
+        self._ticks.clear()
+        self._open.clear()
+        self._keys = [None] * self.capacity
+        self._next = 0
+        self.committed = 0
+
+    def dump(self) -> bytes:
+        records = list(self.records())
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(STAGES), len(records))]
+        for account_id, symbol, stamps in records:
+            for text in (account_id, symbol):
+                encoded = text.encode("utf-8")
+                parts.append(bytes((len(encoded),)) + encoded)
+            parts.append(_STAMPS.pack(*stamps))
+        return b"".join(parts)
+
+
+def load_traces(data: bytes) -> List[TraceRecord]:
+    """Inverse of ``Tracer.dump``."""
+    magic, version, stages, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION or stages != len(STAGES):
+        raise ValueError("Not a trace dump of this version")
+    offset = _HEADER.size
+    records: List[TraceRecord] = []
+    for _ in range(count):
+        texts = []
+        for _field in range(2):
+            length = data[offset]
+            texts.append(data[offset + 1 : offset + 1 + length].decode("utf-8"))
+            offset += 1 + length
+        records.append((texts[0], texts[1], _STAMPS.unpack_from(data, offset)))
+        offset += _STAMPS.size
+    return records
+
+
+def summarize(records: Iterable[TraceRecord]) -> Dict[str, Dict[str, float]]:
+    """Count and p50/p99/max in microseconds of each stage (from the previous one) and end to end."""
+    samples: Dict[str, List[float]] = {stage: [] for stage in (*STAGES[DISPATCH:], "total")}
+    for _account, _symbol, stamps in records:
+        for stage in range(DISPATCH, len(STAGES)):
+            if stamps[stage] and stamps[stage - 1]:
+                samples[STAGES[stage]].append((stamps[stage] - stamps[stage - 1]) / 1000)
+        if stamps[TICK] and stamps[ACK]:
+            samples["total"].append((stamps[ACK] - stamps[TICK]) / 1000)
+    summary: Dict[str, Dict[str, float]] = {}
+    for stage, values in samples.items():
+        values.sort()
+        if values:
+            summary[stage] = {
+                "count": len(values),
+                "p50_us": values[len(values) // 2],
+                "p99_us": values[min(len(values) - 1, int(len(values) * 0.99))],
+                "max_us": values[-1],
+            }
+    return summary
+
+
+def _create_tracer() -> Tracer:
+    settings = get_settings()
+    return Tracer(settings.tracing_buffer_size, settings.tracing_enabled)
+
+
+tracer = _create_tracer()
@@ -1,23 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import warnings
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic._internal._generate_schema import UnsupportedFieldAttributeWarning
 
+from app.api.middleware import RequestMetricsMiddleware
 from app.api.router import api_router
 from app.core.config import get_settings
-from app.repositories.instrument_store import instrument_store
+from app.core.event_bus import event_bus
+from app.core.metrics import gauge, registry
+from app.core.supervisor import supervisor
+from app.services.accounts import account_registry
 from app.services.bybit_specs import spec_registry
-from app.services.settings_service import settings_service
-from app.services.state_storage import state_storage
+from app.services.events import publish_tick
+from app.services.market_data import market_data_service
+from app.services.push_hub import state_feeds
 
 warnings.filterwarnings("ignore", category=UnsupportedFieldAttributeWarning)
 
 logger = logging.getLogger(__name__)
 
+gauge("persistence_queue_depth", "Instrument changes waiting for the persistence workers").set_function(
+    lambda: sum(account.persistence.queue_depth for account in account_registry)
+)
+market_data_service.add_listener(publish_tick)
+
 
 def create_app() -> FastAPI:
     settings = get_settings()
@@ -31,35 +43,67 @@ def create_app() -> FastAPI:
             allow_methods=["*"],
             allow_headers=["*"],
         )
+    app.add_middleware(RequestMetricsMiddleware)
 
     @app.on_event("startup")
     async def startup_event() -> None:
+        event_bus.start()
         try:
-            await settings_service.load()
-            logger.info("Application settings restored")
+            await account_registry.restore()
+            logger.info("Restored %s account(s)", len(account_registry))
         except Exception as exc:  # pragma: no cover - startup logging only
-            logger.exception("Failed to restore settings: %s", exc)
+            logger.exception("Failed to restore accounts: %s", exc)
             raise
 
-        try:
-            stored_instruments = await state_storage.load_instruments()
-            await instrument_store.replace_all(stored_instruments)
-            logger.info("Restored %s instruments from state", len(stored_instruments))
-        except Exception as exc:  # pragma: no cover - startup logging only
-            logger.exception("Failed to restore instruments: %s", exc)
-            raise
-
-        try:
-            await spec_registry.refresh()
-            logger.info("Bybit specifications loaded")
-        except Exception as exc:  # pragma: no cover - startup logging only
-            logger.exception("Failed to load instrument specifications: %s", exc)
-            raise
+        spec_registry.add_listener(state_feeds.on_specs_changed)
+        # Specs are public data: one crawl and one snapshot serve every account.
+        if await spec_registry.load_cached():
+            logger.info("Bybit specifications restored from snapshot, revalidating in background")
+            spec_registry.schedule_refresh()
+        else:
+            try:
+                await spec_registry.refresh()
+                logger.info("Bybit specifications loaded")
+            except Exception as exc:  # pragma: no cover - startup logging only
+                logger.exception("Failed to load instrument specifications: %s", exc)
+                raise
+
+        for account in account_registry:
+            await account.reconcile_specs()
+        spec_registry.start_periodic_refresh(settings.spec_refresh_interval_seconds)
+
+        market_data_service.start()
+
+        # Plans must reflect the restored instruments before the first reconcile.
+        await event_bus.drain()
+        for account in account_registry:
+            await account.start_trading(settings.trading_enabled)
+
+    @app.on_event("shutdown")
+    async def shutdown_event() -> None:
+        await asyncio.gather(*(account.stop_trading() for account in account_registry))
+        await spec_registry.stop()
+        await market_data_service.stop()
+        await event_bus.stop()
+        await asyncio.gather(*(account.close() for account in account_registry))
+        await supervisor.stop()
 
     @app.get("/health")
     async def healthcheck() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/health/persistence")
+    async def persistence_health() -> dict[str, float]:
+        return account_registry.default.persistence.stats()
+
+    @app.get("/health/tasks")
+    async def tasks_health() -> dict[str, object]:
+        return {"tasks": supervisor.stats(), "consumers": event_bus.stats()}
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
     app.include_router(api_router, prefix=settings.api_prefix)
 
     return app
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from app.models.common import CamelModel
+
+
+class AccountSummary(CamelModel):
+    id: str
+    configured: bool
+    instrument_count: int
+    trading: bool
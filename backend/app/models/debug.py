@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from app.models.common import CamelModel
+
+
+class TraceStageStats(CamelModel):
+    count: int
+    p50_us: float
+    p99_us: float
+    max_us: float
+
+
+class TraceSummary(CamelModel):
+    enabled: bool
+    capacity: int
+    committed: int
+    stages: Dict[str, TraceStageStats]
+
+
+class TracingUpdate(CamelModel):
+    enabled: bool
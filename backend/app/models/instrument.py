@@ -79,3 +79,48 @@ class InstrumentUpdate(CamelModel):
 class Instrument(InstrumentBase):
     pass
 
+
+class InstrumentBatchCreate(CamelModel):
+    symbols: List[str] = Field(min_length=1)
+
+    @field_validator("symbols")
+    @classmethod
+    def uppercase_symbols(cls, value: List[str]) -> List[str]:
+        return [symbol.upper().strip() for symbol in value]
+
+
+class InstrumentPatch(InstrumentUpdate):
+    symbol: str
+
+
+class InstrumentBatchUpdate(CamelModel):
+    items: List[InstrumentPatch] = Field(min_length=1)
+
+
+class InstrumentFilter(CamelModel):
+    symbols: Optional[List[str]] = None
+    pattern: Optional[str] = None
+    is_active: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def validate_criteria(self) -> "InstrumentFilter":
+        if self.symbols is None and not self.pattern and self.is_active is None:
+            raise ValueError("filter needs at least one of symbols, pattern or isActive")
+        return self
+
+
+class InstrumentTemplateUpdate(CamelModel):
+    filter: InstrumentFilter
+    update: InstrumentUpdate
+
+
+class InstrumentBatchItemResult(CamelModel):
+    symbol: str
+    ok: bool
+    instrument: Optional[Instrument] = None
+    error: Optional[str] = None
+
+
+class InstrumentBatchResult(CamelModel):
+    applied: bool
+    results: List[InstrumentBatchItemResult]
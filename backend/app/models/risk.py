@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from app.models.common import CamelModel
+
+
+class RiskSideExposure(CamelModel):
+    planned_usdt: float
+    position_usdt: float
+
+
+class RiskLimitsResponse(CamelModel):
+    symbol_side_usdt: float
+    side_usdt: float
+    account_usdt: float
+    total_usdt: float
+
+
+class RiskSummary(CamelModel):
+    account: str
+    long: RiskSideExposure
+    short: RiskSideExposure
+    gross_usdt: float
+    total_gross_usdt: float
+    limits: RiskLimitsResponse
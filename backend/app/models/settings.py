@@ -2,12 +2,15 @@ from __future__ import annotations
 
 from typing import Optional
 
-from pydantic import Field
+from pydantic import ConfigDict, Field
 
 from app.models.common import CamelModel
 
 
 class AppSettings(CamelModel):
+    # Immutable so the settings service can hand out its instance without copying.
+    model_config = ConfigDict(frozen=True)
+
     bybit_api_key: str = ""
     bybit_secret_key: str = ""
 
@@ -7,4 +7,13 @@ class SymbolSpecResponse(CamelModel):
     symbol: str
     tick_size: str
     qty_step: str
+    min_price: str
+    max_price: str
+    min_order_qty: str
+    max_order_qty: str
+    max_mkt_order_qty: str
+    min_notional_value: str
+    min_leverage: str
+    max_leverage: str
+    leverage_step: str
 
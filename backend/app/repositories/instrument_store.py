@@ -1,19 +1,37 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
+import weakref
+from contextlib import AsyncExitStack
 from decimal import Decimal
-from typing import Dict, Iterable, Optional
+from fnmatch import fnmatchcase
+from types import MappingProxyType
+from typing import Annotated, Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.metrics import histogram
 from app.models.instrument import (
     Instrument,
+    InstrumentBatchItemResult,
+    InstrumentBatchResult,
     InstrumentCreate,
+    InstrumentFilter,
     InstrumentUpdate,
     RefillConfig,
     StopLossConfig,
     TakeProfitLevel,
 )
-from app.services.bybit_specs import spec_registry
-from app.services.state_storage import state_storage
+from app.services.bybit_specs import SpecDiff, spec_registry
+from app.services.persistence_worker import PersistenceWorker, persistence_worker
+from app.services.symbol_specs import SymbolSpec
+
+logger = logging.getLogger(__name__)
+
+# Receives ``{symbol: instrument}`` for every change; ``None`` marks a deletion.
+InstrumentListener = Callable[[Mapping[str, Optional[Instrument]]], None]
 
 
 def _default_take_profit() -> list[TakeProfitLevel]:
@@ -37,22 +55,23 @@ def _default_refill() -> RefillConfig:
     )
 
 
-def _create_instrument_from_spec(symbol: str, spec: Dict[str, str]) -> Instrument:
-    tick_size = Decimal(spec["tick_size"])
-    qty_step = Decimal(spec["qty_step"])
+def _spec_fields(spec: SymbolSpec) -> Dict[str, Any]:
+    """Instrument fields derived from an exchange spec."""
+    return {
+        "tick_size": spec.tick_size,
+        "qty_step": spec.qty_step,
+        "price_decimals": spec.price_decimals,
+        "volume_decimals": spec.volume_decimals,
+    }
 
-    price_decimals = max(0, -tick_size.as_tuple().exponent) if tick_size != 0 else 0
-    volume_decimals = max(0, -qty_step.as_tuple().exponent) if qty_step != 0 else 0
 
+def _create_instrument_from_spec(symbol: str, spec: SymbolSpec) -> Instrument:
     return Instrument(
         symbol=symbol,
         is_active=False,
         entry_price_usdt=Decimal("0"),
         entry_volume_usdt=Decimal("0"),
-        price_decimals=price_decimals,
-        volume_decimals=volume_decimals,
-        tick_size=tick_size,
-        qty_step=qty_step,
+        **_spec_fields(spec),
         tp_levels=_default_take_profit(),
         sl_long=_default_stop_loss(),
         sl_short=_default_stop_loss(),
@@ -60,21 +79,137 @@ def _create_instrument_from_spec(symbol: str, spec: Dict[str, str]) -> Instrumen
     )
 
 
+_field_adapters: Dict[str, TypeAdapter] = {}
+
+
+def _field_adapter(name: str) -> TypeAdapter:
+    """Validator for a single ``Instrument`` field, constraints included."""
+    adapter = _field_adapters.get(name)
+    if adapter is None:
+        info = Instrument.model_fields[name]
+        annotation = Annotated[(info.annotation, *info.metadata)] if info.metadata else info.annotation
+        adapter = _field_adapters[name] = TypeAdapter(annotation)
+    return adapter
+
+
+def _apply_update(instrument: Instrument, updates: InstrumentUpdate) -> Instrument:
+    """Validate only the changed fields, then re-check the cross-field invariants.
+
+    ``model_copy`` is shallow, so nested models that did not change are shared
+    with the previous instrument instead of being dumped and rebuilt.
+    """
+    changes: Dict[str, object] = {}
+    for name in updates.model_fields_set:
+        if name == "symbol" or name not in Instrument.model_fields:
+            continue
+        value = getattr(updates, name)
+        if value != getattr(instrument, name):
+            changes[name] = _field_adapter(name).validate_python(value)
+    if not changes:
+        return instrument
+
+    updated = instrument.model_copy(update=changes)
+    try:
+        updated.validate_consistency()
+    except ValueError as exc:
+        raise ValidationError.from_exception_data(
+            Instrument.__name__,
+            [{"type": "value_error", "loc": (), "input": changes, "ctx": {"error": exc}}],
+        ) from exc
+    return updated
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" if error["loc"] else error["msg"]
+            for error in exc.errors()
+        )
+    return str(exc)
+
+
+_lock_wait_seconds = histogram(
+    "instrument_store_lock_wait_seconds",
+    "Time spent waiting for InstrumentStore per-symbol locks",
+    buckets=(0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+
+
+class _TimedLock(asyncio.Lock):
+    """``asyncio.Lock`` that records how long ``acquire`` waited."""
+
+    async def acquire(self) -> bool:
+        started = time.perf_counter()
+        acquired = await super().acquire()
+        _lock_wait_seconds.observe(time.perf_counter() - started)
+        return acquired
+
+
 class InstrumentStore:
-    def __init__(self) -> None:
-        self._instruments: Dict[str, Instrument] = {}
-        self._lock = asyncio.Lock()
+    """In-memory instrument registry with copy-on-write snapshots.
+
+    Readers get the current immutable snapshot without locking.  Writers
+    serialise per symbol, build a new mapping and swap it in; there is no await
+    between reading the snapshot and publishing its replacement, so writers on
+    different symbols never lose each other's changes.
+    """
 
-    async def _persist(self) -> None:
-        await state_storage.save_instruments(list(self._instruments.values()))
+    def __init__(self, persistence: PersistenceWorker | None = None) -> None:
+        self._instruments: Mapping[str, Instrument] = MappingProxyType({})
+        self._values: Optional[Tuple[Instrument, ...]] = ()
+        self._version = 0
+        # Locks only live while a writer holds or waits on them, so deleted and
+        # never-created symbols do not pile up here.
+        self._symbol_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+        self._persistence = persistence or persistence_worker
+        self._listeners: List[InstrumentListener] = []
+
+    def add_listener(self, listener: InstrumentListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: InstrumentListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, changes: Mapping[str, Optional[Instrument]]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(changes)
+            except Exception:  # pragma: no cover - listener bugs must not break writes
+                logger.exception("Instrument listener %r failed", listener)
+
+    def _symbol_lock(self, symbol: str) -> asyncio.Lock:
+        lock = self._symbol_locks.get(symbol)
+        if lock is None:
+            lock = self._symbol_locks[symbol] = _TimedLock()
+        return lock
+
+    def _with_changes(self, changes: Mapping[str, Instrument]) -> Dict[str, Instrument]:
+        # ``mappingproxy.copy()`` is a C-level dict copy; ``{**proxy}`` walks the keys in Python.
+        instruments = self._instruments.copy()
+        instruments.update(changes)
+        return instruments
+
+    def _publish(self, instruments: Dict[str, Instrument]) -> None:
+        self._instruments = MappingProxyType(instruments)
+        self._values = None
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def snapshot(self) -> Mapping[str, Instrument]:
+        return self._instruments
 
     async def list(self) -> list[Instrument]:
-        async with self._lock:
-            return [instrument for instrument in self._instruments.values()]
+        values = self._values
+        if values is None:
+            values = self._values = tuple(self._instruments.values())
+        return list(values)
 
     async def get(self, symbol: str) -> Optional[Instrument]:
-        async with self._lock:
-            return self._instruments.get(symbol.upper())
+        return self._instruments.get(symbol.upper())
 
     async def create(self, payload: InstrumentCreate) -> Instrument:
         symbol = payload.symbol.upper()
@@ -82,42 +217,166 @@ class InstrumentStore:
         if not raw_spec:
             raise ValueError(f"Instrument {symbol} is not available on the exchange")
 
-        async with self._lock:
+        async with self._symbol_lock(symbol):
             if symbol in self._instruments:
                 raise ValueError(f"Instrument {symbol} already exists")
 
             instrument = _create_instrument_from_spec(symbol, raw_spec)
-            self._instruments[symbol] = instrument
-            await self._persist()
+            self._publish(self._with_changes({symbol: instrument}))
+            self._persistence.submit(symbol, instrument)
+            self._notify({symbol: instrument})
             return instrument
 
     async def delete(self, symbol: str) -> None:
-        async with self._lock:
-            symbol = symbol.upper()
+        symbol = symbol.upper()
+        async with self._symbol_lock(symbol):
             if symbol in self._instruments:
-                del self._instruments[symbol]
-                await self._persist()
+                instruments = self._instruments.copy()
+                del instruments[symbol]
+                self._publish(instruments)
+                self._persistence.submit(symbol, None)
+                self._notify({symbol: None})
 
     async def update(self, symbol: str, updates: InstrumentUpdate) -> Instrument:
         symbol = symbol.upper()
-        async with self._lock:
+        async with self._symbol_lock(symbol):
             instrument = self._instruments.get(symbol)
             if instrument is None:
                 raise ValueError(f"Instrument {symbol} not found")
 
-            update_data = updates.model_dump(exclude_unset=True, by_alias=False)
-            base_payload = instrument.model_dump(by_alias=False)
-            base_payload.update(update_data)
-            updated = Instrument(**base_payload)
-            self._instruments[symbol] = updated
-            await self._persist()
+            updated = _apply_update(instrument, updates)
+            if updated is instrument:
+                return instrument
+            self._publish(self._with_changes({symbol: updated}))
+            self._persistence.submit(symbol, updated)
+            self._notify({symbol: updated})
             return updated
 
+    async def _lock_symbols(self, stack: AsyncExitStack, symbols: Iterable[str]) -> None:
+        # Sorted acquisition keeps concurrent batches from deadlocking each other.
+        for symbol in sorted(set(symbols)):
+            await stack.enter_async_context(self._symbol_lock(symbol))
+
+    def _commit_batch(
+        self,
+        changes: Dict[str, Instrument],
+        results: List[InstrumentBatchItemResult],
+    ) -> InstrumentBatchResult:
+        """Publish, persist and announce ``changes`` at once unless an item failed."""
+        if any(not result.ok for result in results):
+            for result in results:
+                result.instrument = None
+            return InstrumentBatchResult(applied=False, results=results)
+        if changes:
+            self._publish(self._with_changes(changes))
+            self._persistence.submit_many(changes)
+            self._notify(changes)
+        return InstrumentBatchResult(applied=True, results=results)
+
+    async def create_many(self, symbols: Sequence[str]) -> InstrumentBatchResult:
+        """Create every symbol or none of them."""
+        wanted = [symbol.upper().strip() for symbol in symbols]
+        async with AsyncExitStack() as stack:
+            await self._lock_symbols(stack, wanted)
+            changes: Dict[str, Instrument] = {}
+            results: List[InstrumentBatchItemResult] = []
+            for symbol in wanted:
+                raw_spec = spec_registry.get(symbol)
+                if symbol in changes:
+                    error = f"Instrument {symbol} is listed more than once"
+                elif not raw_spec:
+                    error = f"Instrument {symbol} is not available on the exchange"
+                elif symbol in self._instruments:
+                    error = f"Instrument {symbol} already exists"
+                else:
+                    instrument = changes[symbol] = _create_instrument_from_spec(symbol, raw_spec)
+                    results.append(InstrumentBatchItemResult(symbol=symbol, ok=True, instrument=instrument))
+                    continue
+                results.append(InstrumentBatchItemResult(symbol=symbol, ok=False, error=error))
+            return self._commit_batch(changes, results)
+
+    async def update_many(self, items: Sequence[Tuple[str, InstrumentUpdate]]) -> InstrumentBatchResult:
+        """Validate every update first and apply them all, or none if any item fails."""
+        wanted = [(symbol.upper(), updates) for symbol, updates in items]
+        async with AsyncExitStack() as stack:
+            await self._lock_symbols(stack, (symbol for symbol, _ in wanted))
+            changes: Dict[str, Instrument] = {}
+            results: List[InstrumentBatchItemResult] = []
+            seen = set()
+            for symbol, updates in wanted:
+                instrument = self._instruments.get(symbol)
+                try:
+                    if symbol in seen:
+                        raise ValueError(f"Instrument {symbol} is listed more than once")
+                    seen.add(symbol)
+                    if instrument is None:
+                        raise ValueError(f"Instrument {symbol} not found")
+                    updated = _apply_update(instrument, updates)
+                except (ValueError, ValidationError) as exc:
+                    results.append(InstrumentBatchItemResult(symbol=symbol, ok=False, error=_error_message(exc)))
+                    continue
+                if updated is not instrument:
+                    changes[symbol] = updated
+                results.append(InstrumentBatchItemResult(symbol=symbol, ok=True, instrument=updated))
+            return self._commit_batch(changes, results)
+
+    def select(self, selector: InstrumentFilter) -> List[str]:
+        """Symbols of the current snapshot matching ``selector``."""
+        explicit = {symbol.upper() for symbol in selector.symbols} if selector.symbols is not None else None
+        pattern = selector.pattern.upper() if selector.pattern else None
+        return [
+            symbol
+            for symbol, instrument in self._instruments.items()
+            if (explicit is None or symbol in explicit)
+            and (pattern is None or fnmatchcase(symbol, pattern))
+            and (selector.is_active is None or instrument.is_active == selector.is_active)
+        ]
+
+    async def apply_template(self, selector: InstrumentFilter, updates: InstrumentUpdate) -> InstrumentBatchResult:
+        """Apply one ``InstrumentUpdate`` to every instrument matching ``selector``."""
+        return await self.update_many([(symbol, updates) for symbol in self.select(selector)])
+
+    async def reconcile_specs(self, specs: Mapping[str, Optional[SymbolSpec]]) -> Dict[str, Instrument]:
+        """Bring stored tick size, qty step and decimals in line with ``specs``.
+
+        ``None`` marks a delisted symbol; its instrument is deactivated.  Only
+        instruments whose values actually differ are rebuilt, and all of them
+        are published, persisted and announced as one batch.
+        """
+        affected = [symbol for symbol in specs if symbol in self._instruments]
+        async with AsyncExitStack() as stack:
+            await self._lock_symbols(stack, affected)
+            changes: Dict[str, Instrument] = {}
+            for symbol in affected:
+                instrument = self._instruments.get(symbol)
+                if instrument is None:
+                    continue
+                spec = specs[symbol]
+                if spec is None:
+                    if instrument.is_active:
+                        logger.warning("Instrument %s was delisted, deactivating it", symbol)
+                        changes[symbol] = instrument.model_copy(update={"is_active": False})
+                    continue
+                updates = {
+                    name: value for name, value in _spec_fields(spec).items() if getattr(instrument, name) != value
+                }
+                if updates:
+                    logger.info("Instrument %s spec changed: %s", symbol, ", ".join(sorted(updates)))
+                    changes[symbol] = instrument.model_copy(update=updates)
+            self._commit_batch(changes, [])
+            return changes
+
+    async def on_specs_changed(self, diff: SpecDiff) -> None:
+        await self.reconcile_specs(diff.changes())
+
     async def replace_all(self, instruments: Iterable[Instrument]) -> None:
-        async with self._lock:
-            self._instruments = {instrument.symbol: instrument for instrument in instruments}
-            await self._persist()
+        previous = self._instruments
+        self._publish({instrument.symbol: instrument for instrument in instruments})
+        self._persistence.submit_snapshot(self._instruments.values())
 
+        changes: Dict[str, Optional[Instrument]] = {symbol: None for symbol in previous if symbol not in self._instruments}
+        changes.update(self._instruments)
+        self._notify(changes)
 
-instrument_store = InstrumentStore()
 
+instrument_store = InstrumentStore()
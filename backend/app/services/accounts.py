@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from functools import partial
+from operator import attrgetter
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from app.core.config import DEFAULT_ACCOUNT_ID, Settings, get_settings
+from app.core.event_bus import EventBus, event_bus
+from app.core.supervisor import SupervisedTask, supervisor
+from app.core.tracing import tracer
+from app.repositories.instrument_store import InstrumentStore, instrument_store
+from app.services.bybit_client import BybitClient, bybit_client, create_bybit_client
+from app.services.bybit_specs import spec_registry
+from app.services.checkpoint import CheckpointStore, TradingCheckpoint, create_checkpoint_store
+from app.services.events import InstrumentsChanged, TickReceived, merge_changes
+from app.services.market_data import market_data_service, price_book
+from app.services.order_execution import OrderExecutor, order_executor
+from app.services.order_plan import OrderPlanEngine, order_plan_engine
+from app.services.persistence_worker import PersistenceWorker, persistence_worker
+from app.services.private_stream import PositionLedger, PrivateStreamService, private_stream
+from app.services.push_hub import state_feeds
+from app.services.risk import RiskEngine, RiskLimits, risk_engine
+from app.services.settings_service import SettingsService, settings_service
+from app.services.state_storage import StateBackend, create_state_storage, state_storage
+
+logger = logging.getLogger(__name__)
+
+_ACCOUNT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+
+class Account:
+    """Everything that belongs to one exchange (sub-)account.
+
+    An account owns its state namespace (settings and instruments), write-behind
+    persistence, instrument store, REST session with its own connection pool and
+    rate-limit buckets, order plans, risk aggregates, executor and private
+    stream.  Symbol specs and public tickers are shared by all accounts of the
+    process.
+
+    Instrument changes and ticks reach the account's consumers over the event
+    bus: ``market-data.<id>``, ``plans.<id>``, ``push.<id>`` and ``ticks.<id>``
+    each drain their own queue, so a slow push feed never delays planning.
+
+    While trading, a checkpoint of reference prices, order link ids and open
+    orders is written next to the state, so a restart resumes without
+    rediscovering every order first: the boot reconcile diffs against the
+    checkpoint, and the private stream's first resync is the single bulk
+    pass that corrects whatever changed in between.
+    """
+
+    def __init__(
+        self,
+        account_id: str,
+        storage: StateBackend,
+        client: BybitClient,
+        settings: SettingsService,
+        persistence: PersistenceWorker,
+        store: InstrumentStore,
+        engine: OrderPlanEngine,
+        risk: RiskEngine,
+        executor: OrderExecutor,
+        stream: PrivateStreamService,
+        bus: EventBus | None = None,
+        checkpoints: CheckpointStore | None = None,
+    ) -> None:
+        self.id = account_id
+        self.storage = storage
+        self.client = client
+        self.settings = settings
+        self.persistence = persistence
+        self.store = store
+        self.engine = engine
+        self.risk = risk
+        self.executor = executor
+        self.stream = stream
+        self.bus = bus if bus is not None else event_bus
+        self.checkpoints = checkpoints if checkpoints is not None else create_checkpoint_store(None, account_id)
+        self.trading = False
+        self._attached = False
+        self._checkpoint_task: Optional[SupervisedTask] = None
+        self._resume_from: Optional[TradingCheckpoint] = None
+
+    @classmethod
+    def create(cls, account_id: str, settings: Settings | None = None) -> "Account":
+        """Fresh account with its own services, persisted under ``accounts/<id>/``."""
+        if not _ACCOUNT_ID_PATTERN.match(account_id) or account_id == DEFAULT_ACCOUNT_ID:
+            raise ValueError(f"Invalid account id {account_id!r}: use up to 32 of a-z, 0-9, '_' and '-'")
+        settings = settings or get_settings()
+        storage = create_state_storage(settings, account_id)
+        client = create_bybit_client(settings)
+        persistence = PersistenceWorker(storage)
+        engine = OrderPlanEngine()
+        engine.bind_price_book(price_book)
+        risk = RiskEngine(account_id, engine, price_book, RiskLimits.from_settings(settings))
+        executor = OrderExecutor(client, engine, spec_registry, risk)
+        return cls(
+            account_id,
+            storage,
+            client,
+            SettingsService(storage),
+            persistence,
+            InstrumentStore(persistence),
+            engine,
+            risk,
+            executor,
+            PrivateStreamService(settings.bybit_private_ws_url, client, PositionLedger(), executor),
+            checkpoints=create_checkpoint_store(settings, account_id),
+        )
+
+    async def restore(self) -> None:
+        """Load credentials, instruments and the restart checkpoint and attach the account to the shared services."""
+        stored_settings = await self.settings.load()
+        self.client.set_credentials(stored_settings.bybit_api_key, stored_settings.bybit_secret_key)
+
+        self.persistence.start()
+        if not self._attached:
+            self._attach()
+
+        instruments, self._resume_from = await asyncio.gather(self.storage.load_instruments(), self.checkpoints.load())
+        await self.store.replace_all(instruments)
+        logger.info("[%s] Restored %s instruments from state", self.id, len(instruments))
+
+    def _attach(self) -> None:
+        self._attached = True
+        bus = self.bus
+        account_id = self.id
+        publish_feed = state_feeds.track_account(account_id, self.store)
+        self.store.add_listener(lambda changes: bus.publish(InstrumentsChanged(account_id, changes)))
+        for stage, handle in (
+            ("market-data", lambda changes: market_data_service.on_instruments_changed(changes, owner=account_id)),
+            ("plans", self.engine.on_instruments_changed),
+            ("push", publish_feed),
+        ):
+            bus.subscribe(
+                InstrumentsChanged,
+                lambda batch, handle=handle: handle(merge_changes(batch)),
+                name=f"{stage}.{account_id}",
+                where=lambda event: event.account_id == account_id,
+                merge=InstrumentsChanged.merged,
+            )
+        bus.subscribe(TickReceived, self._on_ticks, name=f"ticks.{account_id}", key=attrgetter("symbol"))
+        self.engine.add_listener(self.risk.on_plans_changed)
+        self.executor.bind_positions(self.stream.ledger)
+        self.stream.add_listener("position", self.executor.on_position)
+        self.stream.add_listener("resync", self.executor.on_resync)
+        self.stream.add_listener("position", self.risk.on_position)
+        self.stream.add_listener("resync", self.risk.on_resync)
+        spec_registry.add_listener(self.store.on_specs_changed)
+
+    def _on_ticks(self, batch: Sequence[TickReceived]) -> None:
+        # Coalesced per symbol, so each symbol appears at most once with its latest slot.
+        traced = tracer.enabled
+        dispatched = tracer.now() if traced else 0
+        for tick in batch:
+            self.engine.on_tick(tick.symbol, tick.slot)
+            self.risk.on_tick(tick.symbol, tick.slot)
+            if traced:
+                tracer.planned(self.id, tick.symbol, dispatched)
+
+    async def reconcile_specs(self) -> None:
+        """Catch up instruments persisted before the last spec change."""
+        reconciled = await self.store.reconcile_specs(
+            {symbol: spec_registry.get(symbol) for symbol in self.store.snapshot()}
+        )
+        if reconciled:
+            logger.info("[%s] Reconciled %s instruments with current specifications", self.id, len(reconciled))
+
+    async def start_trading(self, trading_enabled: bool) -> None:
+        if not self.client.has_credentials:
+            if trading_enabled:
+                logger.warning("[%s] Trading is enabled but Bybit API keys are not configured", self.id)
+            return
+        if not trading_enabled:
+            self.stream.start()
+            return
+        started = time.perf_counter()
+        self.engine.add_listener(self.executor.mark_dirty)
+        checkpoint, self._resume_from = self._resume_from, None
+        if checkpoint is not None:
+            self._resume(checkpoint)
+            await self.executor.reconcile()
+        else:
+            await self.executor.reconcile(refresh=True)
+        # Started after the boot reconcile so its resync snapshot also covers the orders just sent.
+        self.stream.start()
+        self.executor.start()
+        interval = get_settings().checkpoint_interval_seconds
+        self._checkpoint_task = supervisor.spawn(f"checkpoint.{self.id}", partial(self._write_checkpoints, interval))
+        self.trading = True
+        logger.info(
+            "[%s] Order execution started %s in %.1f ms",
+            self.id,
+            "from checkpoint" if checkpoint is not None else "after a full open-order sweep",
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def _resume(self, checkpoint: TradingCheckpoint) -> None:
+        seeded = self.engine.seed_reference_prices(checkpoint.references)
+        self.executor.restore(checkpoint.generations, checkpoint.open_orders)
+        self.stream.ledger.remember_executions(checkpoint.recent_executions)
+        logger.info(
+            "[%s] Resuming from a %.0f s old checkpoint: %s open orders, %s plans seeded",
+            self.id,
+            max(0.0, time.time() - checkpoint.saved_at),
+            len(checkpoint.open_orders),
+            len(seeded),
+        )
+
+    def checkpoint(self) -> TradingCheckpoint:
+        return TradingCheckpoint(
+            references=self.engine.reference_prices(),
+            generations=dict(self.executor.generations),
+            open_orders=list(self.executor.open_orders.values()),
+            recent_executions=self.stream.ledger.recent_executions(),
+            saved_at=time.time(),
+        )
+
+    async def _write_checkpoints(self, interval: float) -> None:
+        written = None
+        while True:
+            await asyncio.sleep(interval)
+            revision = (self.executor.revision, self.stream.ledger.executions_applied)
+            if revision != written:
+                await self.checkpoints.save(self.checkpoint())
+                written = revision
+
+    async def stop_trading(self) -> None:
+        await self.executor.stop()
+        if self._checkpoint_task is not None:
+            await self._checkpoint_task.stop()
+            self._checkpoint_task = None
+        await self.stream.stop()
+        if self.trading:
+            await self.checkpoints.save(self.checkpoint())
+        self.trading = False
+
+    async def close(self) -> None:
+        await self.persistence.stop()
+        await self.storage.compact()
+        await self.client.close()
+
+
+class AccountRegistry:
+    """Accounts served by this process, keyed by id; the default account always exists."""
+
+    def __init__(self, default: Account) -> None:
+        self._accounts: Dict[str, Account] = {default.id: default}
+
+    @property
+    def default(self) -> Account:
+        return self._accounts[DEFAULT_ACCOUNT_ID]
+
+    def add(self, account: Account) -> None:
+        if account.id in self._accounts:
+            raise ValueError(f"Account {account.id} is already registered")
+        self._accounts[account.id] = account
+
+    def get(self, account_id: str) -> Optional[Account]:
+        return self._accounts.get(account_id)
+
+    def all(self) -> List[Account]:
+        return list(self._accounts.values())
+
+    def __iter__(self) -> Iterator[Account]:
+        return iter(list(self._accounts.values()))
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    async def restore(self) -> None:
+        await asyncio.gather(*(account.restore() for account in self))
+
+
+def _create_registry(settings: Settings) -> AccountRegistry:
+    default = Account(
+        DEFAULT_ACCOUNT_ID,
+        state_storage,
+        bybit_client,
+        settings_service,
+        persistence_worker,
+        instrument_store,
+        order_plan_engine,
+        risk_engine,
+        order_executor,
+        private_stream,
+        checkpoints=create_checkpoint_store(settings),
+    )
+    registry = AccountRegistry(default)
+    for account_id in dict.fromkeys(settings.accounts):
+        if account_id != DEFAULT_ACCOUNT_ID:
+            registry.add(Account.create(account_id, settings))
+    return registry
+
+
+account_registry = _create_registry(get_settings())
@@ -0,0 +1,576 @@
+"""Replay historical klines or trades through the order plan of an ``Instrument``.
+
+Run from ``backend/``::
+
+    python -m app.services.backtest data/BTCUSDT-1m.csv --symbol BTCUSDT --tick-size 0.1 \\
+        --qty-step 0.001 --set entryVolumeUsdt=1000 \\
+        --grid tpLevels.0.stepUsdt=50,100,200 --grid slLong.stepUsdt=100,200
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.models.common import to_camel
+from app.models.instrument import Instrument
+from app.services.order_plan import (
+    LEG_COUNT,
+    LEG_ENTRY_LONG,
+    LEG_ENTRY_SHORT,
+    LEGS,
+    P_STEP,
+    P_TICK,
+    POSITION_IDX_LONG,
+    compute_plans,
+    instrument_params,
+)
+
+try:  # Parquet input is optional
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 250_000
+DEFAULT_MAKER_FEE = 0.0002
+DEFAULT_TAKER_FEE = 0.00055
+
+_COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "open": ("open", "o", "open_price"),
+    "high": ("high", "h", "high_price"),
+    "low": ("low", "l", "low_price"),
+    "close": ("close", "c", "close_price"),
+    "price": ("price", "last", "last_price", "lastprice", "exec_price"),
+}
+
+# Per-leg lookup tables derived from ``LEGS``.  Sell limits and buy stops fill
+# when the price rises to them, buy limits and sell stops when it falls.
+_LEG_UP = np.array([(side == "Sell") != is_trigger for _, side, _, _, is_trigger in LEGS])
+_LEG_LONG = np.array([position_idx == POSITION_IDX_LONG for _, _, position_idx, _, _ in LEGS])
+_LEG_REDUCE = np.array([reduce_only for _, _, _, reduce_only, _ in LEGS])
+_LEG_TRIGGER = np.array([is_trigger for *_, is_trigger in LEGS])
+_LEG_GROUP = [name.rsplit("_", 2)[0] if name.startswith(("tp_", "sl_")) else name.split("_")[0] for name, *_ in LEGS]
+
+
+@dataclass(slots=True)
+class Bars:
+    """One chunk of OHLC bars; trade prints are bars with ``open == high == low == close``."""
+
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> "Bars":
+        if "price" in columns:
+            price = columns["price"]
+            return cls(price, price, price, price)
+        return cls(columns["open"], columns["high"], columns["low"], columns["close"])
+
+
+def _resolve_columns(header: Sequence[str]) -> Dict[str, int]:
+    names = [name.strip().lower() for name in header]
+    found: Dict[str, int] = {}
+    for role, aliases in _COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                found[role] = names.index(alias)
+                break
+    if all(role in found for role in ("open", "high", "low", "close")):
+        return {role: found[role] for role in ("open", "high", "low", "close")}
+    if "price" in found:
+        return {"price": found["price"]}
+    if "close" in found:
+        return {"price": found["close"]}
+    raise ValueError(f"Expected open/high/low/close or price columns, got {list(header)}")
+
+
+def _iter_csv(path: Path, chunk_size: int) -> Iterator[Bars]:
+    with path.open("r", newline="") as handle:
+        columns = _resolve_columns(next(csv.reader([handle.readline()])))
+        roles = list(columns)
+        usecols = [columns[role] for role in roles]
+        while True:
+            lines = list(itertools.islice(handle, chunk_size))
+            if not lines:
+                return
+            data = np.loadtxt(lines, delimiter=",", usecols=usecols, dtype=np.float64, ndmin=2)
+            yield Bars.from_columns({role: np.ascontiguousarray(data[:, i]) for i, role in enumerate(roles)})
+
+
+def _iter_parquet(path: Path, chunk_size: int) -> Iterator[Bars]:
+    if pq is None:
+        raise RuntimeError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+    parquet_file = pq.ParquetFile(path)
+    names = parquet_file.schema_arrow.names
+    columns = _resolve_columns(names)
+    selected = {role: names[index] for role, index in columns.items()}
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(selected.values())):
+        yield Bars.from_columns(
+            {
+                role: batch.column(name).to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+                for role, name in selected.items()
+            }
+        )
+
+
+def iter_bars(path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Bars]:
+    """Stream ``path`` (CSV or Parquet, klines or trades) in chunks of ``chunk_size`` rows."""
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        return _iter_parquet(path, chunk_size)
+    return _iter_csv(path, chunk_size)
+
+
+@dataclass
+class BacktestResult:
+    index: int
+    symbol: str
+    pnl: float = 0.0
+    realised_pnl: float = 0.0
+    unrealised_pnl: float = 0.0
+    fees: float = 0.0
+    max_drawdown: float = 0.0
+    bars: int = 0
+    fills: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def fill_count(self) -> int:
+        return sum(self.fills.values())
+
+
+_BLOCK = 512
+
+
+class _FirstTouch:
+    """First index at or after ``start`` where ``values`` reaches each level.
+
+    From the chunk start this is a ``searchsorted`` on the running max.  Later
+    starts scan the partial block, then the running max of per-block maxima,
+    then one row per level, so a query costs O(n / block + block).
+    """
+
+    def __init__(self, values: np.ndarray) -> None:
+        self.values = values
+        self.size = len(values)
+        self.running = np.maximum.accumulate(values)
+        block_count = -(-self.size // _BLOCK)
+        padded = np.full(block_count * _BLOCK, -np.inf)
+        padded[: self.size] = values
+        self.blocks = padded.reshape(block_count, _BLOCK)
+        self.block_max = self.blocks.max(axis=1)
+
+    def first(self, start: int, levels: np.ndarray) -> np.ndarray:
+        if start == 0:
+            return np.searchsorted(self.running, levels, side="left")
+        result = np.full(len(levels), self.size, dtype=np.int64)
+        head_end = min(self.size, -(-start // _BLOCK) * _BLOCK)
+        missing = np.ones(len(levels), dtype=bool)
+        if head_end > start:
+            head = np.maximum.accumulate(self.values[start:head_end])
+            offsets = np.searchsorted(head, levels, side="left")
+            missing = offsets >= len(head)
+            result[~missing] = start + offsets[~missing]
+        if head_end < self.size and missing.any():
+            first_block = head_end // _BLOCK
+            positions = np.flatnonzero(missing)
+            wanted = levels[positions]
+            block_offsets = np.searchsorted(np.maximum.accumulate(self.block_max[first_block:]), wanted, side="left")
+            found = block_offsets < len(self.block_max) - first_block
+            blocks = first_block + block_offsets[found]
+            columns = (self.blocks[blocks] >= wanted[found][:, None]).argmax(axis=1)
+            result[positions[found]] = blocks * _BLOCK + columns
+        return result
+
+
+class _Chunk:
+    """A ``Bars`` chunk with the running extremes shared by every simulation.
+
+    ``rising``/``falling`` find the first bar whose high reaches, or whose low
+    falls to, a leg price.  Prefix and suffix min/max/drawdown/drawup of the close
+    let a simulation score any segment starting at the first or ending at the
+    last bar in O(1); only segments between two fills are scanned.
+    """
+
+    def __init__(self, bars: Bars) -> None:
+        close = bars.close
+        self.bars = bars
+        self.size = len(bars)
+        self.rising = _FirstTouch(bars.high)
+        self.falling = _FirstTouch(-bars.low)
+        self.prefix_min = np.minimum.accumulate(close)
+        self.prefix_max = np.maximum.accumulate(close)
+        self.prefix_drawdown = np.maximum.accumulate(self.prefix_max - close)
+        self.prefix_drawup = np.maximum.accumulate(close - self.prefix_min)
+        self.suffix_min = np.minimum.accumulate(close[::-1])[::-1]
+        self.suffix_max = np.maximum.accumulate(close[::-1])[::-1]
+        self.suffix_drawdown = np.maximum.accumulate((close - self.suffix_min)[::-1])[::-1]
+        self.suffix_drawup = np.maximum.accumulate((self.suffix_max - close)[::-1])[::-1]
+
+    def close_stats(self, start: int, end: int) -> Tuple[float, float, float, float]:
+        """``(min, max, max drawdown, max drawup)`` of the close over ``[start, end)``."""
+        if start == 0:
+            last = end - 1
+            return (
+                float(self.prefix_min[last]),
+                float(self.prefix_max[last]),
+                float(self.prefix_drawdown[last]),
+                float(self.prefix_drawup[last]),
+            )
+        if end == self.size:
+            return (
+                float(self.suffix_min[start]),
+                float(self.suffix_max[start]),
+                float(self.suffix_drawdown[start]),
+                float(self.suffix_drawup[start]),
+            )
+        close = self.bars.close[start:end]
+        running_max = np.maximum.accumulate(close)
+        running_min = np.minimum.accumulate(close)
+        return (
+            float(running_min[-1]),
+            float(running_max[-1]),
+            float((running_max - close).max()),
+            float((close - running_min).max()),
+        )
+
+
+class _Simulation:
+    """Hedge-mode position of one configuration, advanced bar chunk by bar chunk.
+
+    Each step finds the next bar that fills any pending leg, scores the equity
+    segment before it and applies the fills.  Legs activated by a fill (TP/SL
+    after an entry) become eligible from the next bar.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        symbol: str,
+        prices: np.ndarray,
+        qtys: np.ndarray,
+        maker_fee: float,
+        taker_fee: float,
+    ) -> None:
+        self.index = index
+        self.symbol = symbol
+        self.prices = prices
+        self.qtys = qtys
+        self.fee_rates = np.where(_LEG_TRIGGER, taker_fee, maker_fee)
+        self.pending = np.flatnonzero((qtys > 0) & ~_LEG_REDUCE)
+        self.long_qty = self.long_avg = 0.0
+        self.short_qty = self.short_avg = 0.0
+        self.realised = 0.0
+        self.fees = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.last_close = float("nan")
+        self.bars = 0
+        self.fills = np.zeros(LEG_COUNT, dtype=np.int64)
+
+    def run_chunk(self, chunk: _Chunk) -> None:
+        n = chunk.size
+        segment = search = 0
+        while True:
+            next_fill = n
+            if search < n and self.pending.size:
+                legs = self.pending
+                prices = self.prices[legs]
+                touches = np.where(
+                    _LEG_UP[legs],
+                    chunk.rising.first(search, prices),
+                    chunk.falling.first(search, -prices),
+                )
+                next_fill = min(n, int(touches.min()))
+            self._track_equity(chunk, segment, next_fill)
+            if next_fill >= n:
+                break
+            filled = legs[touches == next_fill]
+            for leg in filled:
+                self._fill(int(leg))
+            self.pending = np.setdiff1d(self.pending, filled, assume_unique=True)
+            segment, search = next_fill, next_fill + 1
+        self.last_close = float(chunk.bars.close[-1])
+        self.bars += n
+
+    def _fill(self, leg: int) -> None:
+        price = float(self.prices[leg])
+        qty = float(self.qtys[leg])
+        if _LEG_REDUCE[leg]:
+            if _LEG_LONG[leg]:
+                qty = min(qty, self.long_qty)
+                self.realised += qty * (price - self.long_avg)
+                self.long_qty -= qty
+            else:
+                qty = min(qty, self.short_qty)
+                self.realised += qty * (self.short_avg - price)
+                self.short_qty -= qty
+            if qty <= 0:
+                return
+        elif _LEG_LONG[leg]:
+            self.long_avg = (self.long_avg * self.long_qty + price * qty) / (self.long_qty + qty)
+            self.long_qty += qty
+        else:
+            self.short_avg = (self.short_avg * self.short_qty + price * qty) / (self.short_qty + qty)
+            self.short_qty += qty
+
+        if leg in (LEG_ENTRY_LONG, LEG_ENTRY_SHORT):
+            side = _LEG_LONG if leg == LEG_ENTRY_LONG else ~_LEG_LONG
+            activated = np.flatnonzero(_LEG_REDUCE & side & (self.qtys > 0))
+            self.pending = np.union1d(self.pending, activated)
+        self.fees += qty * price * float(self.fee_rates[leg])
+        self.fills[leg] += 1
+
+    def _track_equity(self, chunk: _Chunk, start: int, end: int) -> None:
+        if end <= start:
+            return
+        # Between fills equity is linear in the close: a + b * close.
+        a = self.realised - self.fees - self.long_qty * self.long_avg + self.short_qty * self.short_avg
+        b = self.long_qty - self.short_qty
+        low, high, drawdown, drawup = chunk.close_stats(start, end)
+        worst, best, swing = (low, high, drawdown) if b >= 0 else (high, low, drawup)
+        self.max_drawdown = max(self.max_drawdown, self.peak - (a + b * worst), abs(b) * swing)
+        self.peak = max(self.peak, a + b * best)
+
+    def result(self) -> BacktestResult:
+        unrealised = 0.0
+        if self.long_qty or self.short_qty:
+            unrealised = self.long_qty * (self.last_close - self.long_avg) + self.short_qty * (self.short_avg - self.last_close)
+        fills: Dict[str, int] = {}
+        for leg, count in enumerate(self.fills.tolist()):
+            if count:
+                fills[_LEG_GROUP[leg]] = fills.get(_LEG_GROUP[leg], 0) + count
+        return BacktestResult(
+            index=self.index,
+            symbol=self.symbol,
+            pnl=self.realised - self.fees + unrealised,
+            realised_pnl=self.realised,
+            unrealised_pnl=unrealised,
+            fees=self.fees,
+            max_drawdown=self.max_drawdown,
+            bars=self.bars,
+            fills=fills,
+        )
+
+
+def _build_simulations(
+    instruments: Sequence[Instrument],
+    reference: float,
+    maker_fee: float,
+    taker_fee: float,
+    offset: int = 0,
+) -> List[_Simulation]:
+    params = np.vstack([instrument_params(instrument) for instrument in instruments])
+    price_ticks = np.zeros((len(instruments), LEG_COUNT), dtype=np.int64)
+    qty_steps = np.zeros((len(instruments), LEG_COUNT), dtype=np.int64)
+    compute_plans(params, np.full(len(instruments), reference), price_ticks, qty_steps)
+    prices = price_ticks * params[:, P_TICK][:, None]
+    qtys = qty_steps * params[:, P_STEP][:, None]
+    return [
+        _Simulation(offset + row, instrument.symbol, prices[row], qtys[row], maker_fee, taker_fee)
+        for row, instrument in enumerate(instruments)
+    ]
+
+
+def run_backtest(
+    path: str | Path,
+    instruments: Sequence[Instrument],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    maker_fee: float = DEFAULT_MAKER_FEE,
+    taker_fee: float = DEFAULT_TAKER_FEE,
+    offset: int = 0,
+) -> List[BacktestResult]:
+    """Replay ``path`` once for all ``instruments``.
+
+    Plans are computed with ``compute_plans`` against the first open price, the
+    same way the live engine uses the market price when ``entryPriceUsdt`` is 0.
+    """
+    simulations: Optional[List[_Simulation]] = None
+    for bars in iter_bars(path, chunk_size):
+        if not len(bars):
+            continue
+        if simulations is None:
+            simulations = _build_simulations(instruments, float(bars.open[0]), maker_fee, taker_fee, offset)
+        chunk = _Chunk(bars)
+        for simulation in simulations:
+            simulation.run_chunk(chunk)
+    if simulations is None:
+        raise ValueError(f"No price data in {path}")
+    return [simulation.result() for simulation in simulations]
+
+
+def _run_batch(args: Tuple[str, List[Instrument], int, int, float, float]) -> List[BacktestResult]:
+    path, instruments, offset, chunk_size, maker_fee, taker_fee = args
+    return run_backtest(
+        path, instruments, chunk_size=chunk_size, maker_fee=maker_fee, taker_fee=taker_fee, offset=offset
+    )
+
+
+def run_sweep(
+    path: str | Path,
+    instruments: Sequence[Instrument],
+    *,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    maker_fee: float = DEFAULT_MAKER_FEE,
+    taker_fee: float = DEFAULT_TAKER_FEE,
+) -> List[BacktestResult]:
+    """Split ``instruments`` over a process pool; every worker streams the file once."""
+    workers = min(workers or os.cpu_count() or 1, len(instruments))
+    if workers <= 1:
+        return run_backtest(path, instruments, chunk_size=chunk_size, maker_fee=maker_fee, taker_fee=taker_fee)
+
+    size = -(-len(instruments) // workers)
+    batches = [
+        (str(path), list(instruments[start : start + size]), start, chunk_size, maker_fee, taker_fee)
+        for start in range(0, len(instruments), size)
+    ]
+    results: List[BacktestResult] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in pool.map(_run_batch, batches):
+            results.extend(batch)
+    return results
+
+
+def _set_path(payload: Any, path: Sequence[str], value: str) -> None:
+    *parents, last = path
+    for part in parents:
+        payload = payload[int(part)] if isinstance(payload, list) else payload[to_camel(part)]
+    if isinstance(payload, list):
+        payload[int(last)] = value
+    else:
+        key = to_camel(last)
+        if key not in payload:
+            raise ValueError(f"Unknown instrument field {'.'.join(path)!r}")
+        payload[key] = value
+
+
+def _get_path(payload: Any, path: Sequence[str]) -> Any:
+    for part in path:
+        payload = payload[int(part)] if isinstance(payload, list) else payload[to_camel(part)]
+    return payload
+
+
+def parameter_grid(base: Instrument, grid: Dict[str, Sequence[str]]) -> Tuple[List[Instrument], int]:
+    """Cartesian product of ``grid`` (dotted camelCase or snake_case paths) applied to ``base``.
+
+    Returns the valid configurations and the number of rejected combinations.
+    """
+    payload = base.model_dump_camel(mode="json")
+    keys = list(grid)
+    instruments: List[Instrument] = []
+    rejected = 0
+    for values in itertools.product(*(grid[key] for key in keys)):
+        candidate = copy.deepcopy(payload)
+        for key, value in zip(keys, values):
+            _set_path(candidate, key.split("."), value)
+        try:
+            instruments.append(Instrument.model_validate(candidate))
+        except ValidationError:
+            rejected += 1
+    return instruments, rejected
+
+
+def _parse_assignment(text: str) -> Tuple[str, List[str]]:
+    key, separator, values = text.partition("=")
+    if not separator or not values:
+        raise argparse.ArgumentTypeError(f"expected key=value[,value...], got {text!r}")
+    return key.strip(), [value.strip() for value in values.split(",")]
+
+
+def _base_instrument(args: argparse.Namespace) -> Instrument:
+    if args.instrument:
+        return Instrument.model_validate(json.loads(Path(args.instrument).read_text(encoding="utf-8")))
+    if not (args.symbol and args.tick_size and args.qty_step):
+        raise SystemExit("Pass --instrument FILE or --symbol with --tick-size and --qty-step")
+    from app.repositories.instrument_store import _create_instrument_from_spec
+    from app.services.symbol_specs import spec_from_steps
+
+    symbol = args.symbol.upper()
+    return _create_instrument_from_spec(symbol, spec_from_steps(symbol, args.tick_size, args.qty_step))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backtest grid/hedge instrument configurations.")
+    parser.add_argument("data", help="CSV or Parquet file with OHLC klines or trade prices")
+    parser.add_argument("--instrument", help="Instrument JSON as returned by /api/instruments")
+    parser.add_argument("--symbol")
+    parser.add_argument("--tick-size")
+    parser.add_argument("--qty-step")
+    parser.add_argument("--set", action="append", type=_parse_assignment, default=[], help="field=value override")
+    parser.add_argument("--grid", action="append", type=_parse_assignment, default=[], help="field=v1,v2,... sweep")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--maker-fee", type=float, default=DEFAULT_MAKER_FEE)
+    parser.add_argument("--taker-fee", type=float, default=DEFAULT_TAKER_FEE)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", help="Write all results to this CSV file")
+    args = parser.parse_args(argv)
+
+    base = _base_instrument(args)
+    overrides, _ = parameter_grid(base, {key: values[:1] for key, values in args.set})
+    if not overrides:
+        raise SystemExit("--set overrides produce an invalid instrument")
+    grid = {key: values for key, values in args.grid}
+    instruments, rejected = parameter_grid(overrides[0], grid)
+    if not instruments:
+        raise SystemExit("No valid configuration in the grid")
+
+    started = time.perf_counter()
+    results = run_sweep(
+        args.data,
+        instruments,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        maker_fee=args.maker_fee,
+        taker_fee=args.taker_fee,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{len(results)} configurations ({rejected} invalid skipped) in {elapsed:.2f} s")
+
+    keys = [key.split(".") for key in grid]
+    header = [*grid, "pnl", "realised", "unrealised", "fees", "max_drawdown", "fills"]
+    rows = []
+    for result in sorted(results, key=lambda item: item.pnl, reverse=True):
+        config = instruments[result.index].model_dump_camel(mode="json")
+        rows.append(
+            [
+                *(str(_get_path(config, key)) for key in keys),
+                f"{result.pnl:.4f}",
+                f"{result.realised_pnl:.4f}",
+                f"{result.unrealised_pnl:.4f}",
+                f"{result.fees:.4f}",
+                f"{result.max_drawdown:.4f}",
+                json.dumps(result.fills, sort_keys=True),
+            ]
+        )
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            writer.writerows(rows)
+    for row in [header, *rows[: args.top]]:
+        print("  ".join(f"{cell:>14}" for cell in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import counter, histogram
+from app.services.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# retCodes Bybit documents as transient: server timeout, timestamp drift,
+# rate limit and internal errors.
+_RETRYABLE_RET_CODES = frozenset({10000, 10002, 10006, 10016, 10429})
+_RETRYABLE_HTTP_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_request_seconds = histogram(
+    "bybit_request_seconds",
+    "Latency of individual Bybit REST attempts",
+    ("operation", "outcome"),
+)
+_request_retries = counter("bybit_request_retries_total", "Retried Bybit REST attempts", ("operation",))
+
+
+class BybitAPIError(RuntimeError):
+    def __init__(self, operation: str, ret_code: int, ret_msg: str, payload: Any = None) -> None:
+        super().__init__(f"[{operation}] Bybit API error {ret_code}: {ret_msg}")
+        self.operation = operation
+        self.ret_code = ret_code
+        self.ret_msg = ret_msg
+        self.payload = payload
+
+
+class BybitClient:
+    """Native asyncio client for the Bybit v5 REST API.
+
+    A single ``httpx.AsyncClient`` keeps connections alive between calls.  Pass
+    ``transport`` (e.g. ``httpx.MockTransport`` or ``httpx.ASGITransport``) to run
+    against a local fake exchange.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        api_secret: str = "",
+        *,
+        recv_window: int = 5_000,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        max_connections: int = 20,
+        transport: httpx.AsyncBaseTransport | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
+        self._base_url = base_url.rstrip("/")
+        self._api_key = api_key.strip()
+        self._api_secret = api_secret.strip()
+        self._recv_window = recv_window
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60.0,
+        )
+        self._transport = transport
+        self._rate_limiter = rate_limiter
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def has_credentials(self) -> bool:
+        return bool(self._api_key and self._api_secret)
+
+    def set_credentials(self, api_key: str, api_secret: str) -> None:
+        self._api_key = api_key.strip()
+        self._api_secret = api_secret.strip()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self._base_url,
+                timeout=self._timeout,
+                limits=self._limits,
+                transport=self._transport,
+                headers={"Content-Type": "application/json"},
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _sign(self, timestamp: str, payload: str) -> str:
+        message = f"{timestamp}{self._api_key}{self._recv_window}{payload}"
+        return hmac.new(self._api_secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _auth_headers(self, payload: str) -> Dict[str, str]:
+        if not self.has_credentials:
+            raise RuntimeError("Bybit API credentials are not configured")
+        timestamp = str(int(time.time() * 1000))
+        return {
+            "X-BAPI-API-KEY": self._api_key,
+            "X-BAPI-TIMESTAMP": timestamp,
+            "X-BAPI-RECV-WINDOW": str(self._recv_window),
+            "X-BAPI-SIGN": self._sign(timestamp, payload),
+        }
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self._backoff_max, self._backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+        auth: bool = False,
+        operation: Optional[str] = None,
+        cost: float = 1.0,
+        envelope: bool = False,
+    ) -> Dict[str, Any]:
+        """Perform a request and return ``result`` (or the whole envelope).
+
+        Transient transport failures and retryable ``retCode`` values are retried
+        with exponential backoff; everything else raises ``BybitAPIError``.
+        With a rate limiter configured every attempt first takes ``cost`` tokens
+        from the bucket of ``path``.
+        """
+        operation = operation or path
+        query = {key: value for key, value in (params or {}).items() if value is not None}
+        query_string = urlencode(query)
+        content = json.dumps(body, separators=(",", ":")) if body is not None else None
+
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire(path, cost)
+            headers = self._auth_headers(content if method == "POST" else query_string) if auth else None
+            started = time.perf_counter()
+            try:
+                response = await self._http().request(
+                    method,
+                    f"{path}?{query_string}" if query_string else path,
+                    content=content,
+                    headers=headers,
+                )
+            except httpx.TransportError as exc:
+                _request_seconds.labels(operation, "transport_error").observe(time.perf_counter() - started)
+                if attempt >= self._max_retries:
+                    raise RuntimeError(f"[{operation}] request failed: {exc}") from exc
+                logger.warning("[%s] transport error, retrying: %s", operation, exc)
+                _request_retries.labels(operation).inc()
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            elapsed = time.perf_counter() - started
+
+            if response.status_code in _RETRYABLE_HTTP_STATUSES and attempt < self._max_retries:
+                _request_seconds.labels(operation, "http_error").observe(elapsed)
+                logger.warning("[%s] HTTP %s, retrying", operation, response.status_code)
+                _request_retries.labels(operation).inc()
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            try:
+                payload = response.json()
+            except ValueError as exc:
+                _request_seconds.labels(operation, "http_error").observe(elapsed)
+                raise RuntimeError(
+                    f"[{operation}] unexpected response (HTTP {response.status_code}): {response.text[:200]!r}"
+                ) from exc
+            if not isinstance(payload, dict):
+                _request_seconds.labels(operation, "http_error").observe(elapsed)
+                raise RuntimeError(f"[{operation}] unexpected response type: {payload!r}")
+
+            ret_code = payload.get("retCode")
+            if ret_code == 0:
+                _request_seconds.labels(operation, "ok").observe(elapsed)
+                return payload if envelope else payload.get("result") or {}
+
+            _request_seconds.labels(operation, "api_error").observe(elapsed)
+            if ret_code in _RETRYABLE_RET_CODES and attempt < self._max_retries:
+                logger.warning("[%s] retCode %s, retrying: %s", operation, ret_code, payload.get("retMsg"))
+                _request_retries.labels(operation).inc()
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            raise BybitAPIError(operation, int(ret_code or -1), str(payload.get("retMsg", "")), payload)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None, *, auth: bool = False) -> Dict[str, Any]:
+        return await self.request("GET", path, params=params, auth=auth)
+
+    async def post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.request("POST", path, body=body, auth=True)
+
+    async def get_open_orders(
+        self,
+        category: str = "linear",
+        settle_coin: str = "USDT",
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        return await self.request(
+            "GET",
+            "/v5/order/realtime",
+            params={"category": category, "settleCoin": settle_coin, "cursor": cursor, "limit": limit},
+            auth=True,
+            operation="get_open_orders",
+        )
+
+    async def get_all_open_orders(self, category: str = "linear", settle_coin: str = "USDT") -> List[Dict[str, Any]]:
+        orders: List[Dict[str, Any]] = []
+        cursor: Optional[str] = None
+        while True:
+            result = await self.get_open_orders(category, settle_coin, cursor)
+            orders.extend(result.get("list") or [])
+            cursor = result.get("nextPageCursor")
+            if not cursor:
+                return orders
+
+    async def get_order(self, symbol: str, order_link_id: str, category: str = "linear") -> Optional[Dict[str, Any]]:
+        """The order holding ``order_link_id``, open or recently closed; ``None`` when the exchange has none."""
+        result = await self.request(
+            "GET",
+            "/v5/order/realtime",
+            params={"category": category, "symbol": symbol, "orderLinkId": order_link_id},
+            auth=True,
+            operation="get_order",
+        )
+        items = result.get("list") or []
+        return items[0] if items else None
+
+    async def get_positions(
+        self,
+        category: str = "linear",
+        settle_coin: str = "USDT",
+        cursor: Optional[str] = None,
+        limit: int = 200,
+    ) -> Dict[str, Any]:
+        return await self.request(
+            "GET",
+            "/v5/position/list",
+            params={"category": category, "settleCoin": settle_coin, "cursor": cursor, "limit": limit},
+            auth=True,
+            operation="get_positions",
+        )
+
+    async def get_all_positions(self, category: str = "linear", settle_coin: str = "USDT") -> List[Dict[str, Any]]:
+        positions: List[Dict[str, Any]] = []
+        cursor: Optional[str] = None
+        while True:
+            result = await self.get_positions(category, settle_coin, cursor)
+            positions.extend(result.get("list") or [])
+            cursor = result.get("nextPageCursor")
+            if not cursor:
+                return positions
+
+    def websocket_auth_args(self, expires_in_ms: int = 10_000) -> List[Any]:
+        """Arguments of the private WebSocket ``auth`` operation."""
+        if not self.has_credentials:
+            raise RuntimeError("Bybit API credentials are not configured")
+        expires = int(time.time() * 1000) + expires_in_ms
+        signature = hmac.new(
+            self._api_secret.encode("utf-8"),
+            f"GET/realtime{expires}".encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+        return [self._api_key, expires, signature]
+
+    async def _batch(self, path: str, operation: str, category: str, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self.request(
+            "POST",
+            path,
+            body={"category": category, "request": requests},
+            auth=True,
+            operation=operation,
+            envelope=True,
+        )
+
+    async def place_batch_orders(self, requests: List[Dict[str, Any]], category: str = "linear") -> Dict[str, Any]:
+        return await self._batch("/v5/order/create-batch", "place_batch_orders", category, requests)
+
+    async def amend_batch_orders(self, requests: List[Dict[str, Any]], category: str = "linear") -> Dict[str, Any]:
+        return await self._batch("/v5/order/amend-batch", "amend_batch_orders", category, requests)
+
+    async def cancel_batch_orders(self, requests: List[Dict[str, Any]], category: str = "linear") -> Dict[str, Any]:
+        return await self._batch("/v5/order/cancel-batch", "cancel_batch_orders", category, requests)
+
+    async def get_instruments_info(
+        self,
+        category: str = "linear",
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+    ) -> Dict[str, Any]:
+        return await self.request(
+            "GET",
+            "/v5/market/instruments-info",
+            params={"category": category, "cursor": cursor, "limit": limit},
+            operation="get_instruments_info",
+        )
+
+
+def create_bybit_client(settings: Settings | None = None) -> BybitClient:
+    """Client with its own connection pool and rate-limit buckets (one per account)."""
+    settings = settings or get_settings()
+    return BybitClient(
+        settings.bybit_rest_url,
+        recv_window=settings.bybit_recv_window,
+        timeout=settings.bybit_timeout_seconds,
+        rate_limiter=RateLimiter(),
+    )
+
+
+bybit_client = create_bybit_client()
@@ -1,56 +1,275 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Dict, Optional
+import hashlib
+import inspect
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
-from dotenv import load_dotenv
-from pybit.unified_trading import HTTP
+from app.core.config import get_settings
+from app.core.metrics import counter, gauge, histogram
+from app.core.supervisor import SupervisedTask, supervisor
+from app.services.bybit_client import BybitClient, bybit_client
+from app.services.symbol_specs import SPEC_FIELDS, SpecTable, SymbolSpec
 
-from app.services.settings_service import settings_service
+logger = logging.getLogger(__name__)
+
+SPEC_SNAPSHOT_TTL_SECONDS = 6 * 60 * 60
+# Version 2 stores the full filter set as one row per symbol; older snapshots are refetched.
+SPEC_SNAPSHOT_VERSION = 2
+
+_refresh_seconds = histogram("spec_refresh_seconds", "Duration of SpecRegistry.refresh")
+_refresh_pages = gauge("spec_refresh_pages", "instruments-info pages fetched by the last spec refresh")
+_refresh_pages_total = counter("spec_refresh_pages_total", "instruments-info pages fetched by spec refreshes")
+_spec_changes = counter("spec_changes_total", "Symbols added, delisted or changed by spec refreshes", ("kind",))
+
+
+def _serialize_specs(specs: Dict[str, SymbolSpec]) -> Dict[str, List[str]]:
+    return {symbol: spec.to_row() for symbol, spec in specs.items()}
+
+
+def _specs_hash(serialized: Dict[str, List[str]]) -> str:
+    canonical = json.dumps(serialized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class SpecDiff:
+    """Per-symbol difference between two spec sets."""
+
+    added: Dict[str, SymbolSpec] = field(default_factory=dict)
+    delisted: Dict[str, SymbolSpec] = field(default_factory=dict)
+    # symbol -> (previous, current)
+    changed: Dict[str, Tuple[SymbolSpec, SymbolSpec]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.delisted or self.changed)
+
+    def changed_fields(self, symbol: str) -> List[str]:
+        previous, current = self.changed[symbol]
+        return [name for name in SymbolSpec.__slots__ if getattr(previous, name) != getattr(current, name)]
+
+    def changes(self) -> Dict[str, Optional[SymbolSpec]]:
+        """``{symbol: spec}`` for added and changed symbols, ``{symbol: None}`` for delisted ones."""
+        result: Dict[str, Optional[SymbolSpec]] = dict.fromkeys(self.delisted)
+        result.update(self.added)
+        result.update((symbol, current) for symbol, (_, current) in self.changed.items())
+        return result
+
+
+def diff_specs(previous: Dict[str, SymbolSpec], current: Dict[str, SymbolSpec]) -> SpecDiff:
+    diff = SpecDiff()
+    for symbol, spec in current.items():
+        known = previous.get(symbol)
+        if known is None:
+            diff.added[symbol] = spec
+        elif known is not spec and known != spec:
+            diff.changed[symbol] = (known, spec)
+    for symbol, spec in previous.items():
+        if symbol not in current:
+            diff.delisted[symbol] = spec
+    return diff
+
+
+SpecListener = Callable[[SpecDiff], Union[None, Awaitable[None]]]
 
 
 class SpecRegistry:
-    def __init__(self) -> None:
-        self._specs: Dict[str, Dict[str, str]] = {}
+    """Keep Bybit linear specs in memory, backed by an on-disk snapshot."""
+
+    def __init__(self, snapshot_path: Path | None = None, client: BybitClient | None = None) -> None:
+        self._client = client or bybit_client
+        state_dir = Path.home() / ".grid_hedge_bot"
+        self._snapshot_path = snapshot_path or state_dir / "specs.json"
+        self._specs: Dict[str, SymbolSpec] = {}
+        self._table: Optional[SpecTable] = None
+        self._hash: Optional[str] = None
+        self._fetched_at: Optional[float] = None
         self._lock = asyncio.Lock()
+        self._refresh_task: Optional[SupervisedTask] = None
+        self._periodic_task: Optional[SupervisedTask] = None
+        self._listeners: List[SpecListener] = []
+
+    def add_listener(self, listener: SpecListener) -> None:
+        """Receive a ``SpecDiff`` after every refresh that changed something.
+
+        Coroutine listeners are awaited before ``refresh`` returns, so their
+        work (e.g. reconciling instruments) is ordered with the refreshes.
+        """
+        self._listeners.append(listener)
+
+    async def _notify(self, diff: SpecDiff) -> None:
+        for listener in self._listeners:
+            try:
+                result = listener(diff)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:  # pragma: no cover - listener bugs must not break refreshes
+                logger.exception("Spec listener %r failed", listener)
+
+    @property
+    def fetched_at(self) -> Optional[float]:
+        return self._fetched_at
 
-    async def refresh(self) -> Dict[str, Dict[str, str]]:
+    @property
+    def content_hash(self) -> Optional[str]:
+        return self._hash
+
+    def is_stale(self, max_age: float = SPEC_SNAPSHOT_TTL_SECONDS) -> bool:
+        if self._fetched_at is None:
+            return True
+        return time.time() - self._fetched_at > max_age
+
+    async def load_cached(self) -> bool:
+        """Serve specs from the persisted snapshot, returns False when none is usable."""
+        snapshot = await asyncio.to_thread(self._read_snapshot)
+        if snapshot is None:
+            return False
+
+        async with self._lock:
+            if self._hash is None:
+                self._set_specs(snapshot["specs"])
+                self._hash = snapshot["hash"]
+                self._fetched_at = snapshot["fetched_at"]
+        return True
+
+    def _set_specs(self, specs: Dict[str, SymbolSpec]) -> None:
+        self._specs = specs
+        self._table = None
+
+    async def refresh(self) -> Dict[str, SymbolSpec]:
         async with self._lock:
-            specs = await asyncio.to_thread(self._load_specs)
-            self._specs = specs
-            return specs
+            started = time.perf_counter()
+            specs = await self._load_specs()
+            serialized = _serialize_specs(specs)
+            content_hash = _specs_hash(serialized)
+            fetched_at = time.time()
+
+            diff: Optional[SpecDiff] = None
+            if content_hash != self._hash:
+                diff = diff_specs(self._specs, specs)
+                self._set_specs(specs)
+                self._hash = content_hash
+                logger.info(
+                    "Bybit specifications changed: %s symbols, %s added, %s delisted, %s changed",
+                    len(specs),
+                    len(diff.added),
+                    len(diff.delisted),
+                    len(diff.changed),
+                )
+                for kind, entries in (("added", diff.added), ("delisted", diff.delisted), ("changed", diff.changed)):
+                    if entries:
+                        _spec_changes.labels(kind).inc(len(entries))
+            self._fetched_at = fetched_at
+
+            await asyncio.to_thread(self._write_snapshot, serialized, content_hash, fetched_at)
+            if diff:
+                await self._notify(diff)
+            _refresh_seconds.observe(time.perf_counter() - started)
+            return self._specs
+
+    def schedule_refresh(self, max_age: float | None = None) -> None:
+        """Revalidate specs in the background unless a refresh is already running.
+
+        With ``max_age`` set, a snapshot younger than that is considered fresh and
+        no request to Bybit is made.
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if max_age is not None and not self.is_stale(max_age):
+            return
+        self._refresh_task = supervisor.run_once("spec-revalidate", self._refresh_background)
 
-    def all(self) -> Dict[str, Dict[str, str]]:
+    async def _refresh_background(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as exc:
+            logger.warning("Failed to revalidate instrument specifications: %s", exc)
+
+    def start_periodic_refresh(self, interval: float) -> None:
+        if interval > 0 and (self._periodic_task is None or self._periodic_task.done()):
+            self._periodic_task = supervisor.spawn("spec-refresh", partial(self._refresh_periodically, interval))
+
+    async def stop(self) -> None:
+        for task in (self._periodic_task, self._refresh_task):
+            if task is not None:
+                await task.stop()
+        self._periodic_task = None
+        self._refresh_task = None
+
+    async def _refresh_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self._refresh_background()
+
+    def all(self) -> Dict[str, SymbolSpec]:
         return dict(self._specs)
 
-    def get(self, symbol: str) -> Optional[Dict[str, str]]:
+    def get(self, symbol: str) -> Optional[SymbolSpec]:
         return self._specs.get(symbol.upper())
 
-    @staticmethod
-    def _load_specs() -> Dict[str, Dict[str, str]]:
-        load_dotenv()
-        stored = settings_service.current()
+    @property
+    def table(self) -> SpecTable:
+        """Array view of the current specs, built on first use after each change."""
+        if self._table is None:
+            self._table = SpecTable(self._specs.values())
+        return self._table
 
-        credentials: Dict[str, str] = {}
-        api_key = stored.bybit_api_key.strip()
-        api_secret = stored.bybit_secret_key.strip()
-        if api_key and api_secret:
-            credentials["api_key"] = api_key
-            credentials["api_secret"] = api_secret
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        if not self._snapshot_path.exists():
+            return None
+        try:
+            payload = json.loads(self._snapshot_path.read_text(encoding="utf-8"))
+            if payload.get("version") != SPEC_SNAPSHOT_VERSION:
+                logger.info("Spec snapshot has an outdated format, it will be refetched")
+                return None
+            serialized = payload["specs"]
+            content_hash = payload["hash"]
+            fetched_at = float(payload["fetched_at"])
+            if not isinstance(serialized, dict) or not serialized:
+                raise ValueError("Snapshot does not contain specifications")
+            if payload.get("fields") != list(SPEC_FIELDS):
+                raise ValueError("Snapshot fields do not match this version")
+            if _specs_hash(serialized) != content_hash:
+                logger.warning("Spec snapshot hash mismatch, ignoring snapshot")
+                return None
+            specs = {symbol: SymbolSpec.from_row(symbol, row) for symbol, row in serialized.items()}
+        except (OSError, ValueError, KeyError, TypeError, ArithmeticError) as exc:
+            logger.warning("Ignoring unreadable spec snapshot: %s", exc)
+            return None
 
-        client = HTTP(testnet=False, timeout=10_000, recv_window=5_000, **credentials)
+        return {"specs": specs, "hash": content_hash, "fetched_at": fetched_at}
 
-        specs: Dict[str, Dict[str, str]] = {}
+    def _write_snapshot(self, serialized: Dict[str, List[str]], content_hash: str, fetched_at: float) -> None:
+        self._snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._snapshot_path.with_suffix(".tmp")
+        data = json.dumps(
+            {
+                "version": SPEC_SNAPSHOT_VERSION,
+                "fetched_at": fetched_at,
+                "hash": content_hash,
+                "fields": list(SPEC_FIELDS),
+                "specs": serialized,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        tmp_path.write_text(data, encoding="utf-8")
+        tmp_path.replace(self._snapshot_path)
+
+    async def _load_specs(self) -> Dict[str, SymbolSpec]:
+        specs: Dict[str, SymbolSpec] = {}
         cursor: Optional[str] = None
+        pages = 0
 
         while True:
-            response = client.get_instruments_info(category="linear", cursor=cursor)
-            if not isinstance(response, dict):
-                raise RuntimeError(f"[get_instruments_info] unexpected response type: {response!r}")
-            if response.get("retCode") != 0:
-                raise RuntimeError(f"[get_instruments_info] Bybit API error: {response}")
-
-            result = response.get("result") or {}
+            result = await self._client.get_instruments_info(category="linear", cursor=cursor)
+            pages += 1
             instruments = result.get("list") or []
 
             for instrument in instruments:
@@ -59,24 +278,20 @@ class SpecRegistry:
                 if instrument.get("contractType") != "LinearPerpetual":
                     continue
 
-                symbol = instrument.get("symbol")
-                price = instrument.get("priceFilter") or {}
-                lot = instrument.get("lotSizeFilter") or {}
-
-                tick_size = price.get("tickSize")
-                qty_step = lot.get("qtyStep")
-
-                if symbol and tick_size is not None and qty_step is not None:
-                    specs[str(symbol)] = {
-                        "tick_size": str(tick_size),
-                        "qty_step": str(qty_step),
-                    }
+                spec = SymbolSpec.from_bybit(instrument)
+                if spec is None:
+                    continue
+                known = self._specs.get(spec.symbol)
+                # Unchanged entries keep their identity, so diffing skips them cheaply.
+                specs[spec.symbol] = known if known == spec else spec
 
             cursor = result.get("nextPageCursor")
             if not cursor:
                 break
 
+        _refresh_pages.set(pages)
+        _refresh_pages_total.inc(pages)
         return dict(sorted(specs.items(), key=lambda item: item[0]))
 
 
-spec_registry = SpecRegistry()
+spec_registry = SpecRegistry(get_settings().resolved_state_dir() / "specs.json")
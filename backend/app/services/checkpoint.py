@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import DEFAULT_ACCOUNT_ID, Settings, get_settings
+from app.core.metrics import BYTE_BUCKETS, histogram
+from app.services.order_execution import LegKey, OpenOrder, _decimal, parse_order_link_id
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 2
+
+_write_seconds = histogram("checkpoint_write_seconds", "Duration of trading checkpoint writes")
+_write_bytes = histogram("checkpoint_write_bytes", "Size of trading checkpoint writes", buckets=BYTE_BUCKETS)
+
+
+@dataclass
+class TradingCheckpoint:
+    """Trading state of one account that the exchange cannot hand back in one cheap call.
+
+    ``references`` are the prices the plans were last computed from,
+    ``generations`` the ``orderLinkId`` generation of every leg that was ever
+    closed, ``open_orders`` the executor's view of its resting orders and
+    ``recent_executions`` the ``execId`` of the latest private executions
+    applied, oldest first.
+    """
+
+    references: Dict[str, float] = field(default_factory=dict)
+    generations: Dict[LegKey, int] = field(default_factory=dict)
+    open_orders: List[OpenOrder] = field(default_factory=list)
+    recent_executions: List[str] = field(default_factory=list)
+    saved_at: float = 0.0
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Row-oriented JSON payload; orders are keyed by ``orderLinkId``, which encodes symbol and leg."""
+        return {
+            "version": CHECKPOINT_VERSION,
+            "savedAt": self.saved_at,
+            "recentExecutions": self.recent_executions,
+            "references": self.references,
+            "generations": [[symbol, leg, generation] for (symbol, leg), generation in self.generations.items()],
+            "orders": [
+                [
+                    order.order_link_id,
+                    order.order_id,
+                    order.side,
+                    str(order.price),
+                    str(order.qty),
+                    str(order.trigger_price),
+                    order.position_idx,
+                ]
+                for order in self.open_orders
+            ],
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "TradingCheckpoint":
+        if payload.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {payload.get('version')!r}")
+        orders: List[OpenOrder] = []
+        for link_id, order_id, side, price, qty, trigger_price, position_idx in payload.get("orders") or []:
+            parsed = parse_order_link_id(link_id)
+            if parsed is None:
+                continue
+            orders.append(
+                OpenOrder(
+                    symbol=parsed[0],
+                    order_link_id=link_id,
+                    side=side,
+                    price=_decimal(price),
+                    qty=_decimal(qty),
+                    trigger_price=_decimal(trigger_price),
+                    position_idx=int(position_idx),
+                    order_id=order_id,
+                )
+            )
+        return cls(
+            references={str(symbol): float(price) for symbol, price in (payload.get("references") or {}).items()},
+            generations={
+                (str(symbol), int(leg)): int(generation)
+                for symbol, leg, generation in payload.get("generations") or []
+            },
+            open_orders=orders,
+            recent_executions=[str(exec_id) for exec_id in payload.get("recentExecutions") or []],
+            saved_at=float(payload.get("savedAt") or 0.0),
+        )
+
+
+class CheckpointStore:
+    """One JSON file per account next to its ``StateStorage``, replaced atomically on every save.
+
+    A missing, unreadable or foreign checkpoint loads as ``None`` so the caller
+    falls back to a full rediscovery through REST.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = asyncio.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _read(self) -> Optional[TradingCheckpoint]:
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+            return TradingCheckpoint.from_payload(payload)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            logger.warning("Ignoring unusable checkpoint %s: %s", self._path, exc)
+            return None
+
+    def _write(self, payload: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_suffix(".tmp")
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(self._path)
+        _write_bytes.observe(len(data))
+        _write_seconds.observe(time.perf_counter() - started)
+
+    async def load(self) -> Optional[TradingCheckpoint]:
+        async with self._lock:
+            return await asyncio.to_thread(self._read)
+
+    async def save(self, checkpoint: TradingCheckpoint) -> None:
+        # Open orders are mutated in place by the executor, so the payload is built on the loop.
+        payload = checkpoint.to_payload()
+        async with self._lock:
+            await asyncio.to_thread(self._write, payload)
+
+
+def create_checkpoint_store(settings: Settings | None = None, account_id: str = DEFAULT_ACCOUNT_ID) -> CheckpointStore:
+    settings = settings or get_settings()
+    return CheckpointStore(settings.account_state_dir(account_id) / "checkpoint.json")
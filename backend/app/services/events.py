@@ -0,0 +1,40 @@
+"""Typed events exchanged between services over ``event_bus``."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping, Optional
+
+from app.core.event_bus import event_bus
+from app.models.instrument import Instrument
+
+
+@dataclass(frozen=True, slots=True)
+class InstrumentsChanged:
+    """Committed ``InstrumentStore`` changes of one account; ``None`` marks a deleted symbol."""
+
+    account_id: str
+    changes: Mapping[str, Optional[Instrument]]
+
+    def merged(self, newer: "InstrumentsChanged") -> "InstrumentsChanged":
+        return InstrumentsChanged(self.account_id, {**self.changes, **newer.changes})
+
+
+@dataclass(frozen=True, slots=True)
+class TickReceived:
+    """A ticker update was written to ``price_book`` slot ``slot``."""
+
+    symbol: str
+    slot: int
+
+
+def merge_changes(events: Iterable[InstrumentsChanged]) -> Dict[str, Optional[Instrument]]:
+    """Net effect of a batch of changes, later events winning."""
+    merged: Dict[str, Optional[Instrument]] = {}
+    for event in events:
+        merged.update(event.changes)
+    return merged
+
+
+def publish_tick(symbol: str, slot: int) -> None:
+    """``MarketDataService`` listener handing ticks to the bus."""
+    event_bus.publish(TickReceived(symbol, slot))
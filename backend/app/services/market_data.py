@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake, InvalidURI
+
+from app.core.config import get_settings
+from app.core.supervisor import SupervisedTask, supervisor
+from app.core.tracing import tracer
+from app.models.instrument import Instrument
+
+logger = logging.getLogger(__name__)
+
+_NAN = float("nan")
+_SUBSCRIBE_BATCH = 10
+
+
+class PriceBook:
+    """Last price and best bid/ask per symbol in flat ``array('d')`` columns.
+
+    Every symbol owns a fixed slot.  Hot-path readers can resolve the slot once
+    with ``index_of`` and then read ``last[slot]``/``bid[slot]``/``ask[slot]``
+    directly; missing values are NaN.  Growing the book replaces the arrays
+    instead of resizing them, so buffers exported to NumPy stay valid.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._capacity = capacity
+        self.last = array("d", [_NAN]) * capacity
+        self.bid = array("d", [_NAN]) * capacity
+        self.ask = array("d", [_NAN]) * capacity
+        self.updated_at = array("d", [0.0]) * capacity
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    @property
+    def symbols(self) -> List[str]:
+        return self._symbols
+
+    def index_of(self, symbol: str) -> Optional[int]:
+        return self._index.get(symbol)
+
+    def slot(self, symbol: str) -> int:
+        index = self._index.get(symbol)
+        if index is None:
+            index = len(self._symbols)
+            if index >= self._capacity:
+                self._grow()
+            self._index[symbol] = index
+            self._symbols.append(symbol)
+        return index
+
+    def _grow(self) -> None:
+        extra = self._capacity
+        self.last = self.last + array("d", [_NAN]) * extra
+        self.bid = self.bid + array("d", [_NAN]) * extra
+        self.ask = self.ask + array("d", [_NAN]) * extra
+        self.updated_at = self.updated_at + array("d", [0.0]) * extra
+        self._capacity += extra
+
+    def update(
+        self,
+        symbol: str,
+        last: Optional[float] = None,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        ts: Optional[float] = None,
+    ) -> int:
+        index = self.slot(symbol)
+        if last is not None:
+            self.last[index] = last
+        if bid is not None:
+            self.bid[index] = bid
+        if ask is not None:
+            self.ask[index] = ask
+        self.updated_at[index] = ts if ts is not None else time.time()
+        return index
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        index = self._index.get(symbol)
+        if index is None:
+            return None
+        value = self.last[index]
+        return None if math.isnan(value) else value
+
+    def best_bid_ask(self, symbol: str) -> Optional[Tuple[float, float]]:
+        index = self._index.get(symbol)
+        if index is None:
+            return None
+        bid, ask = self.bid[index], self.ask[index]
+        if math.isnan(bid) or math.isnan(ask):
+            return None
+        return bid, ask
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+TickListener = Callable[[str, int], None]
+
+
+class _Shard:
+    """One public WebSocket connection carrying a subset of ticker topics."""
+
+    def __init__(self, service: "MarketDataService", shard_id: int) -> None:
+        self.service = service
+        self.shard_id = shard_id
+        self.symbols: Set[str] = set()
+        self._ws: Any = None
+        self._has_symbols = asyncio.Event()
+        self._task: Optional[SupervisedTask] = None
+        self._send_tasks: Set[asyncio.Task[None]] = set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = supervisor.spawn(f"market-data-shard-{self.shard_id}", self._run)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            await self._task.stop()
+            self._task = None
+
+    def add(self, symbols: Iterable[str]) -> None:
+        added = [symbol for symbol in symbols if symbol not in self.symbols]
+        if not added:
+            return
+        self.symbols.update(added)
+        self._has_symbols.set()
+        self._send("subscribe", added)
+
+    def remove(self, symbols: Iterable[str]) -> None:
+        removed = [symbol for symbol in symbols if symbol in self.symbols]
+        if not removed:
+            return
+        self.symbols.difference_update(removed)
+        self._send("unsubscribe", removed)
+        if not self.symbols:
+            self._has_symbols.clear()
+
+    def _send(self, op: str, symbols: List[str]) -> None:
+        ws = self._ws
+        if ws is None:
+            # Subscriptions are (re)sent in full when the connection comes up.
+            return
+        task = asyncio.create_task(self._send_op(ws, op, symbols))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+
+    async def _send_op(self, ws: Any, op: str, symbols: List[str]) -> None:
+        topics = [f"tickers.{symbol}" for symbol in sorted(symbols)]
+        try:
+            for start in range(0, len(topics), _SUBSCRIBE_BATCH):
+                args = topics[start : start + _SUBSCRIBE_BATCH]
+                await ws.send(json.dumps({"op": op, "args": args}))
+        except ConnectionClosed:
+            logger.debug("Connection closed while sending %s", op)
+
+    async def _ping(self, ws: Any) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.service.ping_interval)
+                await ws.send('{"op":"ping"}')
+        except ConnectionClosed:
+            return
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            await self._has_symbols.wait()
+            try:
+                async with self.service.connect(self.service.url, ping_interval=None, max_queue=4096) as ws:
+                    self._ws = ws
+                    attempt = 0
+                    await self._send_op(ws, "subscribe", list(self.symbols))
+                    ping_task = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for raw in ws:
+                            self.service.handle_message(raw)
+                            if not self.symbols:
+                                await ws.close()
+                                break
+                    finally:
+                        ping_task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ConnectionClosed, InvalidHandshake, InvalidURI, asyncio.TimeoutError) as exc:
+                logger.warning("Market data shard %s disconnected: %s", self.shard_id, exc)
+            finally:
+                self._ws = None
+
+            if self.symbols:
+                delay = min(self.service.backoff_max, self.service.backoff_base * (2 ** attempt))
+                attempt += 1
+                await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+
+class MarketDataService:
+    """Stream Bybit public tickers for active instruments into a ``PriceBook``.
+
+    Symbols are spread over several connections of at most
+    ``max_symbols_per_connection`` topics.  Each connection reconnects with
+    exponential backoff and resubscribes its topics; pass a local ``url`` (and
+    optionally ``connect``) to run against a replay server.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        price_book: PriceBook,
+        *,
+        max_symbols_per_connection: int = 200,
+        ping_interval: float = 20.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        connect: Callable[..., Any] = connect,
+    ) -> None:
+        self.url = url
+        self.price_book = price_book
+        self.max_symbols_per_connection = max_symbols_per_connection
+        self.ping_interval = ping_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect = connect
+        self._shards: List[_Shard] = []
+        self._assignment: Dict[str, _Shard] = {}
+        self._owners: Dict[str, Set[str]] = {}
+        self._listeners: List[TickListener] = []
+        self._running = False
+
+    @property
+    def symbols(self) -> Set[str]:
+        return set(self._assignment)
+
+    def add_listener(self, listener: TickListener) -> None:
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        self._running = True
+        for shard in self._shards:
+            shard.start()
+
+    async def stop(self) -> None:
+        self._running = False
+        await asyncio.gather(*(shard.stop() for shard in self._shards))
+
+    def on_instruments_changed(self, changes: Mapping[str, Optional[Instrument]], owner: str = "") -> None:
+        """Follow the active instruments of ``owner`` (an account).
+
+        A symbol stays subscribed while any owner still has it active, so
+        accounts trading the same symbol share one ticker subscription.
+        """
+        for symbol, item in changes.items():
+            owners = self._owners.get(symbol)
+            if item is not None and item.is_active:
+                if owners is None:
+                    owners = self._owners[symbol] = set()
+                owners.add(owner)
+            elif owners is not None:
+                owners.discard(owner)
+                if not owners:
+                    del self._owners[symbol]
+        self._unsubscribe(symbol for symbol in changes if symbol not in self._owners and symbol in self._assignment)
+        self._subscribe(symbol for symbol in changes if symbol in self._owners and symbol not in self._assignment)
+
+    def _subscribe(self, symbols: Iterable[str]) -> None:
+        grouped: Dict[_Shard, List[str]] = {}
+        for symbol in symbols:
+            shard = self._shard_with_capacity(grouped)
+            self._assignment[symbol] = shard
+            grouped.setdefault(shard, []).append(symbol)
+            self.price_book.slot(symbol)
+
+        for shard, added in grouped.items():
+            shard.add(added)
+            if self._running:
+                shard.start()
+
+    def _unsubscribe(self, symbols: Iterable[str]) -> None:
+        grouped: Dict[_Shard, List[str]] = {}
+        for symbol in symbols:
+            shard = self._assignment.pop(symbol)
+            grouped.setdefault(shard, []).append(symbol)
+        for shard, removed in grouped.items():
+            shard.remove(removed)
+
+    def _shard_with_capacity(self, pending: Mapping[_Shard, List[str]]) -> _Shard:
+        for shard in self._shards:
+            if len(shard.symbols) + len(pending.get(shard, ())) < self.max_symbols_per_connection:
+                return shard
+        shard = _Shard(self, len(self._shards))
+        self._shards.append(shard)
+        return shard
+
+    def handle_message(self, raw: str | bytes) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.debug("Ignoring non-JSON market data frame")
+            return
+        if not isinstance(message, dict):
+            logger.debug("Ignoring non-object market data frame")
+            return
+
+        topic = message.get("topic")
+        if topic is None:
+            if message.get("op") == "subscribe" and not message.get("success", True):
+                logger.warning("Ticker subscription rejected: %s", message.get("ret_msg"))
+            return
+        if not isinstance(topic, str) or not topic.startswith("tickers."):
+            return
+
+        data = message.get("data") or {}
+        if not isinstance(data, dict):
+            return
+        symbol = data.get("symbol") or topic[len("tickers.") :]
+        ts = message.get("ts")
+        slot = self.price_book.update(
+            symbol,
+            last=_to_float(data.get("lastPrice")),
+            bid=_to_float(data.get("bid1Price")),
+            ask=_to_float(data.get("ask1Price")),
+            ts=ts / 1000 if isinstance(ts, (int, float)) else None,
+        )
+        if tracer.enabled:
+            tracer.tick(symbol)
+        for listener in self._listeners:
+            listener(symbol, slot)
+
+
+price_book = PriceBook()
+market_data_service = MarketDataService(get_settings().bybit_public_ws_url, price_book)
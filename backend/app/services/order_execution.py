@@ -0,0 +1,547 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.metrics import counter
+from app.core.supervisor import SupervisedTask, supervisor
+from app.core.tracing import tracer
+from app.services.bybit_client import BybitAPIError, BybitClient, bybit_client
+from app.services.bybit_specs import SpecRegistry, spec_registry
+from app.services.order_plan import (
+    LEGS,
+    POSITION_IDX_LONG,
+    POSITION_IDX_SHORT,
+    OrderPlanEngine,
+    PlannedOrder,
+    order_plan_engine,
+)
+from app.services.risk import RISK_OK, RISK_REASONS, RiskEngine, risk_engine
+from app.services.symbol_specs import ORDER_OK, ORDER_REASONS
+
+if TYPE_CHECKING:  # pragma: no cover - private_stream imports this module
+    from app.services.private_stream import PositionLedger, SymbolPosition
+
+logger = logging.getLogger(__name__)
+
+LINK_ID_PREFIX = "gh"
+BATCH_SIZE = 20
+
+_RET_ORDER_NOT_FOUND = 110001
+_RET_REDUCE_ONLY_ZERO = 110017
+_RET_DUPLICATE_LINK_ID = 110072
+TERMINAL_ORDER_STATUSES = frozenset({"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"})
+_LEG_INDEX = {name: index for index, (name, *_rest) in enumerate(LEGS)}
+
+LegKey = Tuple[str, int]
+SideKey = Tuple[str, int]
+
+_skipped_legs = counter("order_legs_skipped_total", "Planned legs dropped by exchange filter checks", ("reason",))
+_blocked_legs = counter("order_legs_risk_blocked_total", "Opening legs held back by risk limits", ("reason",))
+_flat_legs = counter("order_legs_without_position_total", "Reduce-only legs held back without a position")
+
+
+def order_link_id(symbol: str, leg: int, generation: int) -> str:
+    """Deterministic ``orderLinkId`` so a retried placement is rejected as a duplicate."""
+    link_id = f"{LINK_ID_PREFIX}-{leg:02d}-{generation}-{symbol}"
+    if len(link_id) > 36:
+        raise ValueError(f"orderLinkId for {symbol} exceeds 36 characters")
+    return link_id
+
+
+def parse_order_link_id(link_id: str) -> Optional[Tuple[str, int, int]]:
+    """Return ``(symbol, leg, generation)`` for ids created by ``order_link_id``."""
+    parts = link_id.split("-", 3)
+    if len(parts) != 4 or parts[0] != LINK_ID_PREFIX:
+        return None
+    try:
+        return parts[3], int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+def _decimal(value: Any) -> Decimal:
+    try:
+        return Decimal(str(value)) if value not in (None, "") else Decimal(0)
+    except InvalidOperation:
+        return Decimal(0)
+
+
+def _fmt(value: Decimal) -> str:
+    return format(value.normalize(), "f")
+
+
+@dataclass(slots=True)
+class OpenOrder:
+    symbol: str
+    order_link_id: str
+    side: str
+    price: Decimal
+    qty: Decimal
+    trigger_price: Decimal = Decimal(0)
+    position_idx: int = 0
+    order_id: str = ""
+
+    @classmethod
+    def from_bybit(cls, item: Dict[str, Any]) -> "OpenOrder":
+        return cls(
+            symbol=str(item.get("symbol", "")),
+            order_link_id=str(item.get("orderLinkId", "")),
+            side=str(item.get("side", "")),
+            price=_decimal(item.get("price")),
+            qty=_decimal(item.get("qty")),
+            trigger_price=_decimal(item.get("triggerPrice")),
+            position_idx=int(item.get("positionIdx") or 0),
+            order_id=str(item.get("orderId", "")),
+        )
+
+
+@dataclass
+class ReconcilePlan:
+    creates: List[Dict[str, Any]] = field(default_factory=list)
+    amends: List[Dict[str, Any]] = field(default_factory=list)
+    cancels: List[Dict[str, Any]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.creates) + len(self.amends) + len(self.cancels)
+
+
+@dataclass
+class ReconcileResult:
+    created: int = 0
+    amended: int = 0
+    cancelled: int = 0
+    failed: int = 0
+    elapsed_ms: float = 0.0
+
+
+def _create_request(order: PlannedOrder, link_id: str) -> Dict[str, Any]:
+    request: Dict[str, Any] = {
+        "symbol": order.symbol,
+        "side": order.side,
+        "qty": _fmt(order.qty),
+        "positionIdx": order.position_idx,
+        "orderLinkId": link_id,
+        "reduceOnly": order.reduce_only,
+    }
+    if order.is_trigger:
+        # Stop-losses are conditional market orders: long SL fires on a fall, short SL on a rise.
+        request["orderType"] = "Market"
+        request["triggerPrice"] = _fmt(order.price)
+        request["triggerDirection"] = 2 if order.side == "Sell" else 1
+        request["triggerBy"] = "LastPrice"
+    else:
+        request["orderType"] = "Limit"
+        request["price"] = _fmt(order.price)
+        request["timeInForce"] = "GTC"
+    return request
+
+
+class OrderExecutor:
+    """Reconcile planned orders with open exchange orders through batch endpoints.
+
+    ``diff`` compares the desired legs from ``OrderPlanEngine`` with open
+    orders (matched by ``orderLinkId``) and produces create/amend/cancel
+    requests; ``reconcile`` sends them in batches of ``BATCH_SIZE`` concurrently,
+    paced by the client's rate limiter.  Open orders are cached locally and
+    updated from batch results, so plan changes reconcile without a REST read;
+    ``refresh_open_orders`` resynchronises the cache in one paginated sweep.
+    Legs the exchange filters would reject, and opening legs on a side whose
+    risk limit is exceeded, are left out of the desired set (so resting
+    orders for them are cancelled).  So are reduce-only legs (take-profits
+    and stop-losses) on a side without a position: per the bound
+    ``PositionLedger`` once it is synced, and per side after the exchange
+    rejected one with 110017, until a position update arrives for the symbol.
+    """
+
+    def __init__(
+        self,
+        client: BybitClient | None = None,
+        engine: OrderPlanEngine | None = None,
+        specs: SpecRegistry | None = None,
+        risk: RiskEngine | None = None,
+        *,
+        category: str = "linear",
+        debounce: float = 0.05,
+    ) -> None:
+        self._client = client if client is not None else bybit_client
+        self._engine = engine if engine is not None else order_plan_engine
+        self._specs = specs if specs is not None else spec_registry
+        self._risk = risk if risk is not None else risk_engine
+        self._category = category
+        self._debounce = debounce
+        self._generations: Dict[LegKey, int] = {}
+        self._open: Dict[str, OpenOrder] = {}
+        self._dirty: Set[str] = set()
+        self._positions: Optional["PositionLedger"] = None
+        self._flat: Set[SideKey] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[SupervisedTask] = None
+        # Bumped whenever open orders or generations change; checkpoints are only written on change.
+        self.revision = 0
+
+    @property
+    def open_orders(self) -> Dict[str, OpenOrder]:
+        return self._open
+
+    @property
+    def generations(self) -> Dict[LegKey, int]:
+        return self._generations
+
+    def link_id_for(self, symbol: str, leg: int) -> str:
+        return order_link_id(symbol, leg, self._generations.get((symbol, leg), 0))
+
+    def mark_dirty(self, symbols: Sequence[str]) -> None:
+        self._dirty.update(symbols)
+        self._wakeup.set()
+
+    def bind_positions(self, ledger: "PositionLedger") -> None:
+        """Place reduce-only legs only on sides where ``ledger`` holds a position."""
+        self._positions = ledger
+
+    def on_position(self, position: "SymbolPosition") -> None:
+        """Private stream ``position`` listener: reduce-only legs of the symbol may have to change."""
+        for position_idx in (POSITION_IDX_LONG, POSITION_IDX_SHORT):
+            self._flat.discard((position.symbol, position_idx))
+        self.mark_dirty((position.symbol,))
+
+    def on_resync(self, ledger: "PositionLedger") -> None:
+        """Private stream ``resync`` listener: positions may have opened while nobody was listening."""
+        self._flat.clear()
+        self.mark_dirty([symbol for symbol in ledger.positions if self._engine.row_of(symbol) is not None])
+
+    def restore(self, generations: Dict[LegKey, int], orders: Iterable[OpenOrder]) -> None:
+        """Resume from a checkpoint: link id generations and the open orders as last known."""
+        self._generations = dict(generations)
+        self._open = {}
+        for order in orders:
+            self.on_order_update(order)
+        self.revision += 1
+
+    def _retire(self, link_id: str) -> Optional[str]:
+        """Move the leg of ``link_id`` past its generation; return the symbol."""
+        parsed = parse_order_link_id(link_id)
+        if parsed is None:
+            return None
+        symbol, leg, generation = parsed
+        key = (symbol, leg)
+        if self._generations.get(key, 0) <= generation:
+            self._generations[key] = generation + 1
+        self.revision += 1
+        return symbol
+
+    def on_order_closed(self, link_id: str) -> None:
+        """Forget a filled or cancelled order; the leg gets a fresh ``orderLinkId`` next time."""
+        order = self._open.pop(link_id, None)
+        symbol = self._retire(link_id)
+        if symbol is not None and order is not None:
+            self.mark_dirty((symbol,))
+
+    def on_order_update(self, order: OpenOrder) -> None:
+        if parse_order_link_id(order.order_link_id) is not None:
+            self._open[order.order_link_id] = order
+            self.revision += 1
+
+    def replace_open_orders(self, orders: Iterable[OpenOrder]) -> None:
+        """Adopt a full open-order snapshot.
+
+        Orders that vanished since the previous view closed while nobody was
+        listening, so their legs move to a fresh generation; symbols with
+        vanished, new or changed orders are reconciled again.
+        """
+        previous, self._open = self._open, {}
+        for order in orders:
+            self.on_order_update(order)
+        changed: Set[str] = set()
+        for link_id, order in previous.items():
+            current = self._open.get(link_id)
+            if current is None:
+                self._retire(link_id)
+                changed.add(order.symbol)
+            elif current != order:
+                changed.add(order.symbol)
+        changed.update(order.symbol for link_id, order in self._open.items() if link_id not in previous)
+        self.revision += 1
+        if changed:
+            self.mark_dirty(list(changed))
+
+    async def refresh_open_orders(self) -> None:
+        items = await self._client.get_all_open_orders(self._category)
+        self.replace_open_orders(OpenOrder.from_bybit(item) for item in items)
+
+    def diff(self, symbols: Iterable[str]) -> ReconcilePlan:
+        plan = ReconcilePlan()
+        scope = set(symbols)
+        existing: Dict[LegKey, List[OpenOrder]] = {}
+        for order in self._open.values():
+            if order.symbol not in scope:
+                continue
+            parsed = parse_order_link_id(order.order_link_id)
+            if parsed is not None:
+                existing.setdefault((parsed[0], parsed[1]), []).append(order)
+
+        desired: Dict[LegKey, PlannedOrder] = {}
+        for symbol in scope:
+            if not self._engine.is_active(symbol):
+                continue
+            for order in self._engine.orders(symbol):
+                desired[(symbol, _LEG_INDEX[order.leg])] = order
+        self._drop_invalid(desired)
+        self._drop_without_position(desired)
+        self._drop_over_limit(desired)
+
+        for key, orders in existing.items():
+            wanted = desired.pop(key, None)
+            keep = orders[0] if wanted is not None else None
+            for order in orders:
+                if order is not keep:
+                    plan.cancels.append({"symbol": order.symbol, "orderLinkId": order.order_link_id})
+            if keep is None or wanted is None:
+                continue
+
+            parsed = parse_order_link_id(keep.order_link_id)
+            if parsed is not None and self._generations.get(key) != parsed[2]:
+                self._generations[key] = parsed[2]
+                self.revision += 1
+            current_price = keep.trigger_price if wanted.is_trigger else keep.price
+            if current_price == wanted.price and keep.qty == wanted.qty:
+                continue
+            amend: Dict[str, Any] = {"symbol": keep.symbol, "orderLinkId": keep.order_link_id, "qty": _fmt(wanted.qty)}
+            amend["triggerPrice" if wanted.is_trigger else "price"] = _fmt(wanted.price)
+            plan.amends.append(amend)
+
+        for (symbol, leg), order in desired.items():
+            plan.creates.append(_create_request(order, self.link_id_for(symbol, leg)))
+        return plan
+
+    def _drop_invalid(self, desired: Dict[LegKey, PlannedOrder]) -> None:
+        """Remove legs the exchange filters would reject, checked in one vectorised pass."""
+        table = self._specs.table
+        if not desired or not len(table):
+            return
+        keys = list(desired)
+        orders = list(desired.values())
+        count = len(orders)
+        rows = table.rows([order.symbol for order in orders])
+        safe = np.where(rows >= 0, rows, 0)
+        prices = np.fromiter((float(order.price) for order in orders), dtype=np.float64, count=count)
+        qtys = np.fromiter((float(order.qty) for order in orders), dtype=np.float64, count=count)
+        codes = table.validate(
+            rows,
+            table.price_ticks(safe, prices),
+            # Planned quantities are already whole steps; rounding absorbs float noise.
+            np.rint(qtys / table.step[safe]).astype(np.int64),
+            market=np.fromiter((order.is_trigger for order in orders), dtype=bool, count=count),
+            reduce_only=np.fromiter((order.reduce_only for order in orders), dtype=bool, count=count),
+        )
+        for index in np.flatnonzero(codes != ORDER_OK):
+            order = orders[index]
+            reason = ORDER_REASONS[int(codes[index])]
+            logger.debug("Skipping %s %s: %s", order.symbol, order.leg, reason)
+            _skipped_legs.labels(reason).inc()
+            del desired[keys[index]]
+
+    def _drop_without_position(self, desired: Dict[LegKey, PlannedOrder]) -> None:
+        """Hold back reduce-only legs on sides known to have no position; the exchange would reject them."""
+        ledger = self._positions
+        synced = ledger is not None and ledger.synced
+        if not synced and not self._flat:
+            return
+        for key, order in list(desired.items()):
+            if not order.reduce_only:
+                continue
+            side = (order.symbol, order.position_idx)
+            if side in self._flat or (synced and not _position_size(ledger, side)):
+                _flat_legs.inc()
+                del desired[key]
+
+    def _drop_over_limit(self, desired: Dict[LegKey, PlannedOrder]) -> None:
+        """Hold back opening legs while a risk limit is exceeded; reduce-only legs always pass.
+
+        Runs without limits too: ``RiskEngine`` only counts the planned legs it admitted.
+        """
+        risk = self._risk
+        verdicts: Dict[Tuple[str, int], int] = {}
+        for key, order in list(desired.items()):
+            if order.reduce_only:
+                continue
+            side = (order.symbol, order.position_idx)
+            code = verdicts.get(side)
+            if code is None:
+                code = verdicts[side] = risk.check(order.symbol, order.position_idx)
+            if code != RISK_OK:
+                reason = RISK_REASONS[code]
+                logger.debug("Holding back %s %s: %s", order.symbol, order.leg, reason)
+                _blocked_legs.labels(reason).inc()
+                del desired[key]
+
+    async def reconcile(self, symbols: Optional[Iterable[str]] = None, refresh: bool = False) -> ReconcileResult:
+        started = time.perf_counter()
+        if refresh:
+            await self.refresh_open_orders()
+        if symbols is None:
+            symbols = set(self._engine.symbols) | {order.symbol for order in self._open.values()}
+        plan = self.diff(symbols)
+
+        result = ReconcileResult()
+        batches = []
+        for kind, requests in (("cancel", plan.cancels), ("amend", plan.amends), ("create", plan.creates)):
+            for start in range(0, len(requests), BATCH_SIZE):
+                batches.append(self._send_batch(kind, requests[start : start + BATCH_SIZE], result))
+        if batches:
+            await asyncio.gather(*batches)
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        if len(plan):
+            logger.info(
+                "Reconciled orders: %s created, %s amended, %s cancelled, %s failed in %.1f ms",
+                result.created,
+                result.amended,
+                result.cancelled,
+                result.failed,
+                result.elapsed_ms,
+            )
+        return result
+
+    async def _send_batch(self, kind: str, requests: List[Dict[str, Any]], result: ReconcileResult) -> None:
+        sender = {
+            "create": self._client.place_batch_orders,
+            "amend": self._client.amend_batch_orders,
+            "cancel": self._client.cancel_batch_orders,
+        }[kind]
+        traced = tracer.enabled
+        if traced:
+            account_id = self._risk.account_id
+            symbols = {request["symbol"] for request in requests}
+            tracer.sent(account_id, symbols)
+        try:
+            envelope = await sender(requests, self._category)
+        except (BybitAPIError, RuntimeError) as exc:
+            logger.warning("Batch %s of %s orders failed: %s", kind, len(requests), exc)
+            result.failed += len(requests)
+            return
+        if traced:
+            tracer.acked(account_id, symbols)
+
+        statuses = ((envelope.get("retExtInfo") or {}).get("list")) or []
+        items = ((envelope.get("result") or {}).get("list")) or []
+        duplicates: List[Dict[str, Any]] = []
+        for index, request in enumerate(requests):
+            status = statuses[index] if index < len(statuses) else {"code": 0}
+            item = items[index] if index < len(items) else {}
+            code = int(status.get("code", 0))
+            if kind == "create" and code == _RET_DUPLICATE_LINK_ID:
+                duplicates.append(request)
+                continue
+            self._apply_status(kind, request, code, status.get("msg", ""), item, result)
+        if duplicates:
+            await asyncio.gather(*(self._adopt_duplicate(request, result) for request in duplicates))
+
+    async def _adopt_duplicate(self, request: Dict[str, Any], result: ReconcileResult) -> None:
+        """Resolve a create rejected with 110072 from the order that actually holds its ``orderLinkId``.
+
+        A live order is tracked as the exchange reports it (the next diff amends
+        it to the plan); a closed or unknown one used the link id up, so the leg
+        moves on to a fresh generation and is placed again.
+        """
+        symbol = request["symbol"]
+        link_id = request["orderLinkId"]
+        try:
+            item = await self._client.get_order(symbol, link_id, self._category)
+        except (BybitAPIError, RuntimeError) as exc:
+            logger.warning("Looking up duplicate %s failed: %s", link_id, exc)
+            result.failed += 1
+            self.mark_dirty((symbol,))
+            return
+        if item is None or item.get("orderStatus") in TERMINAL_ORDER_STATUSES:
+            self._open.pop(link_id, None)
+            self._retire(link_id)
+            logger.debug("Link id %s is used up, placing the leg again", link_id)
+        else:
+            self.on_order_update(OpenOrder.from_bybit(item))
+            result.created += 1
+        self.mark_dirty((symbol,))
+
+    def _apply_status(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        code: int,
+        message: str,
+        item: Dict[str, Any],
+        result: ReconcileResult,
+    ) -> None:
+        link_id = request["orderLinkId"]
+        self.revision += 1
+        if kind == "create" and code == 0:
+            self._open[link_id] = OpenOrder(
+                symbol=request["symbol"],
+                order_link_id=link_id,
+                side=request["side"],
+                price=_decimal(request.get("price")),
+                qty=_decimal(request["qty"]),
+                trigger_price=_decimal(request.get("triggerPrice")),
+                position_idx=request["positionIdx"],
+                order_id=str(item.get("orderId", "")),
+            )
+            result.created += 1
+        elif kind == "amend" and code == 0:
+            order = self._open.get(link_id)
+            if order is not None:
+                order.qty = _decimal(request["qty"])
+                if "triggerPrice" in request:
+                    order.trigger_price = _decimal(request["triggerPrice"])
+                else:
+                    order.price = _decimal(request["price"])
+            result.amended += 1
+        elif kind == "create" and code == _RET_REDUCE_ONLY_ZERO:
+            # Expected while the side has no position: hold its reduce-only legs until a position update.
+            self._flat.add((request["symbol"], request["positionIdx"]))
+            logger.debug("Holding back %s: no %s position", link_id, request["symbol"])
+        elif kind == "cancel" and code in (0, _RET_ORDER_NOT_FOUND):
+            self._open.pop(link_id, None)
+            result.cancelled += 1
+        elif kind == "amend" and code == _RET_ORDER_NOT_FOUND:
+            # The order is gone (filled or cancelled elsewhere): place the leg again.
+            self.on_order_closed(link_id)
+            result.failed += 1
+        else:
+            logger.warning("%s %s rejected with %s: %s", kind.capitalize(), link_id, code, message)
+            result.failed += 1
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = supervisor.spawn("order-executor", self._run)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            await self._task.stop()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self._debounce:
+                await asyncio.sleep(self._debounce)
+            self._wakeup.clear()
+            symbols, self._dirty = self._dirty, set()
+            try:
+                await self.reconcile(symbols)
+            except Exception as exc:
+                logger.warning("Order reconciliation failed: %s", exc)
+                self.mark_dirty(list(symbols))
+                await asyncio.sleep(1.0)
+
+
+def _position_size(ledger: "PositionLedger", side: SideKey) -> Decimal:
+    position = ledger.positions.get(side[0])
+    position_side = position.side(side[1]) if position is not None else None
+    return position_side.size if position_side is not None else Decimal(0)
+
+
+order_executor = OrderExecutor()
@@ -0,0 +1,521 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from decimal import ROUND_FLOOR, ROUND_HALF_EVEN, Decimal
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.instrument import Instrument
+from app.services.market_data import PriceBook, price_book
+
+logger = logging.getLogger(__name__)
+
+MAX_SL_LEVELS = 10
+TP_LEVELS = 2
+
+# Fixed leg layout of a plan row.
+LEG_ENTRY_LONG = 0
+LEG_ENTRY_SHORT = 1
+LEG_TP_LONG = 2
+LEG_TP_SHORT = LEG_TP_LONG + TP_LEVELS
+LEG_SL_LONG = LEG_TP_SHORT + TP_LEVELS
+LEG_SL_SHORT = LEG_SL_LONG + MAX_SL_LEVELS
+LEG_REFILL_LONG = LEG_SL_SHORT + MAX_SL_LEVELS
+LEG_REFILL_SHORT = LEG_REFILL_LONG + 1
+LEG_COUNT = LEG_REFILL_SHORT + 1
+
+POSITION_IDX_LONG = 1
+POSITION_IDX_SHORT = 2
+
+# Float rounding guard so e.g. 0.3 / 0.1 floors to 3 like its Decimal counterpart.
+_EPS = 1e-9
+
+
+def _leg_layout() -> List[Tuple[str, str, int, bool, bool]]:
+    """``(name, side, position_idx, reduce_only, is_trigger)`` per leg column."""
+    legs = [
+        ("entry_long", "Buy", POSITION_IDX_LONG, False, False),
+        ("entry_short", "Sell", POSITION_IDX_SHORT, False, False),
+    ]
+    legs += [(f"tp_long_{k + 1}", "Sell", POSITION_IDX_LONG, True, False) for k in range(TP_LEVELS)]
+    legs += [(f"tp_short_{k + 1}", "Buy", POSITION_IDX_SHORT, True, False) for k in range(TP_LEVELS)]
+    legs += [(f"sl_long_{k + 1}", "Sell", POSITION_IDX_LONG, True, True) for k in range(MAX_SL_LEVELS)]
+    legs += [(f"sl_short_{k + 1}", "Buy", POSITION_IDX_SHORT, True, True) for k in range(MAX_SL_LEVELS)]
+    legs += [
+        ("refill_long", "Buy", POSITION_IDX_LONG, False, False),
+        ("refill_short", "Sell", POSITION_IDX_SHORT, False, False),
+    ]
+    return legs
+
+
+LEGS = _leg_layout()
+
+# Parameter columns of the input matrix.
+P_ENTRY_PRICE = 0
+P_ENTRY_VOLUME = 1
+P_TICK = 2
+P_STEP = 3
+P_TP_STEP = 4
+P_TP_PCT = P_TP_STEP + TP_LEVELS
+P_SL_LONG_COUNT = P_TP_PCT + TP_LEVELS
+P_SL_LONG_STEP = P_SL_LONG_COUNT + 1
+P_SL_SHORT_COUNT = P_SL_LONG_STEP + 1
+P_SL_SHORT_STEP = P_SL_SHORT_COUNT + 1
+P_REFILL_ENABLED = P_SL_SHORT_STEP + 1
+P_REFILL_LONG_PRICE = P_REFILL_ENABLED + 1
+P_REFILL_LONG_VOLUME = P_REFILL_LONG_PRICE + 1
+P_REFILL_SHORT_PRICE = P_REFILL_LONG_VOLUME + 1
+P_REFILL_SHORT_VOLUME = P_REFILL_SHORT_PRICE + 1
+P_ACTIVE = P_REFILL_SHORT_VOLUME + 1
+PARAM_COUNT = P_ACTIVE + 1
+
+GROUP_ALL = "all"
+GROUP_TP = "tp"
+GROUP_SL_LONG = "sl_long"
+GROUP_SL_SHORT = "sl_short"
+GROUP_REFILL = "refill"
+
+_FIELD_GROUPS: Dict[str, str] = {
+    "entry_price_usdt": GROUP_ALL,
+    "entry_volume_usdt": GROUP_ALL,
+    "tick_size": GROUP_ALL,
+    "qty_step": GROUP_ALL,
+    "tp_levels": GROUP_TP,
+    "sl_long": GROUP_SL_LONG,
+    "sl_short": GROUP_SL_SHORT,
+    "refill": GROUP_REFILL,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedOrder:
+    symbol: str
+    leg: str
+    side: str
+    position_idx: int
+    price: Decimal
+    qty: Decimal
+    reduce_only: bool
+    is_trigger: bool
+
+
+@dataclass(frozen=True, slots=True)
+class PlanMismatch:
+    symbol: str
+    leg: str
+    vector: Tuple[int, int]
+    exact: Tuple[int, int]
+
+
+def instrument_params(instrument: Instrument) -> np.ndarray:
+    row = np.zeros(PARAM_COUNT, dtype=np.float64)
+    row[P_ENTRY_PRICE] = float(instrument.entry_price_usdt)
+    row[P_ENTRY_VOLUME] = float(instrument.entry_volume_usdt)
+    row[P_TICK] = float(instrument.tick_size)
+    row[P_STEP] = float(instrument.qty_step)
+    for k, level in enumerate(instrument.tp_levels[:TP_LEVELS]):
+        row[P_TP_STEP + k] = float(level.step_usdt)
+        row[P_TP_PCT + k] = float(level.volume_percent)
+    row[P_SL_LONG_COUNT] = instrument.sl_long.count
+    row[P_SL_LONG_STEP] = float(instrument.sl_long.step_usdt)
+    row[P_SL_SHORT_COUNT] = instrument.sl_short.count
+    row[P_SL_SHORT_STEP] = float(instrument.sl_short.step_usdt)
+    row[P_REFILL_ENABLED] = 1.0 if instrument.refill.enabled else 0.0
+    row[P_REFILL_LONG_PRICE] = float(instrument.refill.long_price_usdt)
+    row[P_REFILL_LONG_VOLUME] = float(instrument.refill.long_volume_usdt)
+    row[P_REFILL_SHORT_PRICE] = float(instrument.refill.short_price_usdt)
+    row[P_REFILL_SHORT_VOLUME] = float(instrument.refill.short_volume_usdt)
+    row[P_ACTIVE] = 1.0 if instrument.is_active else 0.0
+    return row
+
+
+def _ticks(price: np.ndarray, tick: np.ndarray) -> np.ndarray:
+    return np.rint(price / tick).astype(np.int64)
+
+
+def _steps(qty: np.ndarray, step: np.ndarray) -> np.ndarray:
+    return np.floor(qty / step + _EPS).astype(np.int64)
+
+
+def compute_plans(
+    params: np.ndarray,
+    reference: np.ndarray,
+    price_ticks: np.ndarray,
+    qty_steps: np.ndarray,
+    groups: FrozenSet[str] = frozenset({GROUP_ALL}),
+) -> None:
+    """Fill ``price_ticks``/``qty_steps`` (``n x LEG_COUNT``) for ``n`` parameter rows.
+
+    Prices are expressed in ticks and quantities in qty steps so the result is
+    exact integers; legs that should not be placed get a zero quantity.
+    ``reference`` is used wherever the configured entry price is zero.
+    """
+    everything = GROUP_ALL in groups
+    tick = params[:, P_TICK]
+    step = params[:, P_STEP]
+    entry = np.where(params[:, P_ENTRY_PRICE] > 0, params[:, P_ENTRY_PRICE], reference)
+    valid_entry = np.isfinite(entry) & (entry > 0)
+    safe_entry = np.where(valid_entry, entry, 1.0)
+    entry_steps = np.where(valid_entry, _steps(params[:, P_ENTRY_VOLUME] / safe_entry, step), 0)
+
+    if everything:
+        entry_ticks = np.where(valid_entry, _ticks(safe_entry, tick), 0)
+        price_ticks[:, LEG_ENTRY_LONG] = entry_ticks
+        price_ticks[:, LEG_ENTRY_SHORT] = entry_ticks
+        qty_steps[:, LEG_ENTRY_LONG] = entry_steps
+        qty_steps[:, LEG_ENTRY_SHORT] = entry_steps
+
+    if everything or GROUP_TP in groups:
+        tp_step = params[:, P_TP_STEP : P_TP_STEP + TP_LEVELS]
+        tp_pct = params[:, P_TP_PCT : P_TP_PCT + TP_LEVELS]
+        tp_qty = np.floor(entry_steps[:, None] * tp_pct / 100 + _EPS).astype(np.int64)
+        # The last level takes the remainder so TP volumes always add up to the entry.
+        tp_qty[:, -1] = entry_steps - tp_qty[:, :-1].sum(axis=1)
+        long_ticks = _ticks(safe_entry[:, None] + tp_step, tick[:, None])
+        short_ticks = _ticks(safe_entry[:, None] - tp_step, tick[:, None])
+        tp_qty = np.where(valid_entry[:, None], tp_qty, 0)
+        price_ticks[:, LEG_TP_LONG : LEG_TP_LONG + TP_LEVELS] = long_ticks
+        price_ticks[:, LEG_TP_SHORT : LEG_TP_SHORT + TP_LEVELS] = short_ticks
+        qty_steps[:, LEG_TP_LONG : LEG_TP_LONG + TP_LEVELS] = np.where(long_ticks > 0, tp_qty, 0)
+        qty_steps[:, LEG_TP_SHORT : LEG_TP_SHORT + TP_LEVELS] = np.where(short_ticks > 0, tp_qty, 0)
+
+    levels = np.arange(1, MAX_SL_LEVELS + 1, dtype=np.int64)
+    for group, leg, count_col, step_col, direction in (
+        (GROUP_SL_LONG, LEG_SL_LONG, P_SL_LONG_COUNT, P_SL_LONG_STEP, -1.0),
+        (GROUP_SL_SHORT, LEG_SL_SHORT, P_SL_SHORT_COUNT, P_SL_SHORT_STEP, 1.0),
+    ):
+        if not (everything or group in groups):
+            continue
+        count = params[:, count_col].astype(np.int64)
+        safe_count = np.maximum(count, 1)
+        base = entry_steps // safe_count
+        remainder = entry_steps % safe_count
+        sl_qty = base[:, None] + (levels[None, :] <= remainder[:, None])
+        sl_price = safe_entry[:, None] + direction * levels[None, :] * params[:, step_col][:, None]
+        sl_ticks = _ticks(sl_price, tick[:, None])
+        enabled = (levels[None, :] <= count[:, None]) & valid_entry[:, None] & (sl_ticks > 0)
+        price_ticks[:, leg : leg + MAX_SL_LEVELS] = sl_ticks
+        qty_steps[:, leg : leg + MAX_SL_LEVELS] = np.where(enabled, sl_qty, 0)
+
+    if everything or GROUP_REFILL in groups:
+        enabled = params[:, P_REFILL_ENABLED] > 0
+        for leg, price_col, volume_col in (
+            (LEG_REFILL_LONG, P_REFILL_LONG_PRICE, P_REFILL_LONG_VOLUME),
+            (LEG_REFILL_SHORT, P_REFILL_SHORT_PRICE, P_REFILL_SHORT_VOLUME),
+        ):
+            price = params[:, price_col]
+            has_price = enabled & (price > 0)
+            safe_price = np.where(has_price, price, 1.0)
+            price_ticks[:, leg] = np.where(has_price, _ticks(safe_price, tick), 0)
+            qty_steps[:, leg] = np.where(has_price, _steps(params[:, volume_col] / safe_price, step), 0)
+
+
+def _decimal_ticks(price: Decimal, tick: Decimal) -> int:
+    return int((price / tick).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def _decimal_steps(qty: Decimal, step: Decimal) -> int:
+    return int((qty / step).to_integral_value(rounding=ROUND_FLOOR))
+
+
+def compute_plan_exact(instrument: Instrument, reference: Optional[Decimal] = None) -> List[Tuple[int, int]]:
+    """Decimal reference implementation of ``compute_plans`` for a single instrument."""
+    legs: List[Tuple[int, int]] = [(0, 0)] * LEG_COUNT
+    tick = instrument.tick_size
+    step = instrument.qty_step
+    entry = instrument.entry_price_usdt if instrument.entry_price_usdt > 0 else reference
+    if entry is None or entry <= 0:
+        entry_steps = 0
+        entry = Decimal(1)
+        valid_entry = False
+    else:
+        entry_steps = _decimal_steps(instrument.entry_volume_usdt / entry, step)
+        valid_entry = True
+
+    entry_ticks = _decimal_ticks(entry, tick) if valid_entry else 0
+    legs[LEG_ENTRY_LONG] = (entry_ticks, entry_steps)
+    legs[LEG_ENTRY_SHORT] = (entry_ticks, entry_steps)
+
+    tp_qty: List[int] = []
+    for level in instrument.tp_levels[: TP_LEVELS - 1]:
+        tp_qty.append(_decimal_steps(entry_steps * level.volume_percent / 100, Decimal(1)))
+    tp_qty.append(entry_steps - sum(tp_qty))
+    for k, level in enumerate(instrument.tp_levels[:TP_LEVELS]):
+        long_ticks = _decimal_ticks(entry + level.step_usdt, tick)
+        short_ticks = _decimal_ticks(entry - level.step_usdt, tick)
+        qty = tp_qty[k] if valid_entry else 0
+        legs[LEG_TP_LONG + k] = (long_ticks, qty if long_ticks > 0 else 0)
+        legs[LEG_TP_SHORT + k] = (short_ticks, qty if short_ticks > 0 else 0)
+
+    for leg, config, direction in (
+        (LEG_SL_LONG, instrument.sl_long, -1),
+        (LEG_SL_SHORT, instrument.sl_short, 1),
+    ):
+        base, remainder = divmod(entry_steps, max(config.count, 1))
+        for k in range(1, MAX_SL_LEVELS + 1):
+            ticks = _decimal_ticks(entry + direction * k * config.step_usdt, tick)
+            enabled = k <= config.count and valid_entry and ticks > 0
+            legs[leg + k - 1] = (ticks, base + (1 if k <= remainder else 0) if enabled else 0)
+
+    refill = instrument.refill
+    for leg, price, volume in (
+        (LEG_REFILL_LONG, refill.long_price_usdt, refill.long_volume_usdt),
+        (LEG_REFILL_SHORT, refill.short_price_usdt, refill.short_volume_usdt),
+    ):
+        if refill.enabled and price > 0:
+            legs[leg] = (_decimal_ticks(price, tick), _decimal_steps(volume / price, step))
+        else:
+            legs[leg] = (0, 0)
+    return legs
+
+
+def _changed_groups(previous: Instrument, current: Instrument) -> FrozenSet[str]:
+    groups = set()
+    for field, group in _FIELD_GROUPS.items():
+        if getattr(previous, field) != getattr(current, field):
+            groups.add(group)
+    return frozenset(groups)
+
+
+PlanListener = Callable[[Sequence[str]], None]
+
+
+class OrderPlanEngine:
+    """Entry/TP/SL/refill ladders for every instrument, kept as dense NumPy arrays.
+
+    Row ``i`` of ``price_ticks``/``qty_steps`` holds the ``LEG_COUNT`` legs of
+    one instrument in integer ticks and qty steps.  Instrument changes only
+    recompute the leg groups touched by the changed fields of that row;
+    ``recompute_all`` refreshes every row in one vectorised pass, e.g. after a
+    reference price move for instruments without a fixed entry price.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self._capacity = capacity
+        self._rows: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._instruments: Dict[str, Instrument] = {}
+        self.params = np.zeros((capacity, PARAM_COUNT), dtype=np.float64)
+        self.reference = np.full(capacity, np.nan, dtype=np.float64)
+        self.price_ticks = np.zeros((capacity, LEG_COUNT), dtype=np.int64)
+        self.qty_steps = np.zeros((capacity, LEG_COUNT), dtype=np.int64)
+        self.book_slots = np.full(capacity, -1, dtype=np.int64)
+        self._price_book: Optional[PriceBook] = None
+        self._listeners: List[PlanListener] = []
+
+    def add_listener(self, listener: PlanListener) -> None:
+        """Register a callback receiving the symbols whose plan changed."""
+        self._listeners.append(listener)
+
+    def _notify(self, symbols: Sequence[str]) -> None:
+        if not symbols:
+            return
+        for listener in self._listeners:
+            try:
+                listener(symbols)
+            except Exception:  # pragma: no cover - listener bugs must not break planning
+                logger.exception("Order plan listener %r failed", listener)
+
+    def bind_price_book(self, price_book: PriceBook) -> None:
+        """Use ``price_book`` last prices as reference for instruments without an entry price."""
+        self._price_book = price_book
+        for symbol, row in self._rows.items():
+            self.book_slots[row] = price_book.slot(symbol)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    @property
+    def symbols(self) -> Sequence[str]:
+        return self._symbols
+
+    def row_of(self, symbol: str) -> Optional[int]:
+        return self._rows.get(symbol)
+
+    def _grow(self) -> None:
+        extra = self._capacity
+        self.params = np.concatenate([self.params, np.zeros((extra, PARAM_COUNT))])
+        self.reference = np.concatenate([self.reference, np.full(extra, np.nan)])
+        self.price_ticks = np.concatenate([self.price_ticks, np.zeros((extra, LEG_COUNT), dtype=np.int64)])
+        self.qty_steps = np.concatenate([self.qty_steps, np.zeros((extra, LEG_COUNT), dtype=np.int64)])
+        self.book_slots = np.concatenate([self.book_slots, np.full(extra, -1, dtype=np.int64)])
+        self._capacity += extra
+
+    def _recompute_rows(self, rows: slice, groups: FrozenSet[str]) -> None:
+        compute_plans(
+            self.params[rows],
+            self.reference[rows],
+            self.price_ticks[rows],
+            self.qty_steps[rows],
+            groups,
+        )
+
+    def upsert(self, instrument: Instrument) -> None:
+        symbol = instrument.symbol
+        row = self._rows.get(symbol)
+        previous = self._instruments.get(symbol)
+        if row is None:
+            row = len(self._symbols)
+            if row >= self._capacity:
+                self._grow()
+            self._rows[symbol] = row
+            self._symbols.append(symbol)
+            if self._price_book is not None:
+                self.book_slots[row] = self._price_book.slot(symbol)
+                self.reference[row] = self._price_book.last[self.book_slots[row]]
+            groups = frozenset({GROUP_ALL})
+        else:
+            groups = _changed_groups(previous, instrument) if previous is not None else frozenset({GROUP_ALL})
+
+        self._instruments[symbol] = instrument
+        self.params[row] = instrument_params(instrument)
+        if groups:
+            self._recompute_rows(slice(row, row + 1), groups)
+        if groups or previous is None or previous.is_active != instrument.is_active:
+            self._notify((symbol,))
+
+    def remove(self, symbol: str) -> None:
+        row = self._rows.pop(symbol, None)
+        if row is None:
+            return
+        self._instruments.pop(symbol, None)
+        last = len(self._symbols) - 1
+        if row != last:
+            moved = self._symbols[last]
+            self._symbols[row] = moved
+            self._rows[moved] = row
+            for array in (self.params, self.reference, self.price_ticks, self.qty_steps, self.book_slots):
+                array[row] = array[last]
+        self._symbols.pop()
+        self.reference[last] = np.nan
+        self.book_slots[last] = -1
+        self._notify((symbol,))
+
+    def on_instruments_changed(self, changes: Mapping[str, Optional[Instrument]]) -> None:
+        for symbol, instrument in changes.items():
+            if instrument is None:
+                self.remove(symbol)
+            else:
+                self.upsert(instrument)
+
+    def set_reference_prices(self, prices: Mapping[str, float]) -> None:
+        for symbol, price in prices.items():
+            row = self._rows.get(symbol)
+            if row is not None:
+                self.reference[row] = price
+
+    def reference_prices(self) -> Dict[str, float]:
+        """Reference price of every row that has one."""
+        count = len(self._symbols)
+        return {
+            self._symbols[row]: float(self.reference[row]) for row in np.flatnonzero(np.isfinite(self.reference[:count]))
+        }
+
+    def seed_reference_prices(self, prices: Mapping[str, float]) -> List[str]:
+        """Give rows still without a reference (no tick yet) the prices they were last planned from.
+
+        Returns the seeded symbols; their plans are recomputed in one pass.
+        """
+        seeded: List[str] = []
+        for symbol, price in prices.items():
+            row = self._rows.get(symbol)
+            if row is not None and np.isnan(self.reference[row]) and price > 0:
+                self.reference[row] = price
+                seeded.append(symbol)
+        if seeded:
+            self._recompute_rows(slice(0, len(self._symbols)), frozenset({GROUP_ALL}))
+            self._notify(seeded)
+        return seeded
+
+    def recompute_all(self, reference: Optional[np.ndarray] = None) -> None:
+        """Recompute every row; ``reference`` (one price per row) replaces the stored references."""
+        count = len(self._symbols)
+        if reference is not None:
+            self.reference[:count] = reference
+        self._recompute_rows(slice(0, count), frozenset({GROUP_ALL}))
+        self._notify(list(self._symbols))
+
+    def recompute_from_book(self) -> None:
+        """Refresh all references from the bound price book and recompute in one pass."""
+        if self._price_book is None:
+            raise RuntimeError("No price book bound to the order plan engine")
+        count = len(self._symbols)
+        last = np.frombuffer(self._price_book.last, dtype=np.float64)
+        self.recompute_all(last[self.book_slots[:count]])
+
+    def on_tick(self, symbol: str, slot: int) -> None:
+        """Recompute one row when its reference price moves and it has no fixed entry price."""
+        row = self._rows.get(symbol)
+        if row is None or self._price_book is None or self.params[row, P_ENTRY_PRICE] > 0:
+            return
+        price = self._price_book.last[slot]
+        if price == self.reference[row]:
+            return
+        self.reference[row] = price
+        self._recompute_rows(slice(row, row + 1), frozenset({GROUP_ALL}))
+        self._notify((symbol,))
+
+    def is_active(self, symbol: str) -> bool:
+        row = self._rows.get(symbol)
+        return row is not None and bool(self.params[row, P_ACTIVE])
+
+    def instrument(self, symbol: str) -> Optional[Instrument]:
+        return self._instruments.get(symbol)
+
+    def orders(self, symbol: str) -> List[PlannedOrder]:
+        row = self._rows.get(symbol)
+        instrument = self._instruments.get(symbol)
+        if row is None or instrument is None:
+            return []
+        tick = instrument.tick_size
+        step = instrument.qty_step
+        planned: List[PlannedOrder] = []
+        ticks_row = self.price_ticks[row]
+        steps_row = self.qty_steps[row]
+        for leg, (name, side, position_idx, reduce_only, is_trigger) in enumerate(LEGS):
+            qty = int(steps_row[leg])
+            if qty <= 0:
+                continue
+            planned.append(
+                PlannedOrder(
+                    symbol=symbol,
+                    leg=name,
+                    side=side,
+                    position_idx=position_idx,
+                    price=int(ticks_row[leg]) * tick,
+                    qty=qty * step,
+                    reduce_only=reduce_only,
+                    is_trigger=is_trigger,
+                )
+            )
+        return planned
+
+    def verify(self, symbols: Optional[Iterable[str]] = None) -> List[PlanMismatch]:
+        """Compare the vectorised plan against the Decimal implementation."""
+        mismatches: List[PlanMismatch] = []
+        for symbol in symbols if symbols is not None else list(self._symbols):
+            row = self._rows.get(symbol)
+            instrument = self._instruments.get(symbol)
+            if row is None or instrument is None:
+                continue
+            reference = self.reference[row]
+            exact = compute_plan_exact(
+                instrument,
+                Decimal(repr(float(reference))) if np.isfinite(reference) else None,
+            )
+            for leg, (ticks, steps) in enumerate(exact):
+                vector = (int(self.price_ticks[row, leg]), int(self.qty_steps[row, leg]))
+                # Prices of legs that are not placed are irrelevant.
+                if vector[1] == 0 and steps == 0:
+                    continue
+                if vector != (ticks, steps):
+                    mismatches.append(PlanMismatch(symbol, LEGS[leg][0], vector, (ticks, steps)))
+        if mismatches:
+            logger.warning("Order plan verification found %s mismatching legs", len(mismatches))
+        return mismatches
+
+
+order_plan_engine = OrderPlanEngine()
+order_plan_engine.bind_price_book(price_book)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from app.core.supervisor import SupervisedTask, supervisor
+from app.models.instrument import Instrument
+from app.services.state_storage import StateBackend, state_storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PersistenceStats:
+    queue_depth: int = 0
+    submitted_total: int = 0
+    writes_total: int = 0
+    records_written_total: int = 0
+    failures_total: int = 0
+    last_write_ms: float = 0.0
+    max_write_ms: float = 0.0
+    total_write_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        payload["avg_write_ms"] = self.total_write_ms / self.writes_total if self.writes_total else 0.0
+        payload["coalesced_total"] = max(0, self.submitted_total - self.records_written_total - self.queue_depth)
+        return payload
+
+
+class PersistenceWorker:
+    """Write-behind persistence for instrument changes.
+
+    Mutations are recorded in a pending map keyed by symbol, so a burst of
+    edits to the same instrument collapses into its latest state.  A single
+    background task drains the map into one storage call per batch;
+    the storage performs its file I/O off the event loop.
+    """
+
+    def __init__(
+        self,
+        storage: StateBackend | None = None,
+        debounce: float = 0.05,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self._storage = storage or state_storage
+        self._debounce = debounce
+        self._retry_delay = retry_delay
+        self._pending: Dict[str, Optional[Instrument]] = {}
+        self._replacement: Optional[List[Instrument]] = None
+        self._wakeup = asyncio.Event()
+        self._written = asyncio.Condition()
+        self._submitted_seq = 0
+        self._written_seq = 0
+        self._task: Optional[SupervisedTask] = None
+        self._stats = PersistenceStats()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending) + (1 if self._replacement is not None else 0)
+
+    def stats(self) -> Dict[str, Any]:
+        self._stats.queue_depth = self.queue_depth
+        return self._stats.as_dict()
+
+    def submit(self, symbol: str, instrument: Optional[Instrument]) -> None:
+        """Schedule ``instrument`` to be stored, or deleted when it is ``None``."""
+        self._pending[symbol] = instrument
+        self._mark_submitted(1)
+
+    def submit_many(self, changes: Mapping[str, Optional[Instrument]]) -> None:
+        if not changes:
+            return
+        self._pending.update(changes)
+        self._mark_submitted(len(changes))
+
+    def submit_snapshot(self, instruments: Iterable[Instrument]) -> None:
+        self._replacement = list(instruments)
+        self._pending.clear()
+        self._mark_submitted(len(self._replacement))
+
+    def _mark_submitted(self, count: int) -> None:
+        self._submitted_seq += 1
+        self._stats.submitted_total += count
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = supervisor.spawn("persistence-worker", self._run)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out flushing %s pending instrument writes", self.queue_depth)
+        if self._task is not None:
+            await self._task.stop()
+            self._task = None
+
+    async def flush(self) -> None:
+        """Durability barrier: return once everything submitted so far is written."""
+        target = self._submitted_seq
+        if self._task is None or self._task.done():
+            while self._written_seq < target:
+                await self._write_pending()
+            return
+
+        async with self._written:
+            await self._written.wait_for(lambda: self._written_seq >= target)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self._debounce:
+                await asyncio.sleep(self._debounce)
+            try:
+                await self._write_pending()
+            except Exception as exc:
+                logger.warning("Failed to persist instruments, retrying: %s", exc)
+                await asyncio.sleep(self._retry_delay)
+
+    async def _write_pending(self) -> None:
+        self._wakeup.clear()
+        seq = self._submitted_seq
+        replacement, self._replacement = self._replacement, None
+        pending, self._pending = self._pending, {}
+        if replacement is None and not pending:
+            await self._mark_written(seq)
+            return
+
+        records = len(pending) + (len(replacement) if replacement is not None else 0)
+        started = time.perf_counter()
+        try:
+            if replacement is not None:
+                await self._storage.save_instruments(replacement)
+            if pending:
+                upserts = [instrument for instrument in pending.values() if instrument is not None]
+                deletes = [symbol for symbol, instrument in pending.items() if instrument is None]
+                await self._storage.apply_instrument_changes(upserts, deletes)
+        except Exception:
+            self._stats.failures_total += 1
+            # Newer submissions win over the batch being restored; a newer snapshot
+            # already covers every change of the failed batch.
+            if self._replacement is None:
+                self._replacement = replacement
+                self._pending = {**pending, **self._pending}
+            self._wakeup.set()
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats.writes_total += 1
+        self._stats.records_written_total += records
+        self._stats.last_write_ms = elapsed_ms
+        self._stats.total_write_ms += elapsed_ms
+        self._stats.max_write_ms = max(self._stats.max_write_ms, elapsed_ms)
+
+        await self._mark_written(seq)
+
+    async def _mark_written(self, seq: int) -> None:
+        async with self._written:
+            self._written_seq = max(self._written_seq, seq)
+            self._written.notify_all()
+
+
+persistence_worker = PersistenceWorker()
@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake, InvalidURI
+
+from app.core.config import get_settings
+from app.core.supervisor import SupervisedTask, supervisor
+from app.services.bybit_client import BybitClient, bybit_client
+from app.services.order_execution import (
+    TERMINAL_ORDER_STATUSES,
+    OpenOrder,
+    OrderExecutor,
+    _decimal,
+    order_executor,
+)
+
+logger = logging.getLogger(__name__)
+
+PRIVATE_TOPICS = ("order", "execution", "position")
+
+# Executions remembered for deduplication across reconnects and restarts.
+RECENT_EXECUTIONS = 4096
+
+# Hedge mode: positionIdx 1 is the long side, 2 the short side.
+_LONG_IDX = 1
+_SHORT_IDX = 2
+
+
+@dataclass(slots=True)
+class PositionSide:
+    size: Decimal = Decimal(0)
+    avg_price: Decimal = Decimal(0)
+    unrealised_pnl: Decimal = Decimal(0)
+    realised_pnl: Decimal = Decimal(0)
+    seq: int = -1
+
+    def apply(self, item: Dict[str, Any]) -> bool:
+        seq = int(item.get("seq") or -1)
+        if 0 <= seq < self.seq:
+            return False
+        self.size = _decimal(item.get("size"))
+        self.avg_price = _decimal(item.get("avgPrice") or item.get("entryPrice"))
+        self.unrealised_pnl = _decimal(item.get("unrealisedPnl"))
+        self.realised_pnl = _decimal(item.get("cumRealisedPnl"))
+        self.seq = max(seq, self.seq)
+        return True
+
+
+@dataclass(slots=True)
+class SymbolPosition:
+    symbol: str = ""
+    long: PositionSide = field(default_factory=PositionSide)
+    short: PositionSide = field(default_factory=PositionSide)
+
+    def side(self, position_idx: int) -> Optional[PositionSide]:
+        if position_idx == _LONG_IDX:
+            return self.long
+        if position_idx == _SHORT_IDX:
+            return self.short
+        return None
+
+
+@dataclass(slots=True)
+class Execution:
+    symbol: str
+    order_link_id: str
+    side: str
+    price: Decimal
+    qty: Decimal
+    exec_id: str
+    seq: int
+
+    @classmethod
+    def from_bybit(cls, item: Dict[str, Any]) -> "Execution":
+        return cls(
+            symbol=str(item.get("symbol", "")),
+            order_link_id=str(item.get("orderLinkId", "")),
+            side=str(item.get("side", "")),
+            price=_decimal(item.get("execPrice")),
+            qty=_decimal(item.get("execQty")),
+            exec_id=str(item.get("execId", "")),
+            seq=int(item.get("seq") or 0),
+        )
+
+
+class PositionLedger:
+    """Per-symbol hedge-mode positions and open orders built from the private stream.
+
+    ``synced`` is true only while the ledger reflects a REST snapshot plus an
+    uninterrupted stream; before the first resync and after a disconnect or a
+    failed resync it is false and positions may be stale.
+
+    Executions are deduplicated by ``execId``: Bybit numbers ``seq`` per symbol
+    and several fills can share one, so it cannot order fills account-wide.
+    ``executions_applied`` counts the fills let through.
+    """
+
+    def __init__(self, recent_executions: int = RECENT_EXECUTIONS) -> None:
+        self.positions: Dict[str, SymbolPosition] = {}
+        self.orders: Dict[str, OpenOrder] = {}
+        self.executions_applied = 0
+        self.synced = False
+        self._recent_executions = recent_executions
+        self._exec_ids: OrderedDict[str, None] = OrderedDict()
+
+    def position(self, symbol: str) -> SymbolPosition:
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = SymbolPosition(symbol)
+        return position
+
+    def open_orders(self, symbol: str) -> List[OpenOrder]:
+        return [order for order in self.orders.values() if order.symbol == symbol]
+
+    def apply_position(self, item: Dict[str, Any]) -> bool:
+        side = self.position(str(item.get("symbol", ""))).side(int(item.get("positionIdx") or 0))
+        return side is not None and side.apply(item)
+
+    def apply_order(self, item: Dict[str, Any]) -> Optional[OpenOrder]:
+        """Track a live order; return ``None`` once it reached a terminal status."""
+        order = OpenOrder.from_bybit(item)
+        key = order.order_link_id or order.order_id
+        if item.get("orderStatus") in TERMINAL_ORDER_STATUSES:
+            self.orders.pop(key, None)
+            return None
+        self.orders[key] = order
+        return order
+
+    def apply_execution(self, item: Dict[str, Any]) -> Optional[Execution]:
+        execution = Execution.from_bybit(item)
+        if execution.exec_id:
+            if execution.exec_id in self._exec_ids:
+                return None
+            self._remember(execution.exec_id)
+        self.executions_applied += 1
+        return execution
+
+    def recent_executions(self) -> List[str]:
+        """``execId`` of the latest applied executions, oldest first."""
+        return list(self._exec_ids)
+
+    def remember_executions(self, exec_ids: Iterable[str]) -> None:
+        """Treat ``exec_ids`` as applied, e.g. the ones a checkpoint recorded."""
+        for exec_id in exec_ids:
+            if exec_id and exec_id not in self._exec_ids:
+                self._remember(exec_id)
+
+    def _remember(self, exec_id: str) -> None:
+        self._exec_ids[exec_id] = None
+        if len(self._exec_ids) > self._recent_executions:
+            self._exec_ids.popitem(last=False)
+
+    def reset(self, positions: Iterable[Dict[str, Any]], orders: Iterable[Dict[str, Any]]) -> None:
+        self.positions = {}
+        self.orders = {}
+        for item in positions:
+            self.apply_position(item)
+        for item in orders:
+            self.apply_order(item)
+
+
+PrivateEventListener = Callable[[Any], None]
+
+
+class PrivateStreamService:
+    """Consume Bybit private ``order``/``execution``/``position`` topics.
+
+    After every (re)connect the ledger is rebuilt from one paginated REST sweep
+    of positions and open orders; frames arriving meanwhile are buffered and
+    replayed on top of the snapshot, so nothing is lost across a gap.
+    Listeners registered with ``add_listener`` receive ``OpenOrder`` (or the raw
+    item for closed orders), ``Execution``, ``SymbolPosition`` payloads and the
+    ledger itself on ``resync``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        client: BybitClient | None = None,
+        ledger: PositionLedger | None = None,
+        executor: OrderExecutor | None = None,
+        *,
+        category: str = "linear",
+        ping_interval: float = 20.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        connect: Callable[..., Any] = connect,
+    ) -> None:
+        self.url = url
+        self.client = client if client is not None else bybit_client
+        self.ledger = ledger if ledger is not None else PositionLedger()
+        self.executor = executor
+        self.category = category
+        self.ping_interval = ping_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect = connect
+        self._listeners: Dict[str, List[PrivateEventListener]] = {}
+        self._buffer: Optional[List[Dict[str, Any]]] = None
+        self._resync_task: Optional[SupervisedTask] = None
+        self._task: Optional[SupervisedTask] = None
+        self.resync_count = 0
+
+    def add_listener(self, kind: str, listener: PrivateEventListener) -> None:
+        self._listeners.setdefault(kind, []).append(listener)
+
+    def _notify(self, kind: str, payload: Any) -> None:
+        for listener in self._listeners.get(kind, ()):
+            try:
+                listener(payload)
+            except Exception:
+                logger.exception("Private stream %s listener failed", kind)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = supervisor.spawn("private-stream", self._run)
+
+    async def stop(self) -> None:
+        for task in (self._resync_task, self._task):
+            if task is not None:
+                await task.stop()
+        self._resync_task = None
+        self._task = None
+
+    async def resync(self) -> None:
+        """Rebuild the ledger from REST, buffering stream frames in the meantime."""
+        if self._buffer is None:
+            self._buffer = []
+        try:
+            positions, orders = await asyncio.gather(
+                self.client.get_all_positions(self.category),
+                self.client.get_all_open_orders(self.category),
+            )
+        except BaseException:
+            self.ledger.synced = False
+            buffered, self._buffer = self._buffer or [], None
+            for message in buffered:
+                self.handle_message(message)
+            raise
+        self.ledger.reset(positions, orders)
+        if self.executor is not None:
+            self.executor.replace_open_orders(self.ledger.orders.values())
+        buffered, self._buffer = self._buffer, None
+        for message in buffered:
+            self.handle_message(message)
+        self.ledger.synced = True
+        self.resync_count += 1
+        logger.info("Private stream resynced: %s positions, %s open orders", len(positions), len(orders))
+        self._notify("resync", self.ledger)
+
+    def request_resync(self) -> None:
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = supervisor.run_once("private-stream-resync", self._resync_background)
+
+    async def _resync_background(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                await self.resync()
+                return
+            except Exception as exc:
+                delay = self._backoff(attempt)
+                attempt += 1
+                logger.warning("Private stream resync failed, retrying in %.1f s: %s", delay, exc)
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def handle_raw(self, raw: str | bytes) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.debug("Ignoring non-JSON private stream frame")
+            return
+        if isinstance(message, dict):
+            self.handle_message(message)
+
+    def handle_message(self, message: Dict[str, Any]) -> None:
+        topic = message.get("topic")
+        if topic is None:
+            return
+        if self._buffer is not None:
+            self._buffer.append(message)
+            return
+
+        items = message.get("data") or []
+        if topic == "order":
+            for item in items:
+                self._on_order(item)
+        elif topic == "execution":
+            for item in items:
+                execution = self.ledger.apply_execution(item)
+                if execution is not None:
+                    self._notify("execution", execution)
+        elif topic == "position":
+            for item in items:
+                if self.ledger.apply_position(item):
+                    self._notify("position", self.ledger.position(str(item.get("symbol", ""))))
+
+    def _on_order(self, item: Dict[str, Any]) -> None:
+        order = self.ledger.apply_order(item)
+        if order is None:
+            if self.executor is not None:
+                self.executor.on_order_closed(str(item.get("orderLinkId", "")))
+            self._notify("order", item)
+            return
+        if self.executor is not None:
+            self.executor.on_order_update(order)
+        self._notify("order", order)
+
+    async def _authenticate(self, ws: Any) -> None:
+        await ws.send(json.dumps({"op": "auth", "args": self.client.websocket_auth_args()}))
+        while True:
+            try:
+                reply = json.loads(await asyncio.wait_for(ws.recv(), timeout=10.0))
+            except ValueError:
+                continue
+            if not isinstance(reply, dict) or reply.get("op") != "auth":
+                continue
+            if not reply.get("success"):
+                raise RuntimeError(f"[private_stream] authentication failed: {reply.get('ret_msg')}")
+            return
+
+    async def _ping(self, ws: Any) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.ping_interval)
+                await ws.send('{"op":"ping"}')
+        except ConnectionClosed:
+            return
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with self.connect(self.url, ping_interval=None, max_queue=4096) as ws:
+                    await self._authenticate(ws)
+                    await ws.send(json.dumps({"op": "subscribe", "args": list(PRIVATE_TOPICS)}))
+                    attempt = 0
+                    self._buffer = []
+                    self.request_resync()
+                    ping_task = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for raw in ws:
+                            self.handle_raw(raw)
+                    finally:
+                        ping_task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ConnectionClosed, InvalidHandshake, InvalidURI, asyncio.TimeoutError, RuntimeError) as exc:
+                logger.warning("Private stream disconnected: %s", exc)
+
+            # Frames are missed until the next connection resyncs.
+            self.ledger.synced = False
+            delay = self._backoff(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+position_ledger = PositionLedger()
+private_stream = PrivateStreamService(
+    get_settings().bybit_private_ws_url,
+    bybit_client,
+    position_ledger,
+    order_executor,
+)
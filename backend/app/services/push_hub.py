@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from pydantic import TypeAdapter
+
+from app.core.config import DEFAULT_ACCOUNT_ID
+from app.core.metrics import counter, gauge
+from app.models.instrument import Instrument
+from app.repositories.instrument_store import InstrumentListener, InstrumentStore, instrument_store
+from app.services.bybit_specs import SpecDiff, SpecRegistry, spec_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE = 256
+
+_frames_sent = counter("push_frames_total", "Frames handed to push clients", ("kind",))
+_resyncs = counter("push_resyncs_total", "Push clients resynced after their queue overflowed")
+
+SnapshotRenderer = Callable[[], str]
+
+
+def _dumps(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class PushClient:
+    """Outgoing frame queue of one subscriber.
+
+    The queue is bounded: when a slow client falls ``max_queue`` frames behind,
+    its backlog is dropped and the next read starts over with fresh snapshots
+    of its topics instead of replaying every diff it missed.
+    """
+
+    def __init__(self, hub: "PushHub", topics: Iterable[str], max_queue: int) -> None:
+        self.topics: Tuple[str, ...] = tuple(dict.fromkeys(topics))
+        self._hub = hub
+        self._max_queue = max_queue
+        self._queue: Deque[str] = deque()
+        self._ready = asyncio.Event()
+        self._needs_snapshot = True
+        self._ready.set()
+        self.resyncs = 0
+
+    def offer(self, frame: str) -> None:
+        if self._needs_snapshot:
+            # The pending snapshot is rendered later and already includes this change.
+            return
+        if len(self._queue) >= self._max_queue:
+            self._queue.clear()
+            self._needs_snapshot = True
+            self.resyncs += 1
+            _resyncs.inc()
+        else:
+            self._queue.append(frame)
+        self._ready.set()
+
+    async def next_frames(self) -> List[str]:
+        """Wait for and return everything queued so far, snapshots first."""
+        await self._ready.wait()
+        self._ready.clear()
+        frames: List[str] = []
+        if self._needs_snapshot:
+            self._needs_snapshot = False
+            frames.extend(self._hub.snapshot(topic) for topic in self.topics)
+            _frames_sent.labels("snapshot").inc(len(frames))
+        if self._queue:
+            _frames_sent.labels("diff").inc(len(self._queue))
+            frames.extend(self._queue)
+            self._queue.clear()
+        return frames
+
+
+class PushHub:
+    """Fan out per-topic snapshots and diffs to WebSocket subscribers.
+
+    Every frame is encoded once and shared by all clients.  Each topic keeps a
+    sequence number; a snapshot carries the sequence of the last diff it
+    includes, so a client can verify that the diffs it receives are contiguous.
+    """
+
+    def __init__(self, max_queue: int = DEFAULT_MAX_QUEUE) -> None:
+        self.max_queue = max_queue
+        self._renderers: Dict[str, SnapshotRenderer] = {}
+        self._seq: Dict[str, int] = {}
+        self._snapshots: Dict[str, Tuple[int, str]] = {}
+        self._clients: Dict[str, List[PushClient]] = {}
+        self._connected: Set[PushClient] = set()
+
+    @property
+    def topics(self) -> Tuple[str, ...]:
+        return tuple(self._renderers)
+
+    def client_count(self) -> int:
+        return len(self._connected)
+
+    def register_topic(self, topic: str, render: SnapshotRenderer) -> None:
+        """``render`` returns the JSON-encoded full state of ``topic``."""
+        self._renderers[topic] = render
+        self._seq.setdefault(topic, 0)
+        self._clients.setdefault(topic, [])
+
+    def connect(self, topics: Iterable[str]) -> PushClient:
+        client = PushClient(self, topics, self.max_queue)
+        unknown = [topic for topic in client.topics if topic not in self._renderers]
+        if unknown:
+            raise ValueError(f"Unknown topics: {', '.join(unknown)}")
+        for topic in client.topics:
+            self._clients[topic].append(client)
+        self._connected.add(client)
+        return client
+
+    def disconnect(self, client: PushClient) -> None:
+        self._connected.discard(client)
+        for topic in client.topics:
+            clients = self._clients.get(topic, [])
+            if client in clients:
+                clients.remove(client)
+
+    def snapshot(self, topic: str) -> str:
+        seq = self._seq[topic]
+        cached = self._snapshots.get(topic)
+        if cached is None or cached[0] != seq:
+            data = self._renderers[topic]()
+            cached = self._snapshots[topic] = (seq, f'{{"type":"snapshot","topic":"{topic}","seq":{seq},"data":{data}}}')
+        return cached[1]
+
+    def publish(self, topic: str, encode: Callable[[], str]) -> None:
+        """Send the JSON diff returned by ``encode`` to every subscriber of ``topic``.
+
+        ``encode`` is skipped entirely while nobody is subscribed.
+        """
+        seq = self._seq[topic] = self._seq[topic] + 1
+        clients = self._clients[topic]
+        if not clients:
+            return
+        frame = f'{{"type":"diff","topic":"{topic}","seq":{seq},"data":{encode()}}}'
+        for client in clients:
+            client.offer(frame)
+
+
+_instrument_list_adapter = TypeAdapter(List[Instrument])
+
+
+def _diff_payload(upserts: str, deletes: List[str]) -> str:
+    return f'{{"upserts":{upserts},"deletes":{_dumps(deletes)}}}'
+
+
+def instruments_topic(account_id: str) -> str:
+    return "instruments" if account_id == DEFAULT_ACCOUNT_ID else f"instruments.{account_id}"
+
+
+class StateFeeds:
+    """Publish ``InstrumentStore`` and ``SpecRegistry`` changes on a ``PushHub``.
+
+    Topics ``instruments`` and ``specs`` use the same item shapes as
+    ``GET /api/instruments/`` and ``GET /api/specs/``; diffs are
+    ``{"upserts": [...], "deletes": [symbol, ...]}``.  Other accounts get an
+    ``instruments.<account>`` topic each through ``track_account``.
+    """
+
+    def __init__(self, hub: PushHub, store: InstrumentStore, specs: SpecRegistry) -> None:
+        self._hub = hub
+        self._store = store
+        self._specs = specs
+        hub.register_topic("instruments", lambda: self._render_instruments(store))
+        hub.register_topic("specs", self._render_specs)
+
+    def track_account(self, account_id: str, store: InstrumentStore) -> InstrumentListener:
+        """Register the instruments topic of an account; returns the store listener feeding it."""
+        topic = instruments_topic(account_id)
+        if topic not in self._hub.topics:
+            self._hub.register_topic(topic, lambda: self._render_instruments(store))
+        return lambda changes: self._publish_instruments(topic, changes)
+
+    def _render_instruments(self, store: InstrumentStore) -> str:
+        return _instrument_list_adapter.dump_json(list(store.snapshot().values()), by_alias=True).decode("utf-8")
+
+    def _render_specs(self) -> str:
+        return _dumps([spec.to_api() for spec in self._specs.all().values()])
+
+    def _publish_instruments(self, topic: str, changes: Mapping[str, Optional[Instrument]]) -> None:
+        def encode() -> str:
+            upserts = [instrument for instrument in changes.values() if instrument is not None]
+            deletes = [symbol for symbol, instrument in changes.items() if instrument is None]
+            return _diff_payload(_instrument_list_adapter.dump_json(upserts, by_alias=True).decode("utf-8"), deletes)
+
+        self._hub.publish(topic, encode)
+
+    def on_specs_changed(self, diff: SpecDiff) -> None:
+        changes = diff.changes()
+
+        def encode() -> str:
+            upserts = [spec.to_api() for spec in changes.values() if spec is not None]
+            deletes = [symbol for symbol, spec in changes.items() if spec is None]
+            return _diff_payload(_dumps(upserts), deletes)
+
+        self._hub.publish("specs", encode)
+
+
+push_hub = PushHub()
+gauge("push_clients", "Connected push clients").set_function(push_hub.client_count)
+state_feeds = StateFeeds(push_hub, instrument_store, spec_registry)
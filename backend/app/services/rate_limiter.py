@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+# (requests per second, burst) per Bybit v5 endpoint, per UID.  A batch order
+# request (up to 20 orders) takes one token of its own endpoint bucket.
+DEFAULT_ENDPOINT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "/v5/order/create": (10, 10),
+    "/v5/order/amend": (10, 10),
+    "/v5/order/cancel": (10, 10),
+    "/v5/order/create-batch": (10, 10),
+    "/v5/order/amend-batch": (10, 10),
+    "/v5/order/cancel-batch": (10, 10),
+    "/v5/order/cancel-all": (10, 10),
+    "/v5/order/realtime": (50, 50),
+    "/v5/position/list": (50, 50),
+    "/v5/execution/list": (50, 50),
+}
+DEFAULT_LIMIT: Tuple[float, float] = (50, 50)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until ``tokens`` are available; waiters are served in FIFO order."""
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class RateLimiter:
+    """Client-side token buckets keyed by REST path."""
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, Tuple[float, float]]] = None,
+        default: Tuple[float, float] = DEFAULT_LIMIT,
+    ) -> None:
+        self._limits = dict(DEFAULT_ENDPOINT_LIMITS if limits is None else limits)
+        self._default = default
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, path: str) -> TokenBucket:
+        bucket = self._buckets.get(path)
+        if bucket is None:
+            rate, capacity = self._limits.get(path, self._default)
+            bucket = self._buckets[path] = TokenBucket(rate, capacity)
+        return bucket
+
+    async def acquire(self, path: str, tokens: float = 1.0) -> None:
+        await self.bucket(path).acquire(tokens)
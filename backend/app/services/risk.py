@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+from app.core.config import DEFAULT_ACCOUNT_ID, Settings, get_settings
+from app.core.metrics import gauge
+from app.services.market_data import PriceBook, price_book
+from app.services.order_plan import LEGS, P_STEP, P_TICK, POSITION_IDX_LONG, OrderPlanEngine, order_plan_engine
+
+if TYPE_CHECKING:  # pragma: no cover - private_stream imports the executor, which imports this module
+    from app.services.private_stream import PositionLedger, SymbolPosition
+
+logger = logging.getLogger(__name__)
+
+# Reason codes returned by ``RiskEngine.check``.
+RISK_OK = 0
+RISK_SYMBOL_LIMIT = 1
+RISK_SIDE_LIMIT = 2
+RISK_ACCOUNT_LIMIT = 3
+RISK_TOTAL_LIMIT = 4
+
+RISK_REASONS = {
+    RISK_OK: "ok",
+    RISK_SYMBOL_LIMIT: "symbol side exposure above limit",
+    RISK_SIDE_LIMIT: "account side exposure above limit",
+    RISK_ACCOUNT_LIMIT: "account exposure above limit",
+    RISK_TOTAL_LIMIT: "total exposure above limit",
+}
+
+LONG = 0
+SHORT = 1
+SIDES = ("long", "short")
+
+# Legs that can grow a position: ``(leg column, side)``.  Take-profits and
+# stop-losses are reduce-only and never add exposure.
+_OPENING_LEGS = tuple(
+    (leg, LONG if position_idx == POSITION_IDX_LONG else SHORT)
+    for leg, (_, _, position_idx, reduce_only, _) in enumerate(LEGS)
+    if not reduce_only
+)
+
+# Relative slack so a limit equal to the exposure is not tripped by float noise.
+_TOLERANCE = 1e-9
+
+_exposure = gauge("risk_exposure_usdt", "Worst-case notional per account and side", ("account", "side", "kind"))
+
+
+@dataclass(frozen=True, slots=True)
+class RiskLimits:
+    """Worst-case notional caps in USDT; ``0`` disables a cap."""
+
+    symbol_side_usdt: float = 0.0
+    side_usdt: float = 0.0
+    account_usdt: float = 0.0
+    total_usdt: float = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RiskLimits":
+        return cls(
+            symbol_side_usdt=settings.risk_max_symbol_side_usdt,
+            side_usdt=settings.risk_max_side_usdt,
+            account_usdt=settings.risk_max_account_usdt,
+            total_usdt=settings.risk_max_total_usdt,
+        )
+
+
+class RiskTotals:
+    """Gross worst-case notional summed over every account of the process."""
+
+    __slots__ = ("gross",)
+
+    def __init__(self) -> None:
+        self.gross = 0.0
+
+
+class _SymbolExposure:
+    __slots__ = ("planned", "admitted", "sizes", "mark")
+
+    def __init__(self) -> None:
+        self.planned = [0.0, 0.0]
+        self.admitted = [False, False]
+        self.sizes = [0.0, 0.0]
+        self.mark = 0.0
+
+    def counted(self, side: int) -> float:
+        """Planned notional of ``side`` included in the aggregates: only once ``check`` admitted it."""
+        return self.planned[side] if self.admitted[side] else 0.0
+
+    def position(self, side: int) -> float:
+        return self.sizes[side] * self.mark
+
+    def notional(self, side: int) -> float:
+        return self.counted(side) + self.sizes[side] * self.mark
+
+
+class RiskEngine:
+    """Running worst-case exposure of one account, checked before orders are placed.
+
+    Per symbol and side the exposure is the notional of the planned opening
+    legs (entry and refill, from ``OrderPlanEngine``) plus the open position
+    marked at the last price.  Planned legs only count once ``check`` admitted
+    their side, and stop counting when it holds them back, so a side over its
+    limit never blocks the others with orders that are not placed.  Per-side
+    sums of both parts are kept up to date by applying the delta of every plan
+    change, verdict, position update or tick, so ``check`` compares a handful
+    of floats with the limits regardless of how many instruments are tracked.
+    ``rebuild`` resums everything from scratch.
+    """
+
+    def __init__(
+        self,
+        account_id: str,
+        engine: OrderPlanEngine,
+        book: PriceBook,
+        limits: RiskLimits | None = None,
+        totals: RiskTotals | None = None,
+    ) -> None:
+        self.account_id = account_id
+        self.limits = limits or RiskLimits()
+        self._engine = engine
+        self._book = book
+        self._totals = totals if totals is not None else risk_totals
+        self._symbols: Dict[str, _SymbolExposure] = {}
+        self.planned = [0.0, 0.0]
+        self.positions = [0.0, 0.0]
+        self._gauges = [
+            (_exposure.labels(account_id, side, "planned"), _exposure.labels(account_id, side, "position"))
+            for side in SIDES
+        ]
+
+    @property
+    def enabled(self) -> bool:
+        limits = self.limits
+        return bool(limits.symbol_side_usdt or limits.side_usdt or limits.account_usdt or limits.total_usdt)
+
+    @property
+    def total_gross(self) -> float:
+        return self._totals.gross
+
+    @property
+    def gross(self) -> float:
+        return self.planned[LONG] + self.planned[SHORT] + self.positions[LONG] + self.positions[SHORT]
+
+    def side_exposure(self, side: int) -> float:
+        return self.planned[side] + self.positions[side]
+
+    def symbol_exposure(self, symbol: str, side: int) -> float:
+        exposure = self._symbols.get(symbol)
+        return exposure.notional(side) if exposure is not None else 0.0
+
+    def _exposure(self, symbol: str) -> _SymbolExposure:
+        exposure = self._symbols.get(symbol)
+        if exposure is None:
+            exposure = self._symbols[symbol] = _SymbolExposure()
+            slot = self._book.index_of(symbol)
+            if slot is not None:
+                exposure.mark = _finite(self._book.last[slot])
+        return exposure
+
+    def _shift(self, planned: Sequence[float], positions: Sequence[float]) -> None:
+        for side in (LONG, SHORT):
+            self.planned[side] += planned[side]
+            self.positions[side] += positions[side]
+        self._totals.gross += planned[LONG] + planned[SHORT] + positions[LONG] + positions[SHORT]
+        self._publish()
+
+    def _publish(self) -> None:
+        for side, (planned, position) in enumerate(self._gauges):
+            planned.set(self.planned[side])
+            position.set(self.positions[side])
+
+    def _planned_notional(self, symbol: str) -> List[float]:
+        engine = self._engine
+        row = engine.row_of(symbol)
+        notional = [0.0, 0.0]
+        if row is None or not engine.is_active(symbol):
+            return notional
+        ticks = engine.price_ticks[row]
+        steps = engine.qty_steps[row]
+        for leg, side in _OPENING_LEGS:
+            notional[side] += int(ticks[leg]) * int(steps[leg])
+        unit = float(engine.params[row, P_TICK]) * float(engine.params[row, P_STEP])
+        return [notional[LONG] * unit, notional[SHORT] * unit]
+
+    def on_plans_changed(self, symbols: Sequence[str]) -> None:
+        """``OrderPlanEngine`` listener: refresh the planned notional of ``symbols``."""
+        delta = [0.0, 0.0]
+        for symbol in symbols:
+            exposure = self._exposure(symbol)
+            before = (exposure.counted(LONG), exposure.counted(SHORT))
+            exposure.planned = self._planned_notional(symbol)
+            for side in (LONG, SHORT):
+                delta[side] += exposure.counted(side) - before[side]
+        self._shift(delta, (0.0, 0.0))
+
+    def _set_position(self, exposure: _SymbolExposure, position: "SymbolPosition") -> None:
+        exposure.sizes = [float(position.long.size), float(position.short.size)]
+        if not exposure.mark:
+            # No tick yet: value the position at its entry price until one arrives.
+            exposure.mark = float(position.long.avg_price or position.short.avg_price)
+
+    def on_position(self, position: "SymbolPosition") -> None:
+        """Private stream ``position`` listener; fills reach the ledger as position updates."""
+        if not position.symbol:
+            return
+        exposure = self._exposure(position.symbol)
+        before = (exposure.position(LONG), exposure.position(SHORT))
+        self._set_position(exposure, position)
+        self._shift((0.0, 0.0), (exposure.position(LONG) - before[LONG], exposure.position(SHORT) - before[SHORT]))
+
+    def on_tick(self, symbol: str, slot: int) -> None:
+        """``MarketDataService`` listener: mark open positions of ``symbol`` to the last price."""
+        exposure = self._symbols.get(symbol)
+        if exposure is None:
+            return
+        price = _finite(self._book.last[slot])
+        if not price or price == exposure.mark:
+            return
+        change = price - exposure.mark
+        exposure.mark = price
+        if exposure.sizes[LONG] or exposure.sizes[SHORT]:
+            self._shift((0.0, 0.0), (exposure.sizes[LONG] * change, exposure.sizes[SHORT] * change))
+
+    def on_resync(self, ledger: "PositionLedger") -> None:
+        """Private stream ``resync`` listener: take positions from the rebuilt ledger."""
+        for exposure in self._symbols.values():
+            exposure.sizes = [0.0, 0.0]
+        for symbol, position in ledger.positions.items():
+            self._set_position(self._exposure(symbol), position)
+        self.rebuild()
+
+    def rebuild(self, symbols: Optional[Iterable[str]] = None) -> None:
+        """Recompute every aggregate from scratch (also clears accumulated float drift)."""
+        for symbol in symbols if symbols is not None else self._engine.symbols:
+            self._exposure(symbol).planned = self._planned_notional(symbol)
+        previous = self.gross
+        exposures = list(self._symbols.values())
+        self.planned = [math.fsum(item.counted(side) for item in exposures) for side in (LONG, SHORT)]
+        self.positions = [math.fsum(item.position(side) for item in exposures) for side in (LONG, SHORT)]
+        self._totals.gross += self.gross - previous
+        self._publish()
+
+    def check(self, symbol: str, position_idx: int) -> int:
+        """Reason code (``RISK_*``) for placing the opening legs of ``symbol`` on ``position_idx``.
+
+        Compares the current exposure plus the legs' not yet counted notional
+        with the limits, then admits the legs into the aggregates on ``RISK_OK``
+        or takes them out otherwise.
+        """
+        side = LONG if position_idx == POSITION_IDX_LONG else SHORT
+        exposure = self._exposure(symbol)
+        extra = exposure.planned[side] - exposure.counted(side)
+        code = self._verdict(exposure, side, extra) if self.enabled else RISK_OK
+        admitted = code == RISK_OK
+        if admitted != exposure.admitted[side]:
+            change = extra if admitted else -exposure.counted(side)
+            exposure.admitted[side] = admitted
+            self._shift((change, 0.0) if side == LONG else (0.0, change), (0.0, 0.0))
+        return code
+
+    def _verdict(self, exposure: _SymbolExposure, side: int, extra: float) -> int:
+        limits = self.limits
+        if limits.symbol_side_usdt and exposure.notional(side) + extra > limits.symbol_side_usdt * (1 + _TOLERANCE):
+            return RISK_SYMBOL_LIMIT
+        if limits.side_usdt and self.side_exposure(side) + extra > limits.side_usdt * (1 + _TOLERANCE):
+            return RISK_SIDE_LIMIT
+        if limits.account_usdt and self.gross + extra > limits.account_usdt * (1 + _TOLERANCE):
+            return RISK_ACCOUNT_LIMIT
+        if limits.total_usdt and self._totals.gross + extra > limits.total_usdt * (1 + _TOLERANCE):
+            return RISK_TOTAL_LIMIT
+        return RISK_OK
+
+
+def _finite(value: float) -> float:
+    return value if math.isfinite(value) and value > 0 else 0.0
+
+
+risk_totals = RiskTotals()
+risk_engine = RiskEngine(DEFAULT_ACCOUNT_ID, order_plan_engine, price_book, RiskLimits.from_settings(get_settings()))
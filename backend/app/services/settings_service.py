@@ -3,42 +3,43 @@ from __future__ import annotations
 import asyncio
 
 from app.models.settings import AppSettings, SettingsUpdatePayload
-from app.services.state_storage import state_storage
+from app.services.state_storage import StateBackend, state_storage
 
 
 class SettingsService:
-    def __init__(self) -> None:
+    def __init__(self, storage: StateBackend | None = None) -> None:
+        self._storage = storage or state_storage
         self._lock = asyncio.Lock()
         self._settings = AppSettings()
 
     async def load(self) -> AppSettings:
-        raw = await state_storage.load_settings()
+        raw = await self._storage.load_settings()
         settings = AppSettings(**raw)
         async with self._lock:
             self._settings = settings
         return settings
 
     def current(self) -> AppSettings:
-        return self._settings.model_copy(deep=True)
+        return self._settings
 
     async def update(self, payload: SettingsUpdatePayload) -> AppSettings:
         async with self._lock:
-            updated = self._settings.model_copy(deep=True)
-
+            changes = {}
             if payload.bybit_api_key is not None:
-                updated.bybit_api_key = payload.bybit_api_key.strip()
+                changes["bybit_api_key"] = payload.bybit_api_key.strip()
             if payload.bybit_secret_key is not None:
-                updated.bybit_secret_key = payload.bybit_secret_key.strip()
+                changes["bybit_secret_key"] = payload.bybit_secret_key.strip()
 
+            updated = self._settings.model_copy(update=changes)
             self._settings = updated
-            await state_storage.save_settings(updated.model_dump(by_alias=False))
-            return updated.model_copy(deep=True)
+            await self._storage.save_settings(updated.model_dump(by_alias=False))
+            return updated
 
     async def overwrite(self, settings: AppSettings) -> AppSettings:
         async with self._lock:
-            self._settings = settings.model_copy(deep=True)
-            await state_storage.save_settings(self._settings.model_dump(by_alias=False))
-            return self._settings.model_copy(deep=True)
+            self._settings = settings
+            await self._storage.save_settings(settings.model_dump(by_alias=False))
+            return settings
 
 
 settings_service = SettingsService()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.models.instrument import Instrument
+from app.services.state_storage import StateStorage, serialize_instrument
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS instruments (
+    symbol TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteStateStorage:
+    """SQLite (WAL) state backend with one row per instrument and per setting.
+
+    Exposes the same surface as ``StateStorage``.  On first open an existing
+    ``state.json`` (including its journal) is imported once; the JSON files are
+    left untouched so switching back stays possible.
+    """
+
+    def __init__(self, path: Path | None = None, legacy_json_path: Path | None = None) -> None:
+        state_dir = Path.home() / ".grid_hedge_bot"
+        self._path = path or state_dir / "state.db"
+        self._legacy_json_path = legacy_json_path or self._path.with_name("state.json")
+        self._lock = asyncio.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            # Access is serialised by ``self._lock``, but calls hop between worker threads.
+            conn = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == 0:
+                self._migrate_from_json(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    def _migrate_from_json(self, conn: sqlite3.Connection) -> None:
+        if not self._legacy_json_path.exists():
+            return
+        legacy = StateStorage(self._legacy_json_path)
+        state = legacy._loaded_state()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO instruments (symbol, data, updated_at) VALUES (?, ?, ?)",
+                [(symbol, _dumps(data), now) for symbol, data in state["instruments"].items()],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                [(key, _dumps(value)) for key, value in state["settings"].items()],
+            )
+        logger.info(
+            "Migrated %s instruments from %s to SQLite state",
+            len(state["instruments"]),
+            self._legacy_json_path,
+        )
+
+    def _load_rows(self) -> List[Dict[str, Any]]:
+        rows = self._connection().execute("SELECT data FROM instruments ORDER BY rowid").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def _load_row(self, symbol: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT data FROM instruments WHERE symbol = ?", (symbol,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _apply_changes(self, upserts: Dict[str, Dict[str, Any]], deletes: List[str], replace: bool = False) -> None:
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN")
+            if replace:
+                conn.execute("DELETE FROM instruments")
+            if deletes:
+                conn.executemany("DELETE FROM instruments WHERE symbol = ?", [(symbol,) for symbol in deletes])
+            if upserts:
+                conn.executemany(
+                    "INSERT INTO instruments (symbol, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(symbol) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                    [(symbol, _dumps(data), now) for symbol, data in upserts.items()],
+                )
+
+    def _load_settings(self) -> Dict[str, Any]:
+        rows = self._connection().execute("SELECT key, value FROM settings").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def _replace_settings(self, settings: Dict[str, Any]) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM settings")
+            conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?)",
+                [(key, _dumps(value)) for key, value in settings.items()],
+            )
+
+    def _checkpoint(self) -> None:
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    async def load_instruments(self) -> List[Instrument]:
+        async with self._lock:
+            items = await asyncio.to_thread(self._load_rows)
+
+        instruments: List[Instrument] = []
+        for item in items:
+            try:
+                instruments.append(Instrument(**item))
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("Failed to restore instrument from state: %s", exc)
+        return instruments
+
+    async def load_instrument(self, symbol: str) -> Optional[Instrument]:
+        async with self._lock:
+            item = await asyncio.to_thread(self._load_row, symbol.upper())
+        return Instrument(**item) if item is not None else None
+
+    async def save_instruments(self, instruments: Iterable[Instrument]) -> None:
+        serialized = {instrument.symbol: serialize_instrument(instrument) for instrument in instruments}
+        async with self._lock:
+            await asyncio.to_thread(self._apply_changes, serialized, [], True)
+
+    async def apply_instrument_changes(self, upserts: Iterable[Instrument], deletes: Iterable[str] = ()) -> None:
+        serialized = {instrument.symbol: serialize_instrument(instrument) for instrument in upserts}
+        removed = [symbol for symbol in deletes if symbol not in serialized]
+        async with self._lock:
+            await asyncio.to_thread(self._apply_changes, serialized, removed)
+
+    async def save_instrument(self, instrument: Instrument) -> None:
+        await self.apply_instrument_changes([instrument])
+
+    async def delete_instrument(self, symbol: str) -> None:
+        await self.apply_instrument_changes([], [symbol])
+
+    async def compact(self) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._checkpoint)
+
+    async def load_settings(self) -> Dict[str, Any]:
+        async with self._lock:
+            return await asyncio.to_thread(self._load_settings)
+
+    async def save_settings(self, settings: Dict[str, Any]) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._replace_settings, dict(settings))
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -3,13 +3,23 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Optional, Protocol
 
+from app.core.config import DEFAULT_ACCOUNT_ID, Settings, get_settings
+from app.core.metrics import BYTE_BUCKETS, counter, histogram
 from app.models.instrument import Instrument
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_COMPACT_THRESHOLD = 500
+
+_write_seconds = histogram("state_write_seconds", "Duration of StateStorage snapshot writes")
+_write_bytes = histogram("state_write_bytes", "Size of StateStorage snapshot writes", buckets=BYTE_BUCKETS)
+_journal_bytes = counter("state_journal_bytes_total", "Bytes appended to the StateStorage journal")
+
+
 def _default_state() -> Dict[str, Any]:
     return {
         "instruments": [],
@@ -17,14 +27,44 @@ def _default_state() -> Dict[str, Any]:
     }
 
 
+def serialize_instrument(instrument: Instrument) -> Dict[str, Any]:
+    return instrument.model_dump(mode="json", by_alias=False)
+
+
+class StateBackend(Protocol):
+    async def load_instruments(self) -> List[Instrument]: ...
+
+    async def save_instruments(self, instruments: Iterable[Instrument]) -> None: ...
+
+    async def apply_instrument_changes(
+        self, upserts: Iterable[Instrument], deletes: Iterable[str] = ...
+    ) -> None: ...
+
+    async def compact(self) -> None: ...
+
+    async def load_settings(self) -> Dict[str, Any]: ...
+
+    async def save_settings(self, settings: Dict[str, Any]) -> None: ...
+
+
 class StateStorage:
-    """Persist application state (settings, instruments) between restarts."""
+    """Persist application state (settings, instruments) between restarts.
+
+    State lives in a JSON snapshot plus an append-only journal of compact
+    per-instrument records.  Mutations only append to the journal; once it
+    grows past ``compact_threshold`` records the snapshot is rewritten and the
+    journal truncated.  Loading replays the journal tail over the snapshot.
+    """
 
-    def __init__(self, path: Path | None = None) -> None:
+    def __init__(self, path: Path | None = None, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD) -> None:
         state_dir = Path.home() / ".grid_hedge_bot"
         state_path = state_dir / "state.json"
         self._path = path or state_path
+        self._journal_path = self._path.with_suffix(".journal")
+        self._compact_threshold = compact_threshold
         self._lock = asyncio.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+        self._journal_records = 0
 
     def _ensure_file(self) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
@@ -67,20 +107,127 @@ class StateStorage:
         }
 
     def _write_state(self, state: Dict[str, Any]) -> None:
+        started = time.perf_counter()
         self._path.parent.mkdir(parents=True, exist_ok=True)
         tmp_path = self._path.with_suffix(".tmp")
-        data = json.dumps(state, ensure_ascii=False, indent=2)
-        tmp_path.write_text(data, encoding="utf-8")
+        data = json.dumps(state, ensure_ascii=False, indent=2).encode("utf-8")
+        tmp_path.write_bytes(data)
         tmp_path.replace(self._path)
+        _write_bytes.observe(len(data))
+        _write_seconds.observe(time.perf_counter() - started)
+
+    def _replay_journal(self, instruments: Dict[str, Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, Any]:
+        records = 0
+        if self._journal_path.exists():
+            good_end = 0
+            torn = False
+            with self._journal_path.open("rb") as journal:
+                for line_number, line in enumerate(journal, start=1):
+                    if not line.strip():
+                        good_end += len(line)
+                        continue
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("record is not terminated")
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn write can only affect the tail; everything after it is unusable.
+                        logger.warning("Journal record %s is corrupted, ignoring the rest of the journal", line_number)
+                        torn = True
+                        break
+
+                    good_end += len(line)
+                    try:
+                        op = record["op"]
+                        if op == "put":
+                            instruments[str(record["symbol"])] = record["data"]
+                        elif op == "del":
+                            instruments.pop(str(record["symbol"]), None)
+                        elif op == "settings":
+                            settings = record["data"]
+                    except (KeyError, TypeError):
+                        logger.warning("Skipping malformed journal record %s", line_number)
+                        continue
+                    records += 1
+            if torn:
+                # Cut the torn tail so records appended from now on are not hidden behind it.
+                with self._journal_path.open("r+b") as journal:
+                    journal.truncate(good_end)
+
+        self._journal_records = records
+        return settings
+
+    def _loaded_state(self) -> Dict[str, Any]:
+        if self._state is None:
+            snapshot = self._read_state()
+            instruments: Dict[str, Dict[str, Any]] = {}
+            for item in snapshot["instruments"]:
+                if isinstance(item, dict) and item.get("symbol"):
+                    instruments[str(item["symbol"])] = item
+            settings = self._replay_journal(instruments, snapshot["settings"])
+            self._state = {"instruments": instruments, "settings": settings}
+        return self._state
+
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        state = self._loaded_state()
+        return {
+            "instruments": list(state["instruments"].values()),
+            "settings": state["settings"],
+        }
+
+    def _compact(self) -> None:
+        self._write_state(self._snapshot_payload())
+        self._journal_path.unlink(missing_ok=True)
+        self._journal_records = 0
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records
+        )
+        data = lines.encode("utf-8")
+        with self._journal_path.open("ab") as journal:
+            journal.write(data)
+        _journal_bytes.inc(len(data))
+        self._journal_records += len(records)
+        if self._journal_records >= self._compact_threshold:
+            self._compact()
+
+    def _apply_changes(self, upserts: Dict[str, Dict[str, Any]], deletes: List[str]) -> None:
+        state = self._loaded_state()
+        records: List[Dict[str, Any]] = []
+        for symbol in deletes:
+            if state["instruments"].pop(symbol, None) is not None:
+                records.append({"op": "del", "symbol": symbol})
+        for symbol, data in upserts.items():
+            state["instruments"][symbol] = data
+            records.append({"op": "put", "symbol": symbol, "data": data})
+        self._append(records)
+
+    def _replace_instruments(self, serialized: Dict[str, Dict[str, Any]]) -> None:
+        state = self._loaded_state()
+        state["instruments"] = serialized
+        self._compact()
+
+    def _replace_settings(self, settings: Dict[str, Any]) -> None:
+        state = self._loaded_state()
+        state["settings"] = settings
+        self._append([{"op": "settings", "data": settings}])
+
+    def _compact_if_needed(self) -> None:
+        self._loaded_state()
+        if self._journal_records:
+            self._compact()
 
     async def load_instruments(self) -> List[Instrument]:
         async with self._lock:
-            state = self._read_state()
+            state = await asyncio.to_thread(self._loaded_state)
+            items = list(state["instruments"].values())
 
         instruments: List[Instrument] = []
-        for item in state.get("instruments", []):
-            if not isinstance(item, dict):
-                continue
+        for item in items:
             try:
                 instruments.append(Instrument(**item))
             except Exception as exc:  # pragma: no cover - defensive
@@ -88,28 +235,46 @@ class StateStorage:
         return instruments
 
     async def save_instruments(self, instruments: Iterable[Instrument]) -> None:
-        serialized = [
-            json.loads(instrument.model_dump_json(by_alias=False))
-            for instrument in instruments
-        ]
+        serialized = {instrument.symbol: serialize_instrument(instrument) for instrument in instruments}
+        async with self._lock:
+            await asyncio.to_thread(self._replace_instruments, serialized)
+
+    async def apply_instrument_changes(self, upserts: Iterable[Instrument], deletes: Iterable[str] = ()) -> None:
+        """Persist a batch of per-instrument changes with a single journal append."""
+        serialized = {instrument.symbol: serialize_instrument(instrument) for instrument in upserts}
+        removed = [symbol for symbol in deletes if symbol not in serialized]
+        async with self._lock:
+            await asyncio.to_thread(self._apply_changes, serialized, removed)
+
+    async def save_instrument(self, instrument: Instrument) -> None:
+        await self.apply_instrument_changes([instrument])
+
+    async def delete_instrument(self, symbol: str) -> None:
+        await self.apply_instrument_changes([], [symbol])
+
+    async def compact(self) -> None:
         async with self._lock:
-            state = self._read_state()
-            state["instruments"] = serialized
-            self._write_state(state)
+            await asyncio.to_thread(self._compact_if_needed)
 
     async def load_settings(self) -> Dict[str, Any]:
         async with self._lock:
-            state = self._read_state()
+            state = await asyncio.to_thread(self._loaded_state)
             settings = state.get("settings", {})
             return settings.copy() if isinstance(settings, dict) else {}
 
     async def save_settings(self, settings: Dict[str, Any]) -> None:
         async with self._lock:
-            state = self._read_state()
-            state["settings"] = dict(settings)
-            self._write_state(state)
+            await asyncio.to_thread(self._replace_settings, dict(settings))
+
 
+def create_state_storage(settings: Settings | None = None, account_id: str = DEFAULT_ACCOUNT_ID) -> StateBackend:
+    settings = settings or get_settings()
+    state_dir = settings.account_state_dir(account_id)
+    if settings.state_backend == "sqlite":
+        from app.services.sqlite_storage import SqliteStateStorage
 
-state_storage = StateStorage()
+        return SqliteStateStorage(state_dir / "state.db", legacy_json_path=state_dir / "state.json")
+    return StateStorage(state_dir / "state.json")
 
 
+state_storage = create_state_storage()
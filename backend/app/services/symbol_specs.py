@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_EVEN, Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Reason codes returned by ``SpecTable.validate``.
+ORDER_OK = 0
+ORDER_UNKNOWN_SYMBOL = 1
+ORDER_QTY_BELOW_MIN = 2
+ORDER_QTY_ABOVE_MAX = 3
+ORDER_NOTIONAL_BELOW_MIN = 4
+ORDER_PRICE_OUT_OF_RANGE = 5
+
+ORDER_REASONS = {
+    ORDER_OK: "ok",
+    ORDER_UNKNOWN_SYMBOL: "symbol is not listed",
+    ORDER_QTY_BELOW_MIN: "qty is below minOrderQty",
+    ORDER_QTY_ABOVE_MAX: "qty is above maxOrderQty",
+    ORDER_NOTIONAL_BELOW_MIN: "notional is below minNotionalValue",
+    ORDER_PRICE_OUT_OF_RANGE: "price is outside minPrice/maxPrice",
+}
+
+_EPS = 1e-9
+_UNBOUNDED = Decimal("1e18")
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+def _decimal(value: Any, default: Decimal) -> Decimal:
+    if value in (None, ""):
+        return default
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return default
+
+
+def _decimals(step: Decimal) -> int:
+    return max(0, -step.as_tuple().exponent) if step != 0 else 0
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolSpec:
+    """Trading filters of one linear contract, parsed once from ``instruments-info``."""
+
+    symbol: str
+    tick_size: Decimal
+    qty_step: Decimal
+    min_price: Decimal = Decimal(0)
+    max_price: Decimal = _UNBOUNDED
+    min_qty: Decimal = Decimal(0)
+    max_qty: Decimal = _UNBOUNDED
+    max_market_qty: Decimal = _UNBOUNDED
+    min_notional: Decimal = Decimal(0)
+    min_leverage: Decimal = Decimal(1)
+    max_leverage: Decimal = Decimal(1)
+    leverage_step: Decimal = Decimal("0.01")
+
+    @classmethod
+    def from_bybit(cls, item: Mapping[str, Any]) -> Optional["SymbolSpec"]:
+        price = item.get("priceFilter") or {}
+        lot = item.get("lotSizeFilter") or {}
+        leverage = item.get("leverageFilter") or {}
+        symbol = item.get("symbol")
+        tick_size = _decimal(price.get("tickSize"), Decimal(0))
+        qty_step = _decimal(lot.get("qtyStep"), Decimal(0))
+        if not symbol or tick_size <= 0 or qty_step <= 0:
+            return None
+        max_qty = _decimal(lot.get("maxOrderQty"), _UNBOUNDED)
+        return cls(
+            symbol=str(symbol),
+            tick_size=tick_size,
+            qty_step=qty_step,
+            min_price=_decimal(price.get("minPrice"), Decimal(0)),
+            max_price=_decimal(price.get("maxPrice"), _UNBOUNDED),
+            min_qty=_decimal(lot.get("minOrderQty"), qty_step),
+            max_qty=max_qty,
+            max_market_qty=_decimal(lot.get("maxMktOrderQty"), max_qty),
+            min_notional=_decimal(lot.get("minNotionalValue"), Decimal(0)),
+            min_leverage=_decimal(leverage.get("minLeverage"), Decimal(1)),
+            max_leverage=_decimal(leverage.get("maxLeverage"), Decimal(1)),
+            leverage_step=_decimal(leverage.get("leverageStep"), Decimal("0.01")),
+        )
+
+    @classmethod
+    def from_row(cls, symbol: str, row: Sequence[str]) -> "SymbolSpec":
+        """Inverse of ``to_row``: numeric fields in ``SPEC_FIELDS`` order."""
+        return cls(symbol, *map(Decimal, row))
+
+    def to_row(self) -> List[str]:
+        return [str(getattr(self, name)) for name in SPEC_FIELDS]
+
+    def to_api(self) -> Dict[str, str]:
+        return {
+            "symbol": self.symbol,
+            "tickSize": str(self.tick_size),
+            "qtyStep": str(self.qty_step),
+            "minPrice": str(self.min_price),
+            "maxPrice": str(self.max_price),
+            "minOrderQty": str(self.min_qty),
+            "maxOrderQty": str(self.max_qty),
+            "maxMktOrderQty": str(self.max_market_qty),
+            "minNotionalValue": str(self.min_notional),
+            "minLeverage": str(self.min_leverage),
+            "maxLeverage": str(self.max_leverage),
+            "leverageStep": str(self.leverage_step),
+        }
+
+    @property
+    def price_decimals(self) -> int:
+        return _decimals(self.tick_size)
+
+    @property
+    def volume_decimals(self) -> int:
+        return _decimals(self.qty_step)
+
+    def round_price(self, price: Decimal) -> Decimal:
+        return (price / self.tick_size).to_integral_value(rounding=ROUND_HALF_EVEN) * self.tick_size
+
+    def round_qty(self, qty: Decimal) -> Decimal:
+        return (qty / self.qty_step).to_integral_value(rounding=ROUND_FLOOR) * self.qty_step
+
+    def check_order(self, price: Decimal, qty: Decimal, market: bool = False, reduce_only: bool = False) -> int:
+        """Reason code for one order; ``SpecTable.validate`` does the same for many."""
+        if qty < self.min_qty:
+            return ORDER_QTY_BELOW_MIN
+        if qty > (self.max_market_qty if market else self.max_qty):
+            return ORDER_QTY_ABOVE_MAX
+        if not reduce_only and price * qty < self.min_notional:
+            return ORDER_NOTIONAL_BELOW_MIN
+        if not market and not self.min_price <= price <= self.max_price:
+            return ORDER_PRICE_OUT_OF_RANGE
+        return ORDER_OK
+
+
+# Numeric fields in declaration order, as stored in spec snapshots.
+SPEC_FIELDS = tuple(spec_field.name for spec_field in fields(SymbolSpec))[1:]
+
+
+def spec_from_steps(symbol: str, tick_size: Any, qty_step: Any) -> SymbolSpec:
+    """Spec with only tick size and qty step known (CLI tools, fixtures)."""
+    step = Decimal(str(qty_step))
+    return SymbolSpec(symbol=symbol, tick_size=Decimal(str(tick_size)), qty_step=step, min_qty=step)
+
+
+class SpecTable:
+    """Column-oriented copy of a spec set for batch rounding and validation.
+
+    Built once per spec change.  Prices and quantities are handled as integer
+    multiples of the symbol's tick size and qty step (like ``order_plan``), and
+    the quantity and price bounds are pre-converted to those units, so checks
+    are exact integer comparisons; only the notional check uses floats.
+    """
+
+    def __init__(self, specs: Iterable[SymbolSpec]) -> None:
+        self.specs: List[SymbolSpec] = list(specs)
+        self.index: Dict[str, int] = {spec.symbol: row for row, spec in enumerate(self.specs)}
+        specs = self.specs
+        self.tick = np.array([float(spec.tick_size) for spec in specs], dtype=np.float64)
+        self.step = np.array([float(spec.qty_step) for spec in specs], dtype=np.float64)
+        self.min_notional = np.array([float(spec.min_notional) for spec in specs], dtype=np.float64)
+        self.min_qty_steps = np.array([_ceil_units(spec.min_qty, spec.qty_step) for spec in specs], dtype=np.int64)
+        self.max_qty_steps = np.array([_floor_units(spec.max_qty, spec.qty_step) for spec in specs], dtype=np.int64)
+        self.max_market_steps = np.array(
+            [_floor_units(spec.max_market_qty, spec.qty_step) for spec in specs], dtype=np.int64
+        )
+        self.min_price_ticks = np.array([_ceil_units(spec.min_price, spec.tick_size) for spec in specs], dtype=np.int64)
+        self.max_price_ticks = np.array([_floor_units(spec.max_price, spec.tick_size) for spec in specs], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def rows(self, symbols: Sequence[str]) -> np.ndarray:
+        """Row of every symbol, ``-1`` for symbols that are not listed."""
+        index = self.index
+        return np.fromiter((index.get(symbol, -1) for symbol in symbols), dtype=np.int64, count=len(symbols))
+
+    def price_ticks(self, rows: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """Nearest whole number of ticks for each price."""
+        return np.rint(prices / self.tick[rows]).astype(np.int64)
+
+    def qty_steps(self, rows: np.ndarray, qtys: np.ndarray) -> np.ndarray:
+        """Whole qty steps not exceeding each quantity."""
+        return np.floor(qtys / self.step[rows] + _EPS).astype(np.int64)
+
+    def round_prices(self, rows: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        return self.price_ticks(rows, prices) * self.tick[rows]
+
+    def round_qtys(self, rows: np.ndarray, qtys: np.ndarray) -> np.ndarray:
+        return self.qty_steps(rows, qtys) * self.step[rows]
+
+    def validate(
+        self,
+        rows: np.ndarray,
+        price_ticks: np.ndarray,
+        qty_steps: np.ndarray,
+        market: Optional[np.ndarray] = None,
+        reduce_only: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Reason code (``ORDER_*``) per order given in tick/step units of its row.
+
+        ``market`` orders are checked against ``maxMktOrderQty`` and skip the
+        price band; ``reduce_only`` orders skip the minimum notional.
+        """
+        codes = np.zeros(len(rows), dtype=np.uint8)
+        known = rows >= 0
+        safe = np.where(known, rows, 0)
+        if market is None:
+            market = np.zeros(len(rows), dtype=bool)
+        if reduce_only is None:
+            reduce_only = np.zeros(len(rows), dtype=bool)
+        max_steps = np.where(market, self.max_market_steps[safe], self.max_qty_steps[safe])
+        notional = price_ticks * self.tick[safe] * qty_steps * self.step[safe]
+        price_out = ~market & ((price_ticks < self.min_price_ticks[safe]) | (price_ticks > self.max_price_ticks[safe]))
+        # Assigned in reverse priority so the first failing check wins, matching ``check_order``.
+        codes[price_out] = ORDER_PRICE_OUT_OF_RANGE
+        codes[~reduce_only & (notional < self.min_notional[safe] * (1 - _EPS))] = ORDER_NOTIONAL_BELOW_MIN
+        codes[qty_steps > max_steps] = ORDER_QTY_ABOVE_MAX
+        codes[qty_steps < self.min_qty_steps[safe]] = ORDER_QTY_BELOW_MIN
+        codes[~known] = ORDER_UNKNOWN_SYMBOL
+        return codes
+
+
+def _floor_units(value: Decimal, unit: Decimal) -> int:
+    return min(int((value / unit).to_integral_value(rounding=ROUND_FLOOR)), _INT64_MAX)
+
+
+def _ceil_units(value: Decimal, unit: Decimal) -> int:
+    return min(int((value / unit).to_integral_value(rounding=ROUND_CEILING)), _INT64_MAX)
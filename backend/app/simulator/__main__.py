@@ -0,0 +1,55 @@
+"""Run the Bybit simulator: ``python -m app.simulator --symbols 600 --interval 0.1``.
+
+Point the bot at it through the usual settings::
+
+    BYBIT_REST_URL=http://127.0.0.1:9100
+    BYBIT_PUBLIC_WS_URL=ws://127.0.0.1:9100/v5/public/linear
+    BYBIT_PRIVATE_WS_URL=ws://127.0.0.1:9100/v5/private
+
+and store any API key/secret pair through the settings API; every key is a
+separate simulated account.
+"""
+from __future__ import annotations
+
+import argparse
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional, Sequence
+
+import uvicorn
+
+from app.simulator.exchange import Exchange
+from app.simulator.instruments import synthetic_instruments
+from app.simulator.paths import PricePath, RecordedPath, SyntheticPath
+from app.simulator.server import create_simulator_app
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local Bybit v5 simulator with a deterministic matching engine.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--symbols", type=int, default=600, help="number of synthetic instruments")
+    parser.add_argument("--prices", type=Path, help="CSV with timestamp,symbol,price rows to replay")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic price walk")
+    parser.add_argument("--volatility", type=float, default=0.001, help="per-step log-return deviation")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds per price step, 0 = only POST /sim/step")
+    args = parser.parse_args(argv)
+
+    instruments = synthetic_instruments(args.symbols)
+    path: PricePath
+    if args.prices:
+        path = RecordedPath(args.prices)
+    else:
+        ticks = {item["symbol"]: Decimal(item["priceFilter"]["tickSize"]) for item in instruments}
+        path = SyntheticPath(ticks, seed=args.seed, volatility=args.volatility)
+    exchange = Exchange(instruments, path, step_ms=max(1, int(args.interval * 1000)))
+
+    base = f"{args.host}:{args.port}"
+    print(f"BYBIT_REST_URL=http://{base}")
+    print(f"BYBIT_PUBLIC_WS_URL=ws://{base}/v5/public/linear")
+    print(f"BYBIT_PRIVATE_WS_URL=ws://{base}/v5/private", flush=True)
+    uvicorn.run(create_simulator_app(exchange, args.interval), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
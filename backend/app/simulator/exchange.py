@@ -0,0 +1,437 @@
+"""Deterministic in-memory linear-perpetual exchange behind the simulator.
+
+Every API key gets its own ``SimAccount`` (hedge-mode positions, open orders,
+executions).  Prices only move when ``step`` is called: the next map of the
+price path becomes the last price of each symbol, tickers are published and
+resting orders are matched.  Order ids, execution ids and timestamps derive
+from counters and the step number, so the same path and the same requests
+produce the same fills.
+
+Matching is deliberately simple: a limit order crossing the book on arrival
+fills immediately at the opposite quote (taker), a resting limit fills at
+its own price once the last price reaches it (maker), and a conditional
+market order fills at the last price on the step that crosses its trigger.
+Orders always fill in full.
+"""
+from __future__ import annotations
+
+import itertools
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from app.services.symbol_specs import ORDER_OK, ORDER_REASONS, SymbolSpec
+from app.simulator.paths import PricePath
+
+RET_OK = 0
+RET_PARAMS = 10001
+RET_ORDER_NOT_FOUND = 110001
+RET_REDUCE_ONLY_ZERO = 110017
+RET_DUPLICATE_LINK_ID = 110072
+
+MAKER_FEE = Decimal("0.0002")
+TAKER_FEE = Decimal("0.00055")
+START_TIME_MS = 1_700_000_000_000
+
+_ZERO = Decimal(0)
+_LONG_IDX = 1
+_SHORT_IDX = 2
+
+PrivateListener = Callable[[str, List[Dict[str, Any]]], None]
+TickerListener = Callable[[Dict[str, Any]], None]
+Ack = Tuple[int, str, Dict[str, Any]]
+
+
+def _fmt(value: Decimal) -> str:
+    return format(value.normalize(), "f") if value else "0"
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(str(value))
+    except ArithmeticError:
+        return None
+
+
+@dataclass(slots=True)
+class SimOrder:
+    order_id: str
+    order_link_id: str
+    symbol: str
+    side: str
+    order_type: str
+    price: Decimal
+    qty: Decimal
+    position_idx: int
+    reduce_only: bool
+    trigger_price: Decimal = _ZERO
+    trigger_direction: int = 0
+    status: str = "New"
+    avg_price: Decimal = _ZERO
+    cum_exec_qty: Decimal = _ZERO
+    created_ms: int = 0
+    updated_ms: int = 0
+
+    @property
+    def is_conditional(self) -> bool:
+        return self.trigger_price > 0
+
+    def to_bybit(self) -> Dict[str, Any]:
+        return {
+            "orderId": self.order_id,
+            "orderLinkId": self.order_link_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "orderType": self.order_type,
+            "price": _fmt(self.price),
+            "qty": _fmt(self.qty),
+            "triggerPrice": _fmt(self.trigger_price),
+            "triggerDirection": self.trigger_direction,
+            "triggerBy": "LastPrice" if self.is_conditional else "",
+            "positionIdx": self.position_idx,
+            "reduceOnly": self.reduce_only,
+            "timeInForce": "GTC" if self.order_type == "Limit" else "IOC",
+            "orderStatus": self.status,
+            "avgPrice": _fmt(self.avg_price),
+            "cumExecQty": _fmt(self.cum_exec_qty),
+            "leavesQty": _fmt(self.qty - self.cum_exec_qty),
+            "createdTime": str(self.created_ms),
+            "updatedTime": str(self.updated_ms),
+            "category": "linear",
+        }
+
+
+@dataclass(slots=True)
+class SimPosition:
+    symbol: str
+    position_idx: int
+    size: Decimal = _ZERO
+    avg_price: Decimal = _ZERO
+    realised_pnl: Decimal = _ZERO
+    seq: int = 0
+
+    def to_bybit(self, mark: Decimal) -> Dict[str, Any]:
+        direction = 1 if self.position_idx == _LONG_IDX else -1
+        side = ("Buy" if direction > 0 else "Sell") if self.size else ""
+        return {
+            "symbol": self.symbol,
+            "positionIdx": self.position_idx,
+            "side": side,
+            "size": _fmt(self.size),
+            "avgPrice": _fmt(self.avg_price),
+            "markPrice": _fmt(mark),
+            "positionValue": _fmt(self.size * self.avg_price),
+            "unrealisedPnl": _fmt((mark - self.avg_price) * self.size * direction if self.size else _ZERO),
+            "cumRealisedPnl": _fmt(self.realised_pnl),
+            "seq": self.seq,
+            "category": "linear",
+        }
+
+
+class SimAccount:
+    """Orders, positions and executions of one API key."""
+
+    def __init__(self, api_key: str) -> None:
+        self.api_key = api_key
+        self.open: Dict[str, SimOrder] = {}
+        self.by_link: Dict[str, str] = {}
+        self.used_links: Set[str] = set()
+        self.positions: Dict[Tuple[str, int], SimPosition] = {}
+        self.exec_seq = 0
+        self.executions = 0
+        self.listeners: List[PrivateListener] = []
+
+    def position(self, symbol: str, position_idx: int) -> SimPosition:
+        key = (symbol, position_idx)
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = SimPosition(symbol, position_idx)
+        return position
+
+    def find(self, request: Mapping[str, Any]) -> Optional[SimOrder]:
+        order_id = request.get("orderId") or self.by_link.get(str(request.get("orderLinkId") or ""))
+        order = self.open.get(str(order_id or ""))
+        if order is None or order.symbol != request.get("symbol", order.symbol):
+            return None
+        return order
+
+    def emit(self, topic: str, data: List[Dict[str, Any]]) -> None:
+        for listener in self.listeners:
+            listener(topic, data)
+
+
+class Exchange:
+    def __init__(
+        self,
+        instruments: Sequence[Mapping[str, Any]],
+        path: PricePath,
+        *,
+        step_ms: int = 100,
+        maker_fee: Decimal = MAKER_FEE,
+        taker_fee: Decimal = TAKER_FEE,
+    ) -> None:
+        self.instruments = [dict(item) for item in instruments]
+        self.specs: Dict[str, SymbolSpec] = {}
+        for item in self.instruments:
+            spec = SymbolSpec.from_bybit(item)
+            if spec is not None:
+                self.specs[spec.symbol] = spec
+        self.last: Dict[str, Decimal] = {}
+        self.accounts: Dict[str, SimAccount] = {}
+        self.steps = 0
+        self.step_ms = step_ms
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.ticker_listeners: List[TickerListener] = []
+        self._path: Iterator[Dict[str, Decimal]] = iter(path)
+        self._ids = itertools.count(1)
+        self._exec_ids = itertools.count(1)
+        self.step()
+
+    @property
+    def now_ms(self) -> int:
+        return START_TIME_MS + self.steps * self.step_ms
+
+    def account(self, api_key: str) -> SimAccount:
+        account = self.accounts.get(api_key)
+        if account is None:
+            account = self.accounts[api_key] = SimAccount(api_key)
+        return account
+
+    def quote(self, symbol: str) -> Tuple[Decimal, Decimal]:
+        """Best bid and ask: one tick around the last price."""
+        last = self.last[symbol]
+        tick = self.specs[symbol].tick_size
+        return max(tick, last - tick), last + tick
+
+    def ticker(self, symbol: str) -> Dict[str, Any]:
+        bid, ask = self.quote(symbol)
+        last = self.last[symbol]
+        return {
+            "topic": f"tickers.{symbol}",
+            "type": "snapshot",
+            "ts": self.now_ms,
+            "cs": self.steps,
+            "data": {
+                "symbol": symbol,
+                "lastPrice": _fmt(last),
+                "markPrice": _fmt(last),
+                "bid1Price": _fmt(bid),
+                "ask1Price": _fmt(ask),
+            },
+        }
+
+    # -- price path --------------------------------------------------------
+
+    def step(self) -> bool:
+        """Advance the price path by one step; ``False`` once a finite path is exhausted."""
+        prices = next(self._path, None)
+        if prices is None:
+            return False
+        self.steps += 1
+        moved = [symbol for symbol, price in prices.items() if symbol in self.specs and price > 0]
+        for symbol in moved:
+            self.last[symbol] = prices[symbol]
+        for symbol in moved:
+            ticker = self.ticker(symbol)
+            for listener in self.ticker_listeners:
+                listener(ticker)
+        for account in self.accounts.values():
+            self._match(account, set(moved))
+        return True
+
+    def _match(self, account: SimAccount, symbols: Set[str]) -> None:
+        # Dict order is creation order, which keeps fills deterministic.
+        for order in [order for order in account.open.values() if order.symbol in symbols]:
+            last = self.last[order.symbol]
+            if order.is_conditional:
+                rising = order.trigger_direction == 1
+                if (rising and last >= order.trigger_price) or (not rising and last <= order.trigger_price):
+                    self._fill(account, order, last, self.taker_fee)
+            elif (order.side == "Buy" and last <= order.price) or (order.side == "Sell" and last >= order.price):
+                self._fill(account, order, order.price, self.maker_fee)
+
+    # -- order entry -------------------------------------------------------
+
+    def place(self, account: SimAccount, request: Mapping[str, Any]) -> Ack:
+        symbol = str(request.get("symbol") or "")
+        spec = self.specs.get(symbol)
+        if spec is None or symbol not in self.last:
+            return RET_PARAMS, "params error: symbol invalid", {}
+        link_id = str(request.get("orderLinkId") or "")
+        if link_id and link_id in account.used_links:
+            return RET_DUPLICATE_LINK_ID, "OrderLinkedID is duplicate", {}
+        side = request.get("side")
+        qty = _decimal(request.get("qty"))
+        order_type = request.get("orderType", "Limit")
+        trigger = _decimal(request.get("triggerPrice")) or _ZERO
+        price = _decimal(request.get("price")) or _ZERO
+        position_idx = int(request.get("positionIdx") or 0)
+        if side not in ("Buy", "Sell") or qty is None or qty <= 0 or position_idx not in (_LONG_IDX, _SHORT_IDX):
+            return RET_PARAMS, "params error: side, qty or positionIdx invalid", {}
+        if order_type == "Limit" and price <= 0:
+            return RET_PARAMS, "params error: price invalid", {}
+        if order_type == "Market" and trigger <= 0:
+            # Only conditional market orders are needed; plain market orders fill at the quote.
+            price = self.quote(symbol)[1 if side == "Buy" else 0]
+        market = order_type == "Market"
+        reduce_only = bool(request.get("reduceOnly"))
+        code = spec.check_order(price if not market else self.last[symbol], qty, market=market, reduce_only=reduce_only)
+        if code != ORDER_OK:
+            return RET_PARAMS, f"params error: {ORDER_REASONS[code]}", {}
+        if reduce_only and (side == "Buy") == (position_idx == _LONG_IDX):
+            return RET_PARAMS, "params error: reduce-only order would increase the position", {}
+        if reduce_only and trigger <= 0 and not account.position(symbol, position_idx).size:
+            return RET_REDUCE_ONLY_ZERO, "current position is zero, cannot fix reduce-only order qty", {}
+
+        now = self.now_ms
+        order = SimOrder(
+            order_id=str(uuid.UUID(int=next(self._ids))),
+            order_link_id=link_id,
+            symbol=symbol,
+            side=side,
+            order_type=order_type,
+            price=price if not market or trigger <= 0 else _ZERO,
+            qty=qty,
+            position_idx=position_idx,
+            reduce_only=reduce_only,
+            trigger_price=trigger,
+            trigger_direction=int(request.get("triggerDirection") or 0),
+            status="Untriggered" if trigger > 0 else "New",
+            created_ms=now,
+            updated_ms=now,
+        )
+        account.open[order.order_id] = order
+        if link_id:
+            account.by_link[link_id] = order.order_id
+            account.used_links.add(link_id)
+        account.emit("order", [order.to_bybit()])
+        self._fill_if_marketable(account, order)
+        return RET_OK, "OK", self._ack(order)
+
+    def amend(self, account: SimAccount, request: Mapping[str, Any]) -> Ack:
+        order = account.find(request)
+        if order is None:
+            return RET_ORDER_NOT_FOUND, "order not exists or too late to amend", {}
+        for key, attribute in (("qty", "qty"), ("price", "price"), ("triggerPrice", "trigger_price")):
+            value = _decimal(request.get(key))
+            if value is not None:
+                if value <= 0:
+                    return RET_PARAMS, f"params error: {key} invalid", {}
+                setattr(order, attribute, value)
+        order.updated_ms = self.now_ms
+        account.emit("order", [order.to_bybit()])
+        self._fill_if_marketable(account, order)
+        return RET_OK, "OK", self._ack(order)
+
+    def cancel(self, account: SimAccount, request: Mapping[str, Any]) -> Ack:
+        order = account.find(request)
+        if order is None:
+            return RET_ORDER_NOT_FOUND, "order not exists or too late to cancel", {}
+        self._close(account, order, "Cancelled")
+        return RET_OK, "OK", self._ack(order)
+
+    def _ack(self, order: SimOrder) -> Dict[str, Any]:
+        return {
+            "category": "linear",
+            "symbol": order.symbol,
+            "orderId": order.order_id,
+            "orderLinkId": order.order_link_id,
+            "createAt": str(order.created_ms),
+        }
+
+    def _fill_if_marketable(self, account: SimAccount, order: SimOrder) -> None:
+        if order.is_conditional:
+            return
+        bid, ask = self.quote(order.symbol)
+        if order.order_type == "Market":
+            self._fill(account, order, ask if order.side == "Buy" else bid, self.taker_fee)
+        elif order.side == "Buy" and order.price >= ask:
+            self._fill(account, order, ask, self.taker_fee)
+        elif order.side == "Sell" and order.price <= bid:
+            self._fill(account, order, bid, self.taker_fee)
+
+    def _close(self, account: SimAccount, order: SimOrder, status: str) -> None:
+        order.status = status
+        order.updated_ms = self.now_ms
+        del account.open[order.order_id]
+        account.by_link.pop(order.order_link_id, None)
+        account.emit("order", [order.to_bybit()])
+
+    def _fill(self, account: SimAccount, order: SimOrder, price: Decimal, fee_rate: Decimal) -> None:
+        position = account.position(order.symbol, order.position_idx)
+        opening = (order.side == "Buy") == (order.position_idx == _LONG_IDX)
+        qty = order.qty if opening else min(order.qty, position.size)
+        if qty <= 0:
+            self._close(account, order, "Deactivated")
+            return
+
+        direction = 1 if order.position_idx == _LONG_IDX else -1
+        fee = price * qty * fee_rate
+        if opening:
+            position.avg_price = (position.avg_price * position.size + price * qty) / (position.size + qty)
+            position.size += qty
+        else:
+            position.realised_pnl += (price - position.avg_price) * qty * direction
+            position.size -= qty
+            if not position.size:
+                position.avg_price = _ZERO
+        position.realised_pnl -= fee
+        account.exec_seq += 1
+        account.executions += 1
+        position.seq = account.exec_seq
+
+        order.avg_price = price
+        order.cum_exec_qty = qty
+        account.emit(
+            "execution",
+            [
+                {
+                    "category": "linear",
+                    "symbol": order.symbol,
+                    "orderId": order.order_id,
+                    "orderLinkId": order.order_link_id,
+                    "side": order.side,
+                    "orderType": order.order_type,
+                    "execId": str(uuid.UUID(int=next(self._exec_ids))),
+                    "execPrice": _fmt(price),
+                    "execQty": _fmt(qty),
+                    "execFee": _fmt(fee),
+                    "execType": "Trade",
+                    "isMaker": fee_rate == self.maker_fee,
+                    "execTime": str(self.now_ms),
+                    "seq": account.exec_seq,
+                }
+            ],
+        )
+        self._close(account, order, "Filled")
+        account.emit("position", [position.to_bybit(self.last[order.symbol])])
+
+    # -- queries -----------------------------------------------------------
+
+    def open_orders(self, account: SimAccount, symbol: Optional[str] = None) -> List[SimOrder]:
+        return [order for order in account.open.values() if symbol is None or order.symbol == symbol]
+
+    def positions(self, account: SimAccount, symbol: Optional[str] = None) -> List[SimPosition]:
+        return [position for position in account.positions.values() if symbol is None or position.symbol == symbol]
+
+    def position_item(self, position: SimPosition) -> Dict[str, Any]:
+        return position.to_bybit(self.last.get(position.symbol, _ZERO))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "steps": self.steps,
+            "timeMs": self.now_ms,
+            "symbols": len(self.last),
+            "accounts": {
+                account.api_key: {
+                    "openOrders": len(account.open),
+                    "executions": account.executions,
+                    "positions": sum(1 for position in account.positions.values() if position.size),
+                }
+                for account in self.accounts.values()
+            },
+        }
@@ -0,0 +1,53 @@
+"""Synthetic ``instruments-info`` items shaped like recorded Bybit responses."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+
+def synthetic_instrument(index: int) -> Dict[str, Any]:
+    """Item ``index`` of a deterministic linear contract list.
+
+    Tick sizes and qty steps rotate through four precisions; every 25th item
+    is a USDC perpetual and every 31st a dated USDT future, so consumers also
+    see the contracts they are expected to filter out.
+    """
+    tick_size = ("0.0001", "0.001", "0.01", "0.1")[index % 4]
+    qty_step = ("1", "0.1", "0.01", "0.001")[index % 4]
+    if index % 25 == 0:
+        quote_coin, contract_type = "USDC", "LinearPerpetual"
+    elif index % 31 == 0:
+        quote_coin, contract_type = "USDT", "LinearFutures"
+    else:
+        quote_coin, contract_type = "USDT", "LinearPerpetual"
+    base = f"C{index:04d}"
+    return {
+        "symbol": f"{base}{quote_coin}",
+        "contractType": contract_type,
+        "status": "Trading",
+        "baseCoin": base,
+        "quoteCoin": quote_coin,
+        "launchTime": "1672531200000",
+        "deliveryTime": "0",
+        "deliveryFeeRate": "",
+        "priceScale": str(len(tick_size.split(".")[-1])),
+        "leverageFilter": {"minLeverage": "1", "maxLeverage": "50.00", "leverageStep": "0.01"},
+        "priceFilter": {"minPrice": tick_size, "maxPrice": "199999.8", "tickSize": tick_size},
+        "lotSizeFilter": {
+            "maxOrderQty": "100000",
+            "minOrderQty": qty_step,
+            "qtyStep": qty_step,
+            "postOnlyMaxOrderQty": "100000",
+            "maxMktOrderQty": "50000",
+            "minNotionalValue": "5",
+        },
+        "unifiedMarginTrade": True,
+        "fundingInterval": 480,
+        "settleCoin": quote_coin,
+        "copyTrading": "both",
+        "upperFundingRate": "0.02",
+        "lowerFundingRate": "-0.02",
+    }
+
+
+def synthetic_instruments(count: int) -> List[Dict[str, Any]]:
+    return [synthetic_instrument(index) for index in range(count)]
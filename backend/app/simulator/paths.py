@@ -0,0 +1,84 @@
+"""Price paths driving the simulated exchange, one ``{symbol: price}`` map per step."""
+from __future__ import annotations
+
+import csv
+import math
+import random
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Protocol
+
+
+class PricePath(Protocol):
+    def __iter__(self) -> Iterator[Dict[str, Decimal]]: ...
+
+
+class SyntheticPath:
+    """Seeded geometric random walk per symbol, rounded to each symbol's tick size.
+
+    The same ``seed`` yields the same prices step for step, so a run can be
+    repeated exactly.
+    """
+
+    def __init__(
+        self,
+        ticks: Mapping[str, Decimal],
+        *,
+        seed: int = 0,
+        volatility: float = 0.001,
+        start: Mapping[str, Decimal] | None = None,
+    ) -> None:
+        self._ticks = dict(ticks)
+        self._seed = seed
+        self._volatility = volatility
+        self._start = dict(start or {})
+
+    def __iter__(self) -> Iterator[Dict[str, Decimal]]:
+        rng = random.Random(self._seed)
+        symbols = sorted(self._ticks)
+        ticks = [float(self._ticks[symbol]) for symbol in symbols]
+        prices = [
+            float(self._start[symbol]) if symbol in self._start else tick * rng.randint(5_000, 50_000)
+            for symbol, tick in zip(symbols, ticks)
+        ]
+        while True:
+            step: Dict[str, Decimal] = {}
+            for index, symbol in enumerate(symbols):
+                tick = ticks[index]
+                price = max(tick, prices[index] * math.exp(self._volatility * rng.gauss(0.0, 1.0)))
+                prices[index] = price
+                step[symbol] = Decimal(round(price / tick)) * self._ticks[symbol]
+            yield step
+
+
+class RecordedPath:
+    """Replay ``timestamp,symbol,price`` CSV rows, one step per distinct timestamp.
+
+    Rows must be sorted by timestamp; with ``loop`` the recording starts over
+    when it runs out.
+    """
+
+    def __init__(self, path: Path, *, loop: bool = True) -> None:
+        self._steps = _read_steps(path)
+        self._loop = loop
+        if not self._steps:
+            raise ValueError(f"No prices in {path}")
+
+    def __iter__(self) -> Iterator[Dict[str, Decimal]]:
+        while True:
+            yield from (dict(step) for step in self._steps)
+            if not self._loop:
+                return
+
+
+def _read_steps(path: Path) -> List[Dict[str, Decimal]]:
+    steps: List[Dict[str, Decimal]] = []
+    current_ts = None
+    with path.open(newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            ts = row["timestamp"]
+            if ts != current_ts:
+                steps.append({})
+                current_ts = ts
+            steps[-1][row["symbol"]] = Decimal(row["price"])
+    return steps
@@ -0,0 +1,296 @@
+"""Bybit v5 REST and WebSocket endpoints served from a simulated ``Exchange``.
+
+Implements the calls the bot makes: ``instruments-info`` pagination, single
+and batch order create/amend/cancel, open orders and positions, the public
+``tickers.*`` stream and the private ``order``/``execution``/``position``
+stream.  API keys are accepted without checking signatures; each key is a
+separate account.  ``POST /sim/step`` advances the price path by hand, and
+``GET /sim/stats`` summarizes the state.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Set, TypeVar
+
+from fastapi import FastAPI, Query, Request, WebSocket
+from fastapi.responses import JSONResponse
+
+from app.core.supervisor import SupervisedTask, supervisor
+from app.simulator.exchange import RET_OK, RET_PARAMS, Ack, Exchange, SimAccount, SimOrder
+
+logger = logging.getLogger(__name__)
+
+BATCH_LIMIT = 20
+RET_INVALID_KEY = 10003
+
+_conn_ids = itertools.count(1)
+
+T = TypeVar("T")
+
+
+def _dumps(value: object) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class _Feeds:
+    """Encode every stream message once and fan it out to the subscribed connections."""
+
+    def __init__(self, exchange: Exchange) -> None:
+        self._exchange = exchange
+        self._tickers: Dict[str, Set[asyncio.Queue[str]]] = {}
+        self._private: Dict[str, Dict[str, Set[asyncio.Queue[str]]]] = {}
+        self._message_ids = itertools.count(1)
+        exchange.ticker_listeners.append(self._on_ticker)
+
+    def _on_ticker(self, ticker: Dict[str, Any]) -> None:
+        queues = self._tickers.get(ticker["topic"])
+        if queues:
+            frame = _dumps(ticker)
+            for queue in queues:
+                queue.put_nowait(frame)
+
+    def subscribe_tickers(self, queue: "asyncio.Queue[str]", topics: List[str]) -> None:
+        for topic in topics:
+            self._tickers.setdefault(topic, set()).add(queue)
+            symbol = topic.partition(".")[2]
+            if symbol in self._exchange.last:
+                queue.put_nowait(_dumps(self._exchange.ticker(symbol)))
+
+    def unsubscribe_tickers(self, queue: "asyncio.Queue[str]", topics: Optional[List[str]] = None) -> None:
+        for topic in topics if topics is not None else list(self._tickers):
+            self._tickers.get(topic, set()).discard(queue)
+
+    def subscribe_private(self, queue: "asyncio.Queue[str]", account: SimAccount, topics: List[str]) -> None:
+        by_topic = self._private.get(account.api_key)
+        if by_topic is None:
+            by_topic = self._private[account.api_key] = {}
+            account.listeners.append(lambda topic, data: self._on_private(by_topic, topic, data))
+        for topic in topics:
+            by_topic.setdefault(topic, set()).add(queue)
+
+    def unsubscribe_private(self, queue: "asyncio.Queue[str]") -> None:
+        for by_topic in self._private.values():
+            for queues in by_topic.values():
+                queues.discard(queue)
+
+    def _on_private(self, by_topic: Dict[str, Set["asyncio.Queue[str]"]], topic: str, data: List[Dict[str, Any]]) -> None:
+        queues = by_topic.get(topic)
+        if queues:
+            frame = _dumps(
+                {"id": str(next(self._message_ids)), "topic": topic, "creationTime": self._exchange.now_ms, "data": data}
+            )
+            for queue in queues:
+                queue.put_nowait(frame)
+
+
+def _envelope(result: Any, ret_code: int = RET_OK, ret_msg: str = "OK", ext: Any = None) -> JSONResponse:
+    return JSONResponse({"retCode": ret_code, "retMsg": ret_msg, "result": result, "retExtInfo": ext or {}})
+
+
+def _page(
+    items: Sequence[T], cursor: Optional[str], limit: int, render: Callable[[T], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """One page of ``items`` behind an offset cursor; only the returned items are rendered."""
+    start = int(cursor) if cursor and cursor.isdigit() else 0
+    end = start + limit
+    return {
+        "category": "linear",
+        "list": [render(item) for item in items[start:end]],
+        "nextPageCursor": str(end) if end < len(items) else "",
+    }
+
+
+async def _pump(websocket: WebSocket, queue: "asyncio.Queue[str]") -> None:
+    while True:
+        await websocket.send_text(await queue.get())
+
+
+SocketHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+async def _serve_socket(websocket: WebSocket, handle: SocketHandler, queue: "asyncio.Queue[str]") -> None:
+    await websocket.accept()
+    sender = asyncio.create_task(_pump(websocket, queue))
+    try:
+        while not sender.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                request = json.loads(message.get("text") or message.get("bytes") or b"")
+            except ValueError:
+                continue
+            reply = await handle(request)
+            if reply is not None:
+                queue.put_nowait(_dumps(reply))
+    finally:
+        sender.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await sender
+
+
+def create_simulator_app(exchange: Exchange, interval: float = 0.0) -> FastAPI:
+    """Simulator app; with ``interval`` > 0 the price path advances one step every ``interval`` seconds."""
+    app = FastAPI(title="Bybit simulator")
+    feeds = _Feeds(exchange)
+    clock: List[SupervisedTask] = []
+
+    async def run_clock() -> None:
+        while exchange.step():
+            await asyncio.sleep(interval)
+        logger.info("Price path exhausted after %s steps", exchange.steps)
+
+    @app.on_event("startup")
+    async def start_clock() -> None:
+        if interval > 0:
+            clock.append(supervisor.spawn("simulator-clock", run_clock))
+
+    @app.on_event("shutdown")
+    async def stop_clock() -> None:
+        for task in clock:
+            await task.stop()
+        clock.clear()
+
+    def account_of(request: Request) -> Optional[SimAccount]:
+        api_key = request.headers.get("X-BAPI-API-KEY")
+        return exchange.account(api_key) if api_key else None
+
+    def invalid_key() -> JSONResponse:
+        return _envelope({}, RET_INVALID_KEY, "API key is invalid.")
+
+    @app.get("/v5/market/instruments-info")
+    async def instruments_info(
+        category: str = "linear",
+        cursor: Optional[str] = None,
+        limit: int = Query(500, ge=1, le=1000),
+    ) -> JSONResponse:
+        if category != "linear":
+            return _envelope({}, RET_PARAMS, "params error: only category=linear is simulated")
+        return _envelope(_page(exchange.instruments, cursor, limit, dict))
+
+    def single(operation: Callable[[SimAccount, Mapping[str, Any]], Ack]) -> Callable[[Request], Awaitable[JSONResponse]]:
+        async def endpoint(request: Request) -> JSONResponse:
+            account = account_of(request)
+            if account is None:
+                return invalid_key()
+            code, message, item = operation(account, await request.json())
+            return _envelope(item, code, message)
+
+        return endpoint
+
+    def batch(operation: Callable[[SimAccount, Mapping[str, Any]], Ack]) -> Callable[[Request], Awaitable[JSONResponse]]:
+        async def endpoint(request: Request) -> JSONResponse:
+            account = account_of(request)
+            if account is None:
+                return invalid_key()
+            requests = (await request.json()).get("request") or []
+            if len(requests) > BATCH_LIMIT:
+                return _envelope({}, RET_PARAMS, f"params error: at most {BATCH_LIMIT} orders per batch")
+            items: List[Dict[str, Any]] = []
+            statuses: List[Dict[str, Any]] = []
+            for order_request in requests:
+                code, message, item = operation(account, order_request)
+                items.append(item)
+                statuses.append({"code": code, "msg": message})
+            return _envelope({"list": items}, ext={"list": statuses})
+
+        return endpoint
+
+    for name, operation in (("create", exchange.place), ("amend", exchange.amend), ("cancel", exchange.cancel)):
+        app.add_api_route(f"/v5/order/{name}", single(operation), methods=["POST"])
+        app.add_api_route(f"/v5/order/{name}-batch", batch(operation), methods=["POST"])
+
+    @app.get("/v5/order/realtime")
+    async def open_orders(
+        request: Request,
+        symbol: Optional[str] = None,
+        order_link_id: Optional[str] = Query(None, alias="orderLinkId"),
+        cursor: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=50),
+    ) -> JSONResponse:
+        account = account_of(request)
+        if account is None:
+            return invalid_key()
+        orders = exchange.open_orders(account, symbol)
+        if order_link_id:
+            orders = [order for order in orders if order.order_link_id == order_link_id]
+        return _envelope(_page(orders, cursor, limit, SimOrder.to_bybit))
+
+    @app.get("/v5/position/list")
+    async def positions(
+        request: Request,
+        symbol: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=200),
+    ) -> JSONResponse:
+        account = account_of(request)
+        if account is None:
+            return invalid_key()
+        return _envelope(_page(exchange.positions(account, symbol), cursor, limit, exchange.position_item))
+
+    @app.websocket("/v5/public/linear")
+    async def public_stream(websocket: WebSocket) -> None:
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        conn_id = str(next(_conn_ids))
+
+        async def handle(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            op = request.get("op")
+            args = [str(arg) for arg in request.get("args") or []]
+            if op == "subscribe":
+                feeds.subscribe_tickers(queue, args)
+            elif op == "unsubscribe":
+                feeds.unsubscribe_tickers(queue, args)
+            elif op != "ping":
+                return {"success": False, "ret_msg": f"unknown op {op}", "conn_id": conn_id, "op": op}
+            return {"success": True, "ret_msg": "pong" if op == "ping" else "", "conn_id": conn_id, "op": op}
+
+        try:
+            await _serve_socket(websocket, handle, queue)
+        finally:
+            feeds.unsubscribe_tickers(queue)
+
+    @app.websocket("/v5/private")
+    async def private_stream(websocket: WebSocket) -> None:
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        conn_id = str(next(_conn_ids))
+        session: Dict[str, SimAccount] = {}
+
+        async def handle(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            op = request.get("op")
+            args = request.get("args") or []
+            reply = {"success": True, "ret_msg": "", "conn_id": conn_id, "op": op}
+            if op == "auth":
+                if not args or not args[0]:
+                    return {**reply, "success": False, "ret_msg": "Params Error"}
+                session["account"] = exchange.account(str(args[0]))
+            elif op == "subscribe":
+                if "account" not in session:
+                    return {**reply, "success": False, "ret_msg": "Request not authorized"}
+                feeds.subscribe_private(queue, session["account"], [str(arg) for arg in args])
+            elif op == "ping":
+                reply["ret_msg"] = "pong"
+            else:
+                return {**reply, "success": False, "ret_msg": f"unknown op {op}"}
+            return reply
+
+        try:
+            await _serve_socket(websocket, handle, queue)
+        finally:
+            feeds.unsubscribe_private(queue)
+
+    @app.post("/sim/step")
+    async def step(count: int = Query(1, ge=1, le=100_000)) -> Dict[str, Any]:
+        for _ in range(count):
+            if not exchange.step():
+                break
+        return exchange.stats()
+
+    @app.get("/sim/stats")
+    async def stats() -> Dict[str, Any]:
+        return exchange.stats()
+
+    return app
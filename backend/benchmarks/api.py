@@ -0,0 +1,92 @@
+"""``/api/instruments`` CRUD and ``/api/specs`` through the ASGI app, fully offline.
+
+Run from ``backend/``::
+
+    python -m benchmarks.api --iterations 300
+
+``STATE_DIR`` is pointed at a temporary directory before the app (and its
+settings) are first imported; specs come from a snapshot written with the fake
+Bybit client.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+async def run(iterations: int, symbols: int = 600) -> List[BenchResult]:
+    from app.core.config import get_settings
+    from app.main import app
+    from app.services.bybit_specs import SpecRegistry, spec_registry
+    from app.services.persistence_worker import persistence_worker
+    from benchmarks.fake_bybit import FakeBybit, recorded_instrument_pages
+
+    state_dir = get_settings().resolved_state_dir()
+    if not str(state_dir).startswith(tempfile.gettempdir()):
+        raise RuntimeError(f"Refusing to benchmark against a non-temporary state dir: {state_dir}")
+
+    fake = FakeBybit(recorded_instrument_pages(symbols))
+    client = fake.client()
+    await SpecRegistry(Path(state_dir) / "specs.json", client=client).refresh()
+    await client.close()
+    await spec_registry.load_cached()
+    names = list(spec_registry.all())[:iterations]
+
+    create = BenchResult("POST /api/instruments/")
+    patch = BenchResult("PATCH /api/instruments/{symbol}")
+    listing = BenchResult("GET /api/instruments/")
+    listing_cached = BenchResult("GET /api/instruments/ (304)")
+    specs = BenchResult("GET /api/specs/")
+    specs_cached = BenchResult("GET /api/specs/ (304)")
+    delete = BenchResult("DELETE /api/instruments/{symbol}")
+
+    persistence_worker.start()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for symbol in names:
+            with Timer(create):
+                response = await http.post("/api/instruments/", json={"symbol": symbol})
+            response.raise_for_status()
+        for index, symbol in enumerate(names):
+            with Timer(patch):
+                response = await http.patch(f"/api/instruments/{symbol}", json={"entryVolumeUsdt": str(10 + index)})
+            response.raise_for_status()
+            with Timer(listing):
+                response = await http.get("/api/instruments/", headers={"Accept-Encoding": "gzip"})
+            etag = response.headers["etag"]
+            with Timer(listing_cached):
+                await http.get("/api/instruments/", headers={"If-None-Match": etag})
+            with Timer(specs):
+                response = await http.get("/api/specs/", headers={"Accept-Encoding": "gzip"})
+            with Timer(specs_cached):
+                await http.get("/api/specs/", headers={"If-None-Match": response.headers["etag"]})
+        for symbol in names:
+            with Timer(delete):
+                await http.delete(f"/api/instruments/{symbol}")
+    await persistence_worker.stop()
+
+    results = [create, patch, listing, listing_cached, specs, specs_cached, delete]
+    for result in results:
+        result.elapsed = sum(result.samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="gh-bench-") as state_dir:
+        os.environ["STATE_DIR"] = state_dir
+        print(format_table(asyncio.run(run(args.iterations))))
+
+
+if __name__ == "__main__":
+    main()
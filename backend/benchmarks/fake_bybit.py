@@ -0,0 +1,48 @@
+"""Offline stand-in for the Bybit v5 REST endpoints the benchmarks exercise."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+
+import httpx
+
+from app.services.bybit_client import BybitClient
+from app.simulator.instruments import synthetic_instruments
+
+FAKE_BASE_URL = "http://fake-bybit.local"
+
+
+def recorded_instrument_pages(symbols: int = 600, page_size: int = 500) -> List[Dict[str, Any]]:
+    """``get_instruments_info`` envelopes split into cursor-linked pages."""
+    items = synthetic_instruments(symbols)
+    pages = []
+    for start in range(0, len(items), page_size):
+        next_cursor = str(start // page_size + 1) if start + page_size < len(items) else ""
+        pages.append(
+            {
+                "retCode": 0,
+                "retMsg": "OK",
+                "result": {"category": "linear", "list": items[start : start + page_size], "nextPageCursor": next_cursor},
+                "retExtInfo": {},
+                "time": 1700000000000,
+            }
+        )
+    return pages
+
+
+class FakeBybit:
+    """Serve recorded pages through ``httpx.MockTransport``."""
+
+    def __init__(self, pages: List[Dict[str, Any]]) -> None:
+        self.pages = pages
+        self.requests = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if request.url.path == "/v5/market/instruments-info":
+            cursor = parse_qs(request.url.query.decode()).get("cursor", ["0"])[0]
+            return httpx.Response(200, json=self.pages[int(cursor or 0)])
+        return httpx.Response(404, json={"retCode": 10001, "retMsg": f"unknown path {request.url.path}"})
+
+    def client(self) -> BybitClient:
+        return BybitClient(FAKE_BASE_URL, transport=httpx.MockTransport(self.handle))
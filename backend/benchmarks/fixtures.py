@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import List
+
+from app.models.instrument import Instrument
+from app.repositories.instrument_store import _create_instrument_from_spec
+from app.services.symbol_specs import spec_from_steps
+
+
+def symbol_names(count: int) -> List[str]:
+    return [f"SYM{index:04d}USDT" for index in range(count)]
+
+
+def make_instruments(count: int) -> List[Instrument]:
+    return [
+        _create_instrument_from_spec(symbol, spec_from_steps(symbol, "0.0001", "0.1"))
+        for symbol in symbol_names(count)
+    ]
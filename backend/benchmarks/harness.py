@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import math
+import platform
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, math.ceil(q / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+@dataclass
+class BenchResult:
+    name: str
+    samples: List[float] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    @property
+    def p50_us(self) -> float:
+        return percentile(sorted(self.samples), 50) * 1e6
+
+    @property
+    def p99_us(self) -> float:
+        return percentile(sorted(self.samples), 99) * 1e6
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+
+class Timer:
+    """Collect per-operation latencies into a ``BenchResult``."""
+
+    def __init__(self, result: BenchResult) -> None:
+        self._result = result
+        self._started = 0.0
+
+    def __enter__(self) -> "Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._result.samples.append(time.perf_counter() - self._started)
+
+
+def format_table(results: Iterable[BenchResult]) -> str:
+    rows = [f"{'benchmark':<44} {'ops':>8} {'p50 us':>10} {'p99 us':>10} {'ops/s':>12}"]
+    for result in results:
+        rows.append(
+            f"{result.name:<44} {result.count:>8} {result.p50_us:>10.1f} {result.p99_us:>10.1f} {result.ops_per_sec:>12.0f}"
+        )
+    return "\n".join(rows)
+
+
+# Differences below this many microseconds are treated as timer noise, and
+# results with fewer samples are reported but never flagged.
+NOISE_FLOOR_US = 5.0
+MIN_SAMPLES = 10
+
+
+def result_to_dict(result: BenchResult) -> Dict[str, float]:
+    return {
+        "count": result.count,
+        "p50_us": round(result.p50_us, 2),
+        "p99_us": round(result.p99_us, 2),
+        "ops_per_sec": round(result.ops_per_sec, 1),
+    }
+
+
+def save_baseline(path: Path, results: Iterable[BenchResult]) -> None:
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: result_to_dict(result) for result in results},
+    }
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def compare(
+    results: Iterable[BenchResult],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = 0.25,
+) -> Tuple[str, List[str]]:
+    """Table of p50 against ``baseline`` and the names that regressed beyond ``tolerance``."""
+    rows = [f"{'benchmark':<44} {'base p50':>10} {'p50 us':>10} {'change':>8}"]
+    regressions: List[str] = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            rows.append(f"{result.name:<44} {'-':>10} {result.p50_us:>10.1f} {'new':>8}")
+            continue
+        base = reference["p50_us"]
+        change = (result.p50_us - base) / base if base else 0.0
+        marker = ""
+        if change > tolerance and result.p50_us - base > NOISE_FLOOR_US and result.count >= MIN_SAMPLES:
+            regressions.append(result.name)
+            marker = " !"
+        rows.append(f"{result.name:<44} {base:>10.1f} {result.p50_us:>10.1f} {change:>+7.0%}{marker}")
+    return "\n".join(rows), regressions
@@ -0,0 +1,78 @@
+"""Read latency of InstrumentStore while writers PATCH other symbols.
+
+Run from ``backend/``::
+
+    python -m benchmarks.instrument_store --instruments 300 --writers 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+from app.models.instrument import InstrumentUpdate
+from app.repositories.instrument_store import InstrumentStore
+from app.services.persistence_worker import PersistenceWorker
+from app.services.state_storage import StateStorage
+from benchmarks.fixtures import make_instruments
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+async def run(instruments: int, writers: int, duration: float) -> List[BenchResult]:
+    with tempfile.TemporaryDirectory() as tmp:
+        worker = PersistenceWorker(StateStorage(Path(tmp) / "state.json"))
+        worker.start()
+        store = InstrumentStore(worker)
+        await store.replace_all(make_instruments(instruments))
+        symbols = [instrument.symbol for instrument in await store.list()]
+
+        list_result = BenchResult("list() under concurrent writes")
+        get_result = BenchResult("get() under concurrent writes")
+        write_result = BenchResult("update() concurrent writers")
+        deadline = time.perf_counter() + duration
+
+        async def writer(seed: int) -> None:
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                update = InstrumentUpdate(entry_price_usdt=Decimal(rng.randint(1, 10_000)))
+                with Timer(write_result):
+                    await store.update(rng.choice(symbols), update)
+                await asyncio.sleep(0)
+
+        async def reader() -> None:
+            rng = random.Random(0)
+            while time.perf_counter() < deadline:
+                with Timer(list_result):
+                    await store.list()
+                with Timer(get_result):
+                    await store.get(rng.choice(symbols))
+                await asyncio.sleep(0)
+
+        started = time.perf_counter()
+        await asyncio.gather(reader(), *(writer(seed) for seed in range(writers)))
+        elapsed = time.perf_counter() - started
+        for result in (list_result, get_result, write_result):
+            result.elapsed = elapsed
+
+        await worker.stop()
+        return [list_result, get_result, write_result]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instruments", type=int, default=300)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.instruments, args.writers, args.duration))
+    print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()
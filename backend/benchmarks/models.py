@@ -0,0 +1,107 @@
+"""Model-level costs of instrument create/update/list and settings reads.
+
+Run from ``backend/``::
+
+    python -m benchmarks.models --iterations 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+from app.models.instrument import Instrument, InstrumentUpdate
+from app.repositories.instrument_store import InstrumentStore, _apply_update, _create_instrument_from_spec
+from app.services.persistence_worker import PersistenceWorker
+from app.services.settings_service import SettingsService
+from app.services.state_storage import StateStorage
+from app.services.symbol_specs import spec_from_steps
+from benchmarks.fixtures import make_instruments, symbol_names
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+def _rebuild_update(instrument: Instrument, updates: InstrumentUpdate) -> Instrument:
+    """The previous update path: dump everything, merge and re-validate the whole model."""
+    payload = instrument.model_dump(by_alias=False)
+    payload.update(updates.model_dump(exclude_unset=True, by_alias=False))
+    return Instrument(**payload)
+
+
+async def run(iterations: int, instruments: int) -> List[BenchResult]:
+    rng = random.Random(11)
+    results: List[BenchResult] = []
+
+    create = BenchResult("create instrument from spec")
+    for symbol in symbol_names(iterations):
+        with Timer(create):
+            _create_instrument_from_spec(symbol, spec_from_steps(symbol, "0.0001", "0.1"))
+    results.append(create)
+
+    base = make_instruments(1)[0]
+    updates = [InstrumentUpdate(entry_price_usdt=Decimal(rng.randint(1, 10_000))) for _ in range(iterations)]
+    for name, apply in (("update scalar (dump + rebuild)", _rebuild_update), ("update scalar (fast path)", _apply_update)):
+        result = BenchResult(name)
+        for update in updates:
+            with Timer(result):
+                apply(base, update)
+        results.append(result)
+
+    nested = InstrumentUpdate.model_validate(
+        {
+            "slLong": {"count": 3, "stepUsdt": "1.5"},
+            "tpLevels": [{"stepUsdt": 1, "volumePercent": 30}, {"stepUsdt": 2, "volumePercent": 70}],
+        }
+    )
+    for name, apply in (("update nested (dump + rebuild)", _rebuild_update), ("update nested (fast path)", _apply_update)):
+        result = BenchResult(name)
+        for _ in range(iterations):
+            with Timer(result):
+                apply(base, nested)
+        results.append(result)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = StateStorage(Path(tmp) / "state.json")
+        store = InstrumentStore(PersistenceWorker(storage))
+        await store.replace_all(make_instruments(instruments))
+        symbols = list(store.snapshot())
+
+        store_update = BenchResult("InstrumentStore.update()")
+        for update in updates:
+            with Timer(store_update):
+                await store.update(rng.choice(symbols), update)
+        results.append(store_update)
+
+        listing = BenchResult(f"InstrumentStore.list() x{instruments}")
+        for index in range(iterations):
+            if index % 10 == 0:
+                await store.update(rng.choice(symbols), rng.choice(updates))
+            with Timer(listing):
+                await store.list()
+        results.append(listing)
+
+    settings = SettingsService()
+    settings_read = BenchResult("SettingsService.current()")
+    for _ in range(iterations):
+        with Timer(settings_read):
+            settings.current()
+    results.append(settings_read)
+
+    for result in results:
+        result.elapsed = sum(result.samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--instruments", type=int, default=300)
+    args = parser.parse_args()
+    print(format_table(asyncio.run(run(args.iterations, args.instruments))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Vectorised order plan recomputation for all instruments, and the risk pre-check.
+
+Run from ``backend/``::
+
+    python -m benchmarks.order_plan --instruments 500
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from decimal import Decimal
+from typing import List
+
+import numpy as np
+
+from app.models.instrument import InstrumentUpdate
+from app.services.market_data import PriceBook
+from app.services.order_plan import POSITION_IDX_LONG, OrderPlanEngine
+from app.services.risk import RiskEngine, RiskLimits, RiskTotals
+from benchmarks.fixtures import make_instruments
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+def run(instruments: int, iterations: int) -> List[BenchResult]:
+    rng = random.Random(7)
+    book = PriceBook()
+    engine = OrderPlanEngine()
+    engine.bind_price_book(book)
+    items = [
+        instrument.model_copy(update={"entry_volume_usdt": Decimal(rng.randint(10, 1000))})
+        for instrument in make_instruments(instruments)
+    ]
+    for instrument in items:
+        book.update(instrument.symbol, last=rng.uniform(0.01, 100))
+    engine.on_instruments_changed({instrument.symbol: instrument for instrument in items})
+
+    full = BenchResult(f"recompute_from_book() x{instruments}")
+    for _ in range(iterations):
+        last = np.frombuffer(book.last, dtype=np.float64)
+        last[: len(book)] *= 1 + rng.uniform(-0.001, 0.001)
+        with Timer(full):
+            engine.recompute_from_book()
+
+    single = BenchResult("upsert() one changed field")
+    for _ in range(iterations):
+        instrument = rng.choice(items)
+        update = InstrumentUpdate(entry_price_usdt=Decimal(rng.randint(1, 100)))
+        changed = instrument.model_copy(update=update.model_dump(exclude_unset=True))
+        with Timer(single):
+            engine.upsert(changed)
+
+    verify = BenchResult(f"verify() x{instruments} (Decimal)")
+    with Timer(verify):
+        mismatches = engine.verify()
+    if mismatches:
+        print(f"warning: {len(mismatches)} legs differ from the Decimal implementation")
+
+    risk = RiskEngine("bench", engine, book, RiskLimits(side_usdt=1e12), RiskTotals())
+    risk.rebuild()
+    aggregate = BenchResult("RiskEngine.on_plans_changed() one symbol")
+    check = BenchResult("RiskEngine.check()")
+    for _ in range(iterations):
+        symbol = rng.choice(items).symbol
+        with Timer(aggregate):
+            risk.on_plans_changed((symbol,))
+        with Timer(check):
+            risk.check(symbol, POSITION_IDX_LONG)
+
+    results = [full, single, verify, aggregate, check]
+    for result in results:
+        result.elapsed = sum(result.samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instruments", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    print(format_table(run(args.instruments, args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
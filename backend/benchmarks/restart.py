@@ -0,0 +1,133 @@
+"""Time-to-trading after a restart, with and without a checkpoint, against the local simulator.
+
+A fresh engine and executor per restart reconcile the grids an earlier
+process left on the simulated exchange: either after a full paginated
+open-order sweep, or straight from the checkpoint that process wrote.
+
+Run from ``backend/``::
+
+    python -m benchmarks.restart --instruments 100,300,600
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import httpx
+
+from app.models.instrument import Instrument
+from app.repositories.instrument_store import _create_instrument_from_spec
+from app.services.bybit_client import BybitClient
+from app.services.bybit_specs import SpecRegistry
+from app.services.checkpoint import CheckpointStore, TradingCheckpoint
+from app.services.market_data import PriceBook
+from app.services.order_execution import OrderExecutor
+from app.services.order_plan import OrderPlanEngine
+from app.services.risk import RiskEngine, RiskLimits, RiskTotals
+from app.simulator.exchange import Exchange
+from app.simulator.instruments import synthetic_instruments
+from app.simulator.paths import SyntheticPath
+from app.simulator.server import create_simulator_app
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+def _executor(client: BybitClient, registry: SpecRegistry, instruments: Dict[str, Instrument]) -> OrderExecutor:
+    engine = OrderPlanEngine()
+    book = PriceBook()
+    engine.bind_price_book(book)
+    engine.on_instruments_changed(instruments)
+    risk = RiskEngine("bench", engine, book, RiskLimits(), RiskTotals())
+    return OrderExecutor(client, engine, registry, risk, debounce=0)
+
+
+async def _restarts(instruments: int, iterations: int, tmp: Path) -> List[BenchResult]:
+    items = synthetic_instruments(instruments)
+    ticks = {item["symbol"]: Decimal(item["priceFilter"]["tickSize"]) for item in items}
+    exchange = Exchange(items, SyntheticPath(ticks, seed=1, volatility=0.0))
+    transport = httpx.ASGITransport(app=create_simulator_app(exchange))
+    client = BybitClient("http://simulator", "bench", "bench", transport=transport)
+    registry = SpecRegistry(tmp / f"specs-{instruments}.json", client=client)
+    await registry.refresh()
+
+    configured: Dict[str, Instrument] = {}
+    references: Dict[str, float] = {}
+    for symbol, spec in registry.all().items():
+        last = exchange.last[symbol]
+        configured[symbol] = _create_instrument_from_spec(symbol, spec).model_copy(
+            update={"is_active": True, "entry_volume_usdt": Decimal(50) * ticks[symbol] * 10_000}
+        )
+        references[symbol] = float(last)
+
+    # The process before the restart: open both sides (reduce-only legs need a position), place every grid
+    # and write a checkpoint.
+    first = _executor(client, registry, configured)
+    first._engine.set_reference_prices(references)
+    first._engine.recompute_all()
+    account = exchange.account("bench")
+    for symbol in configured:
+        for order in first._engine.orders(symbol):
+            if order.leg.startswith("entry_"):
+                request = {"symbol": symbol, "side": order.side, "orderType": "Market", "qty": str(order.qty)}
+                exchange.place(account, {**request, "positionIdx": order.position_idx})
+    await first.reconcile(refresh=True)
+    store = CheckpointStore(tmp / f"checkpoint-{instruments}.json")
+    await store.save(
+        TradingCheckpoint(
+            references=first._engine.reference_prices(),
+            generations=dict(first.generations),
+            open_orders=list(first.open_orders.values()),
+            saved_at=time.time(),
+        )
+    )
+    orders = len(first.open_orders)
+
+    sweep = BenchResult(f"restart, open-order sweep x{instruments} ({orders} orders)")
+    resume = BenchResult(f"restart, checkpoint x{instruments} ({orders} orders)")
+    for _ in range(iterations):
+        executor = _executor(client, registry, configured)
+        with Timer(sweep):
+            # Without a checkpoint plans wait for ticks; assume they arrived to keep the resting grids.
+            executor._engine.set_reference_prices(references)
+            executor._engine.recompute_all()
+            result = await executor.reconcile(refresh=True)
+        assert not result.created + result.amended + result.cancelled
+
+        executor = _executor(client, registry, configured)
+        with Timer(resume):
+            checkpoint = await store.load()
+            assert checkpoint is not None
+            executor._engine.seed_reference_prices(checkpoint.references)
+            executor.restore(checkpoint.generations, checkpoint.open_orders)
+            result = await executor.reconcile()
+        assert not result.created + result.amended + result.cancelled
+
+    await client.close()
+    return [sweep, resume]
+
+
+async def run(sizes: Sequence[int], iterations: int) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for instruments in sizes:
+            results.extend(await _restarts(instruments, iterations, Path(tmp)))
+    for result in results:
+        result.elapsed = sum(result.samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instruments", default="100,300,600", help="comma separated instrument counts")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.instruments.split(",")]
+    print(format_table(asyncio.run(run(sizes, args.iterations))))
+
+
+if __name__ == "__main__":
+    main()
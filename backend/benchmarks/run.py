@@ -0,0 +1,96 @@
+"""Run the benchmark suites and compare them with a stored baseline.
+
+Run from ``backend/``::
+
+    python -m benchmarks.run                        # all suites, compare with baseline.json
+    python -m benchmarks.run --suite api,storage --quick   # smoke run, no comparison
+    python -m benchmarks.run --save-baseline        # record a new baseline
+
+Exits with status 1 when a p50 latency regressed by more than ``--tolerance``.
+Everything runs offline: state lives in a temporary directory and Bybit is
+replaced by ``benchmarks.fake_bybit``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+# suite -> (full run, quick run); modules are imported lazily, after STATE_DIR is set.
+SUITES: Dict[str, Any] = {
+    "api": (lambda m: asyncio.run(m.run(300)), lambda m: asyncio.run(m.run(50))),
+    "storage": (
+        lambda m: asyncio.run(m.run([10, 100, 1000], 20)),
+        lambda m: asyncio.run(m.run([10, 100, 1000], 3)),
+    ),
+    "specs": (lambda m: asyncio.run(m.run(600, 50)), lambda m: asyncio.run(m.run(600, 5))),
+    "models": (lambda m: asyncio.run(m.run(5000, 300)), lambda m: asyncio.run(m.run(500, 100))),
+    "order_plan": (lambda m: m.run(500, 200), lambda m: m.run(500, 20)),
+    "instrument_store": (
+        lambda m: asyncio.run(m.run(300, 8, 3.0)),
+        lambda m: asyncio.run(m.run(300, 4, 0.5)),
+    ),
+    "simulator": (lambda m: asyncio.run(m.run(500, 5000)), lambda m: asyncio.run(m.run(100, 500))),
+    "restart": (lambda m: asyncio.run(m.run([100, 300, 600], 5)), lambda m: asyncio.run(m.run([100], 1))),
+}
+
+
+def _run_suites(parser: argparse.ArgumentParser, names: List[str], quick: bool) -> List[Any]:
+    from benchmarks.harness import format_table
+
+    results = []
+    for name in names:
+        if name not in SUITES:
+            parser.error(f"unknown suite {name!r}")
+        runner: Callable[[Any], List[Any]] = SUITES[name][1 if quick else 0]
+        print(f"== {name}", flush=True)
+        suite_results = runner(importlib.import_module(f"benchmarks.{name}"))
+        print(format_table(suite_results), flush=True)
+        results.extend(suite_results)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", default=",".join(SUITES), help=f"comma separated subset of {', '.join(SUITES)}")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, no baseline comparison")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="gh-bench-") as state_dir:
+        # Must happen before any app module reads (and caches) the settings.
+        os.environ["STATE_DIR"] = state_dir
+        results = _run_suites(parser, args.suite.split(","), args.quick)
+
+    from benchmarks.harness import compare, load_baseline, save_baseline
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if args.quick:
+        # Quick runs use different sizes and too few samples to judge regressions.
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    table, regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    print(f"\n== compared with {args.baseline}")
+    print(table)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
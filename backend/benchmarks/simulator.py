@@ -0,0 +1,94 @@
+"""Order throughput against the local Bybit simulator, in process over ASGI.
+
+Run from ``backend/``::
+
+    python -m benchmarks.simulator --symbols 500 --orders 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from decimal import ROUND_CEILING, Decimal
+from typing import Any, Dict, List
+
+import httpx
+
+from app.services.bybit_client import BybitClient
+from app.simulator.exchange import Exchange
+from app.simulator.instruments import synthetic_instruments
+from app.simulator.paths import SyntheticPath
+from app.simulator.server import BATCH_LIMIT, create_simulator_app
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+def _limit_order(exchange: Exchange, symbol: str, index: int) -> Dict[str, Any]:
+    spec = exchange.specs[symbol]
+    bid, _ask = exchange.quote(symbol)
+    price = max(spec.tick_size, bid - spec.tick_size * (1 + index % 50))
+    steps = (2 * spec.min_notional / price / spec.qty_step).to_integral_value(ROUND_CEILING)
+    return {
+        "symbol": symbol,
+        "side": "Buy",
+        "orderType": "Limit",
+        "qty": str(max(spec.min_qty, steps * spec.qty_step)),
+        "price": str(price),
+        "positionIdx": 1,
+        "orderLinkId": f"bench-{index}",
+    }
+
+
+async def run(symbols: int, orders: int) -> List[BenchResult]:
+    instruments = synthetic_instruments(symbols)
+    ticks = {item["symbol"]: Decimal(item["priceFilter"]["tickSize"]) for item in instruments}
+    exchange = Exchange(instruments, SyntheticPath(ticks, seed=1))
+    transport = httpx.ASGITransport(app=create_simulator_app(exchange))
+    client = BybitClient("http://simulator", "bench", "bench", transport=transport)
+    names = sorted(exchange.last)
+
+    requests = [_limit_order(exchange, names[index % len(names)], index) for index in range(orders)]
+    batches = [requests[start : start + BATCH_LIMIT] for start in range(0, len(requests), BATCH_LIMIT)]
+    place = BenchResult(f"place_batch_orders() {BATCH_LIMIT} orders")
+    started = time.perf_counter()
+    for batch in batches:
+        with Timer(place):
+            await client.place_batch_orders(batch)
+    elapsed = time.perf_counter() - started
+    print(f"{orders} orders placed in {elapsed:.2f}s ({orders / elapsed:,.0f} orders/s)")
+
+    amends = [{"symbol": request["symbol"], "orderLinkId": request["orderLinkId"]} for request in requests]
+    for amend, request in zip(amends, requests):
+        amend["price"] = request["price"]
+    amend = BenchResult(f"amend_batch_orders() {BATCH_LIMIT} orders")
+    for start in range(0, len(amends), BATCH_LIMIT):
+        with Timer(amend):
+            await client.amend_batch_orders(amends[start : start + BATCH_LIMIT])
+
+    step = BenchResult(f"Exchange.step() {len(names)} symbols, {orders} resting")
+    for _ in range(50):
+        with Timer(step):
+            exchange.step()
+
+    cancel = BenchResult(f"cancel_batch_orders() {BATCH_LIMIT} orders")
+    for start in range(0, len(requests), BATCH_LIMIT):
+        batch = [{"symbol": r["symbol"], "orderLinkId": r["orderLinkId"]} for r in requests[start : start + BATCH_LIMIT]]
+        with Timer(cancel):
+            await client.cancel_batch_orders(batch)
+
+    await client.close()
+    results = [place, amend, step, cancel]
+    for result in results:
+        result.elapsed = sum(result.samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=5000)
+    args = parser.parse_args()
+    print(format_table(asyncio.run(run(args.symbols, args.orders))))
+
+
+if __name__ == "__main__":
+    main()
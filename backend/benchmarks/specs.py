@@ -0,0 +1,51 @@
+"""SpecRegistry refresh and snapshot load against recorded ``instruments-info`` pages.
+
+Run from ``backend/``::
+
+    python -m benchmarks.specs --symbols 600
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import List
+
+from app.services.bybit_specs import SpecRegistry
+from benchmarks.fake_bybit import FakeBybit, recorded_instrument_pages
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+async def run(symbols: int, iterations: int) -> List[BenchResult]:
+    fake = FakeBybit(recorded_instrument_pages(symbols))
+    client = fake.client()
+    refresh = BenchResult(f"SpecRegistry.refresh() {symbols} symbols")
+    load = BenchResult(f"SpecRegistry.load_cached() {symbols} symbols")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = Path(tmp) / "specs.json"
+        registry = SpecRegistry(snapshot, client=client)
+        for _ in range(iterations):
+            with Timer(refresh):
+                await registry.refresh()
+        for _ in range(iterations):
+            with Timer(load):
+                await SpecRegistry(snapshot, client=client).load_cached()
+
+    await client.close()
+    for result in (refresh, load):
+        result.elapsed = sum(result.samples)
+    return [refresh, load]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=600)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    print(format_table(asyncio.run(run(args.symbols, args.iterations))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""StateStorage and SqliteStateStorage load/save at several portfolio sizes.
+
+Run from ``backend/``::
+
+    python -m benchmarks.storage --sizes 10,100,1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, List, Sequence
+
+from app.services.sqlite_storage import SqliteStateStorage
+from app.services.state_storage import StateBackend, StateStorage
+from benchmarks.fixtures import make_instruments
+from benchmarks.harness import BenchResult, Timer, format_table
+
+
+async def _run_backend(
+    label: str,
+    factory: Callable[[], StateBackend],
+    size: int,
+    iterations: int,
+) -> List[BenchResult]:
+    instruments = make_instruments(size)
+    save = BenchResult(f"{label} save_instruments() x{size}")
+    load = BenchResult(f"{label} load_instruments() x{size}")
+    upsert = BenchResult(f"{label} apply_instrument_changes() 1/{size}")
+
+    storage = factory()
+    for _ in range(iterations):
+        with Timer(save):
+            await storage.save_instruments(instruments)
+    for index in range(iterations):
+        changed = instruments[index % size].model_copy(update={"entry_volume_usdt": Decimal(index)})
+        with Timer(upsert):
+            await storage.apply_instrument_changes([changed])
+    await storage.compact()
+    for _ in range(iterations):
+        # A fresh backend per load measures the cold read from disk.
+        with Timer(load):
+            await factory().load_instruments()
+
+    results = [save, load, upsert]
+    for result in results:
+        result.elapsed = sum(result.samples)
+    return results
+
+
+async def run(sizes: Sequence[int], iterations: int) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            json_path = Path(tmp) / f"state-{size}.json"
+            sqlite_path = Path(tmp) / f"state-{size}.sqlite3"
+            results += await _run_backend("json", lambda: StateStorage(json_path), size, iterations)
+            results += await _run_backend("sqlite", lambda: SqliteStateStorage(sqlite_path), size, iterations)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(format_table(asyncio.run(run(sizes, args.iterations))))
+
+
+if __name__ == "__main__":
+    main()
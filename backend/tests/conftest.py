@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+
+from tests.sim import Market
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def market(tmp_path: Path) -> AsyncIterator[Market]:
+    market = Market(tmp_path)
+    await market.registry.refresh()
+    yield market
+    await market.client.close()
@@ -0,0 +1,181 @@
+"""Trading components wired to an in-process ``Exchange`` through ``httpx.ASGITransport``."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Mapping, Optional
+
+import httpx
+
+from app.models.instrument import Instrument, StopLossConfig, TakeProfitLevel
+from app.repositories.instrument_store import _create_instrument_from_spec
+from app.services.bybit_client import BybitClient
+from app.services.bybit_specs import SpecRegistry
+from app.services.market_data import PriceBook
+from app.services.order_execution import OrderExecutor
+from app.services.order_plan import OrderPlanEngine
+from app.services.risk import RiskEngine, RiskLimits, RiskTotals
+from app.simulator.exchange import Exchange, SimAccount
+from app.simulator.instruments import synthetic_instrument
+from app.simulator.server import create_simulator_app
+
+API_KEY = "test-key"
+API_SECRET = "test-secret"
+START_PRICE = Decimal(100)
+
+
+class ScriptedPath:
+    """Price path that holds its prices until the test pushes new ones."""
+
+    def __init__(self, prices: Mapping[str, Decimal]) -> None:
+        self._prices = dict(prices)
+        self._moves: Deque[Dict[str, Decimal]] = deque()
+
+    def push(self, prices: Mapping[str, Decimal]) -> None:
+        self._moves.append(dict(prices))
+
+    def __iter__(self) -> Iterator[Dict[str, Decimal]]:
+        while True:
+            if self._moves:
+                self._prices.update(self._moves.popleft())
+            yield dict(self._prices)
+
+
+class Market:
+    """A simulated exchange plus a signed client and a spec registry pointed at it.
+
+    Synthetic instruments 1..``count`` (USDT perpetuals with tick sizes 0.001,
+    0.01 and 0.1) all start at ``START_PRICE``; prices only move on ``move``.
+    """
+
+    def __init__(self, tmp_path: Path, count: int = 3) -> None:
+        self.items = [synthetic_instrument(index) for index in range(1, count + 1)]
+        self.symbols = [item["symbol"] for item in self.items]
+        self.path = ScriptedPath({symbol: START_PRICE for symbol in self.symbols})
+        self.exchange = Exchange(self.items, self.path)
+        self.account: SimAccount = self.exchange.account(API_KEY)
+        self.client = BybitClient(
+            "http://simulator",
+            API_KEY,
+            API_SECRET,
+            backoff_base=0.0,
+            transport=httpx.ASGITransport(app=create_simulator_app(self.exchange)),
+        )
+        self.registry = SpecRegistry(tmp_path / "specs.json", client=self.client)
+
+    def move(self, symbol: str, price: Decimal | str | int) -> None:
+        self.path.push({symbol: Decimal(str(price))})
+        self.exchange.step()
+
+    def instruments(self, **updates: object) -> Dict[str, Instrument]:
+        """Active instruments for every listed symbol.
+
+        By default: 50 USDT entries at the reference price, take-profits 2 and
+        4 USDT away and two stop-losses 5 USDT apart on each side.
+        """
+        fields = {
+            "is_active": True,
+            "entry_volume_usdt": Decimal(50),
+            "tp_levels": [
+                TakeProfitLevel(step_usdt=Decimal(2), volume_percent=Decimal(50)),
+                TakeProfitLevel(step_usdt=Decimal(4), volume_percent=Decimal(50)),
+            ],
+            "sl_long": StopLossConfig(count=2, step_usdt=Decimal(5)),
+            "sl_short": StopLossConfig(count=2, step_usdt=Decimal(5)),
+            **updates,
+        }
+        return {
+            symbol: _create_instrument_from_spec(symbol, spec).model_copy(update=fields)
+            for symbol, spec in self.registry.all().items()
+        }
+
+    def executor(
+        self,
+        instruments: Mapping[str, Instrument],
+        limits: Optional[RiskLimits] = None,
+    ) -> OrderExecutor:
+        """Executor whose plans are computed from the exchange's current last prices."""
+        engine = OrderPlanEngine()
+        book = PriceBook()
+        engine.bind_price_book(book)
+        risk = RiskEngine("test", engine, book, limits, RiskTotals())
+        engine.add_listener(risk.on_plans_changed)
+        engine.on_instruments_changed(instruments)
+        engine.set_reference_prices({symbol: float(self.exchange.last[symbol]) for symbol in instruments})
+        engine.recompute_all()
+        return OrderExecutor(self.client, engine, self.registry, risk, debounce=0)
+
+
+_CLOSE = object()
+
+
+class FakeSocket:
+    """Scripted WebSocket connection: the code under test sends JSON, the test pushes frames."""
+
+    def __init__(self, on_send: Optional[Callable[["FakeSocket", Dict[str, Any]], None]] = None) -> None:
+        self.sent: List[Dict[str, Any]] = []
+        self._frames: "asyncio.Queue[object]" = asyncio.Queue()
+        self._on_send = on_send
+
+    async def __aenter__(self) -> "FakeSocket":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+    async def send(self, raw: str) -> None:
+        message = json.loads(raw)
+        self.sent.append(message)
+        if self._on_send is not None:
+            self._on_send(self, message)
+
+    def push(self, frame: Any) -> None:
+        self._frames.put_nowait(frame if isinstance(frame, (str, bytes)) else json.dumps(frame))
+
+    def drop(self) -> None:
+        """End the connection after the frames pushed so far."""
+        self._frames.put_nowait(_CLOSE)
+
+    async def close(self) -> None:
+        self.drop()
+
+    async def recv(self) -> object:
+        frame = await self._frames.get()
+        if frame is _CLOSE:
+            raise ConnectionError("connection closed")
+        return frame
+
+    def __aiter__(self) -> "FakeSocket":
+        return self
+
+    async def __anext__(self) -> object:
+        frame = await self._frames.get()
+        if frame is _CLOSE:
+            raise StopAsyncIteration
+        return frame
+
+
+class FakeServer:
+    """``connect`` replacement handing out a new ``FakeSocket`` per connection attempt."""
+
+    def __init__(self, on_send: Optional[Callable[[FakeSocket, Dict[str, Any]], None]] = None) -> None:
+        self.connections: List[FakeSocket] = []
+        self._on_send = on_send
+
+    def connect(self, url: str, **kwargs: Any) -> FakeSocket:
+        socket = FakeSocket(self._on_send)
+        self.connections.append(socket)
+        return socket
+
+
+async def eventually(predicate: Callable[[], bool], timeout: float = 2.0) -> None:
+    """Yield to the loop until ``predicate`` holds."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        await asyncio.sleep(0.001)
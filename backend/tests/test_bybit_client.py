@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+from typing import Callable, List
+
+import httpx
+import pytest
+
+from app.services.bybit_client import BybitAPIError, BybitClient
+from app.services.rate_limiter import RateLimiter
+from tests.sim import Market
+
+pytestmark = pytest.mark.anyio
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+def _ok(result: object = None) -> httpx.Response:
+    return httpx.Response(200, json={"retCode": 0, "retMsg": "OK", "result": result or {}})
+
+
+def _error(ret_code: int) -> httpx.Response:
+    return httpx.Response(200, json={"retCode": ret_code, "retMsg": "error", "result": {}})
+
+
+def _scripted(responses: List[httpx.Response], seen: List[httpx.Request]) -> Handler:
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return responses[min(len(seen), len(responses)) - 1]
+
+    return handler
+
+
+def _client(handler: Handler, **kwargs: object) -> BybitClient:
+    return BybitClient(
+        "http://bybit",
+        "key",
+        "secret",
+        backoff_base=0.0,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+async def test_retries_a_transient_ret_code() -> None:
+    seen: List[httpx.Request] = []
+    client = _client(_scripted([_error(10006), _ok({"value": 1})], seen))
+    assert await client.get("/v5/market/time") == {"value": 1}
+    assert len(seen) == 2
+    await client.close()
+
+
+async def test_retries_a_transient_http_status() -> None:
+    seen: List[httpx.Request] = []
+    client = _client(_scripted([httpx.Response(503), httpx.Response(429), _ok({"value": 1})], seen))
+    assert await client.get("/v5/market/time") == {"value": 1}
+    assert len(seen) == 3
+    await client.close()
+
+
+async def test_raises_a_permanent_ret_code_without_retrying() -> None:
+    seen: List[httpx.Request] = []
+    client = _client(_scripted([_error(10001)], seen))
+    with pytest.raises(BybitAPIError) as raised:
+        await client.get("/v5/market/time")
+    assert raised.value.ret_code == 10001
+    assert len(seen) == 1
+    await client.close()
+
+
+async def test_gives_up_after_max_retries() -> None:
+    seen: List[httpx.Request] = []
+    client = _client(_scripted([_error(10006)], seen), max_retries=2)
+    with pytest.raises(BybitAPIError) as raised:
+        await client.get("/v5/market/time")
+    assert raised.value.ret_code == 10006
+    assert len(seen) == 3
+    await client.close()
+
+
+async def test_transport_errors_are_retried_then_raised() -> None:
+    seen: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = _client(handler, max_retries=1)
+    with pytest.raises(RuntimeError, match="request failed"):
+        await client.get("/v5/market/time")
+    assert len(seen) == 2
+    await client.close()
+
+
+async def test_unexpected_payload_is_not_retried() -> None:
+    seen: List[httpx.Request] = []
+    client = _client(_scripted([httpx.Response(200, json=[1, 2])], seen))
+    with pytest.raises(RuntimeError, match="unexpected response type"):
+        await client.get("/v5/market/time")
+    assert len(seen) == 1
+    await client.close()
+
+
+def test_backoff_doubles_up_to_the_cap_with_jitter() -> None:
+    client = BybitClient("http://bybit", backoff_base=0.25, backoff_max=1.0)
+    for attempt, ceiling in ((0, 0.25), (1, 0.5), (2, 1.0), (6, 1.0)):
+        for _ in range(20):
+            assert ceiling / 2 <= client._backoff(attempt) <= ceiling
+
+
+async def test_every_attempt_takes_a_token_from_its_endpoint_bucket() -> None:
+    seen: List[httpx.Request] = []
+    limiter = RateLimiter({"/v5/order/create-batch": (0.001, 5)})
+    client = _client(_scripted([_error(10006), _ok()], seen), rate_limiter=limiter)
+    await client.place_batch_orders([{"symbol": "BTCUSDT"}])
+    assert len(seen) == 2
+    assert limiter.bucket("/v5/order/create-batch").available == pytest.approx(3, abs=0.01)
+    assert limiter.bucket("/v5/order/realtime").available == pytest.approx(50)
+    await client.close()
+
+
+async def test_signs_private_requests() -> None:
+    seen: List[httpx.Request] = []
+    client = _client(_scripted([_ok()], seen))
+    await client.place_batch_orders([{"symbol": "BTCUSDT"}])
+    request = seen[0]
+    assert request.headers["X-BAPI-API-KEY"] == "key"
+    expected = client._sign(request.headers["X-BAPI-TIMESTAMP"], request.content.decode("utf-8"))
+    assert request.headers["X-BAPI-SIGN"] == expected
+    assert json.loads(request.content) == {"category": "linear", "request": [{"symbol": "BTCUSDT"}]}
+    await client.close()
+
+
+async def test_private_requests_need_credentials() -> None:
+    client = BybitClient("http://bybit", transport=httpx.MockTransport(lambda request: _ok()))
+    with pytest.raises(RuntimeError, match="credentials"):
+        await client.get_open_orders()
+    await client.close()
+
+
+async def test_open_orders_are_read_across_pages(market: Market) -> None:
+    symbol = market.symbols[0]
+    for index in range(60):
+        request = {"symbol": symbol, "side": "Buy", "qty": "1", "price": str(30 + index), "positionIdx": 1}
+        assert market.exchange.place(market.account, {**request, "orderLinkId": f"o-{index}"})[0] == 0
+    orders = await market.client.get_all_open_orders()
+    assert [order["orderLinkId"] for order in orders] == [f"o-{index}" for index in range(60)]
+
+
+async def test_batch_results_carry_a_status_per_order(market: Market) -> None:
+    symbol = market.symbols[0]
+    good = {"symbol": symbol, "side": "Buy", "orderType": "Limit", "qty": "1", "price": "90", "positionIdx": 1}
+    envelope = await market.client.place_batch_orders(
+        [{**good, "orderLinkId": "a"}, {**good, "orderLinkId": "a"}, {**good, "orderLinkId": "b", "qty": "0"}]
+    )
+    assert [status["code"] for status in envelope["retExtInfo"]["list"]] == [0, 110072, 10001]
+    assert envelope["result"]["list"][0]["orderLinkId"] == "a"
+
+
+async def test_get_order_finds_an_open_order_by_link_id(market: Market) -> None:
+    symbol = market.symbols[0]
+    request = {"symbol": symbol, "side": "Buy", "qty": "1", "price": "90", "positionIdx": 1, "orderLinkId": "a"}
+    market.exchange.place(market.account, request)
+    order = await market.client.get_order(symbol, "a")
+    assert order is not None and order["price"] == "90" and order["orderStatus"] == "New"
+    assert await market.client.get_order(symbol, "missing") is None
+
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import List, Optional, Tuple
+
+import pytest
+
+from app.models.instrument import Instrument
+from app.repositories.instrument_store import _create_instrument_from_spec
+from app.services.market_data import MarketDataService, PriceBook
+from app.services.symbol_specs import spec_from_steps
+from tests.sim import FakeServer, eventually
+
+
+def _service(**kwargs: object) -> Tuple[MarketDataService, List[Tuple[str, int]]]:
+    service = MarketDataService("ws://replay", PriceBook(), **kwargs)
+    ticks: List[Tuple[str, int]] = []
+    service.add_listener(lambda symbol, slot: ticks.append((symbol, slot)))
+    return service, ticks
+
+
+def _ticker(symbol: str, last: str, ts: Optional[int] = 1_700_000_000_000, **data: str) -> str:
+    return json.dumps(
+        {"topic": f"tickers.{symbol}", "type": "snapshot", "ts": ts, "data": {"symbol": symbol, "lastPrice": last, **data}}
+    )
+
+
+def _instrument(symbol: str, active: bool = True) -> Instrument:
+    return _create_instrument_from_spec(symbol, spec_from_steps(symbol, "0.01", "0.1")).model_copy(
+        update={"is_active": active}
+    )
+
+
+def test_ticker_frames_update_the_price_book() -> None:
+    service, ticks = _service()
+    service.handle_message(_ticker("BTCUSDT", "100.5", bid1Price="100.4", ask1Price="100.6"))
+    service.handle_message(_ticker("BTCUSDT", "101", ts=1_700_000_001_000).encode("utf-8"))
+
+    book = service.price_book
+    slot = book.index_of("BTCUSDT")
+    assert ticks == [("BTCUSDT", slot), ("BTCUSDT", slot)]
+    assert book.last_price("BTCUSDT") == 101.0
+    # Delta frames only carry changed fields; the quote of the first frame stays.
+    assert book.best_bid_ask("BTCUSDT") == (100.4, 100.6)
+    assert book.updated_at[slot] == 1_700_000_001.0
+
+
+def test_symbol_defaults_to_the_topic() -> None:
+    service, ticks = _service()
+    service.handle_message(json.dumps({"topic": "tickers.ETHUSDT", "data": {"lastPrice": "2000"}}))
+    assert service.price_book.last_price("ETHUSDT") == 2000.0
+    assert [symbol for symbol, _ in ticks] == ["ETHUSDT"]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "not json",
+        "[1, 2]",
+        '"tickers.BTCUSDT"',
+        "null",
+        '{"topic": 5, "data": {}}',
+        '{"topic": "tickers.BTCUSDT", "data": [1]}',
+        '{"topic": "orderbook.1.BTCUSDT", "data": {"s": "BTCUSDT"}}',
+        '{"op": "pong", "success": true}',
+    ],
+)
+def test_other_frames_are_ignored(raw: str) -> None:
+    service, ticks = _service()
+    service.handle_message(raw)
+    assert ticks == []
+    assert len(service.price_book) == 0
+
+
+def test_rejected_subscription_is_logged(caplog: pytest.LogCaptureFixture) -> None:
+    service, _ = _service()
+    with caplog.at_level(logging.WARNING, logger="app.services.market_data"):
+        service.handle_message('{"op": "subscribe", "success": false, "ret_msg": "invalid topic"}')
+    assert "invalid topic" in caplog.text
+
+
+def test_shared_symbols_stay_subscribed_until_every_owner_drops_them() -> None:
+    service, _ = _service()
+    service.on_instruments_changed({"BTCUSDT": _instrument("BTCUSDT"), "ETHUSDT": _instrument("ETHUSDT")}, owner="a")
+    service.on_instruments_changed({"BTCUSDT": _instrument("BTCUSDT")}, owner="b")
+    assert service.symbols == {"BTCUSDT", "ETHUSDT"}
+
+    service.on_instruments_changed({"BTCUSDT": None, "ETHUSDT": _instrument("ETHUSDT", active=False)}, owner="a")
+    assert service.symbols == {"BTCUSDT"}
+    service.on_instruments_changed({"BTCUSDT": _instrument("BTCUSDT", active=False)}, owner="b")
+    assert service.symbols == set()
+
+
+def test_symbols_are_spread_over_connections() -> None:
+    service, _ = _service(max_symbols_per_connection=2)
+    symbols = [f"S{index}USDT" for index in range(5)]
+    service.on_instruments_changed({symbol: _instrument(symbol) for symbol in symbols})
+    assert [len(shard.symbols) for shard in service._shards] == [2, 2, 1]
+    # Freed capacity is reused before a new connection is opened.
+    service.on_instruments_changed({symbols[0]: None})
+    service.on_instruments_changed({"S9USDT": _instrument("S9USDT")})
+    assert [len(shard.symbols) for shard in service._shards] == [2, 2, 1]
+
+
+@pytest.mark.anyio
+async def test_streams_tickers_and_resubscribes_after_a_reconnect() -> None:
+    server = FakeServer()
+    service, ticks = _service(connect=server.connect, backoff_base=0.0)
+    service.start()
+    service.on_instruments_changed({symbol: _instrument(symbol) for symbol in ("BTCUSDT", "ETHUSDT")})
+    try:
+        await eventually(lambda: bool(server.connections and server.connections[0].sent))
+        first = server.connections[0]
+        assert first.sent == [{"op": "subscribe", "args": ["tickers.BTCUSDT", "tickers.ETHUSDT"]}]
+
+        first.push(_ticker("BTCUSDT", "100"))
+        await eventually(lambda: service.price_book.last_price("BTCUSDT") == 100.0)
+
+        service.on_instruments_changed({"ETHUSDT": None})
+        await eventually(lambda: len(first.sent) == 2)
+        assert first.sent[1] == {"op": "unsubscribe", "args": ["tickers.ETHUSDT"]}
+
+        first.drop()
+        await eventually(lambda: len(server.connections) == 2 and bool(server.connections[1].sent))
+        second = server.connections[1]
+        assert second.sent == [{"op": "subscribe", "args": ["tickers.BTCUSDT"]}]
+        second.push(_ticker("BTCUSDT", "101"))
+        await eventually(lambda: service.price_book.last_price("BTCUSDT") == 101.0)
+        assert len(ticks) == 2
+    finally:
+        await service.stop()
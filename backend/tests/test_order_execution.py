@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.order_execution import OpenOrder, OrderExecutor, order_link_id, parse_order_link_id
+from app.services.order_plan import (
+    LEG_ENTRY_LONG,
+    LEG_ENTRY_SHORT,
+    LEG_SL_LONG,
+    LEG_TP_LONG,
+    POSITION_IDX_LONG,
+    POSITION_IDX_SHORT,
+)
+from app.services.private_stream import PositionLedger
+from app.services.risk import RiskLimits
+from tests.sim import Market
+
+pytestmark = pytest.mark.anyio
+
+# Per symbol: two entries, two take-profits and two stop-losses on each side.
+LEGS_PER_SYMBOL = 10
+
+
+def _legs(requests: List[Dict[str, Any]], symbol: str) -> Dict[int, Dict[str, Any]]:
+    legs: Dict[int, Dict[str, Any]] = {}
+    for request in requests:
+        parsed = parse_order_link_id(request["orderLinkId"])
+        if parsed is not None and parsed[0] == symbol:
+            legs[parsed[1]] = request
+    return legs
+
+
+async def _synced_ledger(market: Market, executor: OrderExecutor) -> PositionLedger:
+    ledger = PositionLedger()
+    ledger.reset(await market.client.get_all_positions(), [])
+    ledger.synced = True
+    executor.bind_positions(ledger)
+    executor.on_resync(ledger)
+    return ledger
+
+
+def test_link_ids_round_trip() -> None:
+    link_id = order_link_id("BTCUSDT", 7, 3)
+    assert link_id == "gh-07-3-BTCUSDT"
+    assert parse_order_link_id(link_id) == ("BTCUSDT", 7, 3)
+    for foreign in ("", "manual-order", "gh-xx-0-BTCUSDT", "ab-01-0-BTCUSDT"):
+        assert parse_order_link_id(foreign) is None
+    with pytest.raises(ValueError):
+        order_link_id("X" * 40, 0, 0)
+
+
+async def test_diff_creates_every_planned_leg(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    symbol = market.symbols[0]
+    plan = executor.diff([symbol])
+    assert not plan.amends and not plan.cancels
+
+    legs = _legs(plan.creates, symbol)
+    assert len(legs) == LEGS_PER_SYMBOL
+    entry = legs[LEG_ENTRY_LONG]
+    assert entry["orderLinkId"] == f"gh-00-0-{symbol}"
+    assert (entry["side"], entry["orderType"], entry["price"], entry["qty"]) == ("Buy", "Limit", "100", "0.5")
+    assert entry["positionIdx"] == POSITION_IDX_LONG and not entry.get("reduceOnly")
+    take_profit = legs[LEG_TP_LONG]
+    assert (take_profit["side"], take_profit["price"], take_profit["reduceOnly"]) == ("Sell", "102", True)
+    stop_loss = legs[LEG_SL_LONG]
+    assert (stop_loss["orderType"], stop_loss["triggerPrice"], stop_loss["reduceOnly"]) == ("Market", "95", True)
+    assert "price" not in stop_loss
+
+
+async def test_diff_against_matching_open_orders_is_empty(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    plan = executor.diff(market.symbols)
+    for request in plan.creates:
+        executor.on_order_update(OpenOrder.from_bybit(request))
+    assert len(executor.diff(market.symbols)) == 0
+
+
+async def test_diff_amends_moved_legs(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    symbol = market.symbols[0]
+    for request in executor.diff([symbol]).creates:
+        executor.on_order_update(OpenOrder.from_bybit(request))
+
+    executor._engine.set_reference_prices({symbol: 110.0})
+    executor._engine.recompute_all()
+    plan = executor.diff([symbol])
+    assert not plan.creates and not plan.cancels
+    amends = _legs(plan.amends, symbol)
+    assert len(amends) == LEGS_PER_SYMBOL
+    assert amends[LEG_ENTRY_LONG]["price"] == "110" and amends[LEG_ENTRY_LONG]["qty"] == "0.4"
+    assert amends[LEG_SL_LONG]["triggerPrice"] == "105" and "price" not in amends[LEG_SL_LONG]
+
+
+async def test_diff_cancels_inactive_instruments_and_duplicate_legs(market: Market) -> None:
+    instruments = market.instruments()
+    executor = market.executor(instruments)
+    first, second = market.symbols[:2]
+    for request in executor.diff([first, second]).creates:
+        executor.on_order_update(OpenOrder.from_bybit(request))
+    executor.on_order_update(replace(executor.open_orders[f"gh-00-0-{second}"], order_link_id=f"gh-00-1-{second}"))
+
+    executor._engine.on_instruments_changed({first: instruments[first].model_copy(update={"is_active": False})})
+    plan = executor.diff([first, second])
+    assert not plan.creates and not plan.amends
+    cancelled = {request["orderLinkId"] for request in plan.cancels}
+    assert len(_legs(plan.cancels, first)) == LEGS_PER_SYMBOL
+    assert len(_legs(plan.cancels, second)) == 1
+    assert len(cancelled) == LEGS_PER_SYMBOL + 1
+
+
+async def test_diff_skips_legs_the_exchange_filters_reject(market: Market) -> None:
+    # 4 USDT entries are below the 5 USDT minimum notional; reduce-only legs are exempt from it.
+    executor = market.executor(market.instruments(entry_volume_usdt=Decimal("4")))
+    creates = executor.diff(market.symbols).creates
+    assert creates and all(request["reduceOnly"] for request in creates)
+
+
+async def test_diff_holds_back_reduce_only_legs_without_a_position(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    symbol = market.symbols[0]
+    await _synced_ledger(market, executor)
+    assert set(_legs(executor.diff([symbol]).creates, symbol)) == {LEG_ENTRY_LONG, LEG_ENTRY_SHORT}
+
+    market.exchange.place(
+        market.account, {"symbol": symbol, "side": "Buy", "orderType": "Market", "qty": "1", "positionIdx": 1}
+    )
+    await _synced_ledger(market, executor)
+    legs = _legs(executor.diff([symbol]).creates, symbol)
+    assert {leg for leg, request in legs.items() if request["positionIdx"] == POSITION_IDX_LONG} == {
+        LEG_ENTRY_LONG,
+        LEG_TP_LONG,
+        LEG_TP_LONG + 1,
+        LEG_SL_LONG,
+        LEG_SL_LONG + 1,
+    }
+    assert {leg for leg, request in legs.items() if request["positionIdx"] == POSITION_IDX_SHORT} == {LEG_ENTRY_SHORT}
+
+
+async def test_diff_holds_back_opening_legs_over_a_risk_limit(market: Market) -> None:
+    # Each side of each symbol plans a 50 USDT entry; the cap admits one side of one symbol.
+    executor = market.executor(market.instruments(), RiskLimits(side_usdt=120, account_usdt=60))
+    plan = executor.diff(market.symbols)
+    entries = [
+        request
+        for request in plan.creates
+        if parse_order_link_id(request["orderLinkId"])[1] in (LEG_ENTRY_LONG, LEG_ENTRY_SHORT)
+    ]
+    assert len(entries) == 1
+    # Reduce-only legs are never held back by risk.
+    assert len(plan.creates) == 1 + len(market.symbols) * (LEGS_PER_SYMBOL - 2)
+
+
+async def test_reconcile_sends_batches_and_converges(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    for symbol in market.symbols:
+        # Open a position on both sides so every leg is accepted.
+        for side, position_idx in (("Buy", POSITION_IDX_LONG), ("Sell", POSITION_IDX_SHORT)):
+            market.exchange.place(
+                market.account,
+                {"symbol": symbol, "side": side, "orderType": "Market", "qty": "1", "positionIdx": position_idx},
+            )
+    await _synced_ledger(market, executor)
+    sizes: List[int] = []
+    place = market.client.place_batch_orders
+
+    async def recording_place(requests: List[Dict[str, Any]], category: str = "linear") -> Dict[str, Any]:
+        sizes.append(len(requests))
+        return await place(requests, category)
+
+    market.client.place_batch_orders = recording_place  # type: ignore[method-assign]
+    result = await executor.reconcile()
+    assert sorted(sizes) == [10, 20]
+    assert (result.created, result.failed) == (len(market.symbols) * LEGS_PER_SYMBOL, 0)
+    assert len(market.exchange.open_orders(market.account, None)) == len(market.symbols) * LEGS_PER_SYMBOL
+
+    again = await executor.reconcile()
+    assert (again.created, again.amended, again.cancelled, again.failed) == (0, 0, 0, 0)
+
+
+async def test_rejected_take_profits_return_with_a_position(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    symbol = market.symbols[0]
+    await executor.reconcile([symbol])
+    assert (symbol, POSITION_IDX_LONG) in executor._flat
+
+    market.move(symbol, 99)  # fills the long entry
+    ledger = await _synced_ledger(market, executor)
+    executor.on_position(ledger.position(symbol))
+    await executor.refresh_open_orders()
+    result = await executor.reconcile([symbol])
+    assert result.created == 3  # a fresh long entry and both long take-profits
+    assert f"gh-00-1-{symbol}" in executor.open_orders
+    assert {f"gh-02-0-{symbol}", f"gh-03-0-{symbol}"} <= set(executor.open_orders)
+
+
+async def test_orders_closed_elsewhere_move_to_a_new_generation(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    symbol = market.symbols[0]
+    await executor.reconcile([symbol])
+    market.exchange.cancel(market.account, {"symbol": symbol, "orderLinkId": f"gh-00-0-{symbol}"})
+
+    await executor.refresh_open_orders()
+    assert symbol in executor._dirty
+    assert executor.link_id_for(symbol, LEG_ENTRY_LONG) == f"gh-00-1-{symbol}"
+    result = await executor.reconcile([symbol])
+    assert result.created == 1
+    assert market.account.by_link.get(f"gh-00-1-{symbol}")
+
+
+async def test_amending_a_vanished_order_places_the_leg_again(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    symbol = market.symbols[0]
+    await executor.reconcile([symbol])
+    market.exchange.cancel(market.account, {"symbol": symbol, "orderLinkId": f"gh-00-0-{symbol}"})
+    executor._engine.set_reference_prices({symbol: 101.0})
+    executor._engine.recompute_all()
+
+    result = await executor.reconcile([symbol])
+    assert result.failed == 1  # the amend of the cancelled entry
+    assert executor.link_id_for(symbol, LEG_ENTRY_LONG) == f"gh-00-1-{symbol}"
+    assert (await executor.reconcile([symbol])).created == 1
+
+
+async def test_duplicate_link_ids_adopt_the_exchange_order(market: Market) -> None:
+    instruments = market.instruments()
+    symbol = market.symbols[0]
+    await market.executor(instruments).reconcile([symbol])
+    # Someone changed the resting entry, and another leg was cancelled, while this process was down.
+    entry = market.account.find({"orderLinkId": f"gh-00-0-{symbol}"})
+    market.exchange.amend(market.account, {"symbol": symbol, "orderLinkId": entry.order_link_id, "qty": "0.7"})
+    market.exchange.cancel(market.account, {"symbol": symbol, "orderLinkId": f"gh-01-0-{symbol}"})
+
+    executor = market.executor(instruments)
+    result = await executor.reconcile([symbol])
+    assert result.failed == 0
+    assert executor.open_orders[f"gh-00-0-{symbol}"].qty == Decimal("0.7")
+    assert executor.open_orders[f"gh-00-0-{symbol}"].order_id == entry.order_id
+    assert f"gh-01-0-{symbol}" not in executor.open_orders
+    assert executor.link_id_for(symbol, LEG_ENTRY_SHORT) == f"gh-01-1-{symbol}"
+    assert symbol in executor._dirty
+
+    follow_up = await executor.reconcile([symbol])
+    assert (follow_up.created, follow_up.amended) == (1, 1)
+    assert market.account.find({"orderLinkId": f"gh-00-0-{symbol}"}).qty == Decimal("0.5")
+    assert market.account.find({"orderLinkId": f"gh-01-1-{symbol}"}) is not None
+
+
+async def test_resync_snapshot_reconciles_changed_symbols(market: Market) -> None:
+    executor = market.executor(market.instruments())
+    await _synced_ledger(market, executor)
+    await executor.reconcile()
+    executor._dirty.clear()
+    first = market.symbols[0]
+    market.exchange.amend(market.account, {"symbol": first, "orderLinkId": f"gh-00-0-{first}", "qty": "0.9"})
+
+    await executor.refresh_open_orders()
+    assert executor._dirty == {first}
+    assert executor.open_orders[f"gh-00-0-{first}"].qty == Decimal("0.9")
+    result = await executor.reconcile(executor._dirty)
+    assert (result.created, result.amended, result.cancelled) == (0, 1, 0)
+    assert len(executor.diff([first])) == 0
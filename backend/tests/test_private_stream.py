@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.order_execution import OrderExecutor, order_link_id
+from app.services.order_plan import LEG_ENTRY_LONG
+from app.services.private_stream import Execution, PositionLedger, PrivateStreamService, SymbolPosition
+from tests.sim import FakeServer, FakeSocket, Market, eventually
+
+pytestmark = pytest.mark.anyio
+
+
+def _execution(exec_id: str, symbol: str = "BTCUSDT", seq: int = 1) -> Dict[str, Any]:
+    return {"symbol": symbol, "execId": exec_id, "execPrice": "100", "execQty": "1", "side": "Buy", "seq": seq}
+
+
+def _position(symbol: str, position_idx: int, size: str, seq: int) -> Dict[str, Any]:
+    return {"symbol": symbol, "positionIdx": position_idx, "size": size, "avgPrice": "100", "seq": seq}
+
+
+def _entry(symbol: str, price: str = "99") -> Dict[str, Any]:
+    return {
+        "symbol": symbol,
+        "side": "Buy",
+        "orderType": "Limit",
+        "price": price,
+        "qty": "0.5",
+        "positionIdx": 1,
+        "orderLinkId": order_link_id(symbol, LEG_ENTRY_LONG, 0),
+    }
+
+
+def _stream(
+    market: Market, executor: OrderExecutor | None = None, server: FakeServer | None = None
+) -> PrivateStreamService:
+    return PrivateStreamService(
+        "ws://simulator/v5/private",
+        market.client,
+        PositionLedger(),
+        executor,
+        backoff_base=0,
+        connect=server.connect if server is not None else FakeServer().connect,
+    )
+
+
+def test_executions_sharing_a_seq_on_different_symbols_are_all_applied() -> None:
+    # Bybit numbers seq per symbol, so two symbols can report the same one.
+    ledger = PositionLedger()
+    assert ledger.apply_execution(_execution("a", "BTCUSDT", seq=7)) is not None
+    assert ledger.apply_execution(_execution("b", "ETHUSDT", seq=7)) is not None
+    assert ledger.apply_execution(_execution("c", "ETHUSDT", seq=7)) is not None
+    assert ledger.apply_execution(_execution("b", "ETHUSDT", seq=7)) is None
+    assert ledger.executions_applied == 3
+    assert ledger.recent_executions() == ["a", "b", "c"]
+
+
+def test_recent_executions_are_bounded() -> None:
+    ledger = PositionLedger(recent_executions=2)
+    for exec_id in ("a", "b", "c"):
+        ledger.apply_execution(_execution(exec_id))
+    assert ledger.recent_executions() == ["b", "c"]
+    assert ledger.apply_execution(_execution("a")) is not None
+
+
+def test_remembered_executions_are_not_applied_again() -> None:
+    ledger = PositionLedger()
+    ledger.remember_executions(["a", "", "b", "a"])
+    assert ledger.recent_executions() == ["a", "b"]
+    assert ledger.apply_execution(_execution("a")) is None
+    assert ledger.executions_applied == 0
+
+
+def test_position_updates_are_ordered_per_side() -> None:
+    ledger = PositionLedger()
+    assert ledger.apply_position(_position("BTCUSDT", 1, "2", seq=5))
+    assert not ledger.apply_position(_position("BTCUSDT", 1, "1", seq=4))
+    assert ledger.apply_position(_position("BTCUSDT", 2, "3", seq=1))
+    assert not ledger.apply_position(_position("BTCUSDT", 0, "3", seq=9))
+    position = ledger.position("BTCUSDT")
+    assert (position.long.size, position.short.size) == (Decimal(2), Decimal(3))
+
+
+def test_terminal_orders_leave_the_ledger() -> None:
+    ledger = PositionLedger()
+    order = {"symbol": "BTCUSDT", "orderLinkId": "gh-00-0-BTCUSDT", "price": "100", "qty": "1", "orderStatus": "New"}
+    assert ledger.apply_order(order) is not None
+    assert [item.order_link_id for item in ledger.open_orders("BTCUSDT")] == ["gh-00-0-BTCUSDT"]
+    assert ledger.apply_order({**order, "orderStatus": "Filled"}) is None
+    assert ledger.open_orders("BTCUSDT") == []
+
+
+async def test_resync_rebuilds_the_ledger_from_rest(market: Market) -> None:
+    symbol = market.symbols[0]
+    market.exchange.place(market.account, _entry(symbol))
+    market.exchange.place(market.account, {**_entry(symbol, "101"), "orderLinkId": "manual"})  # fills at once
+    executor = market.executor(market.instruments())
+    stream = _stream(market, executor)
+    resyncs: List[PositionLedger] = []
+    stream.add_listener("resync", resyncs.append)
+
+    await stream.resync()
+    ledger = stream.ledger
+    assert ledger.synced and stream.resync_count == 1 and resyncs == [ledger]
+    assert ledger.position(symbol).long.size == Decimal("0.5")
+    assert set(ledger.orders) == {order_link_id(symbol, LEG_ENTRY_LONG, 0)}
+    assert set(executor.open_orders) == set(ledger.orders)
+
+
+async def test_frames_during_a_resync_are_replayed_on_the_snapshot(market: Market) -> None:
+    symbol = market.symbols[0]
+    stream = _stream(market)
+    positions: List[SymbolPosition] = []
+    stream.add_listener("position", positions.append)
+    stream._buffer = []  # as after a reconnect
+    stream.handle_message({"topic": "position", "data": [_position(symbol, 1, "4", seq=3)]})
+    assert not positions
+
+    await stream.resync()
+    assert stream.ledger.position(symbol).long.size == Decimal(4)
+    assert [position.symbol for position in positions] == [symbol]
+
+
+async def test_failed_resync_leaves_the_ledger_unsynced_and_retries(market: Market) -> None:
+    symbol = market.symbols[0]
+    stream = _stream(market)
+    fetch = market.client.get_all_positions
+    failures = [RuntimeError("timeout"), RuntimeError("timeout")]
+
+    async def flaky(*args: Any) -> List[Dict[str, Any]]:
+        if failures:
+            raise failures.pop()
+        return await fetch(*args)
+
+    market.client.get_all_positions = flaky  # type: ignore[method-assign]
+    stream._buffer = []
+    stream.handle_message({"topic": "position", "data": [_position(symbol, 1, "1", seq=1)]})
+    with pytest.raises(RuntimeError):
+        await stream.resync()
+    assert not stream.ledger.synced and stream._buffer is None
+    assert stream.ledger.position(symbol).long.size == Decimal(1)  # the buffered frame is not lost
+
+    stream.request_resync()
+    try:
+        await eventually(lambda: stream.ledger.synced)
+    finally:
+        await stream.stop()
+    assert not failures and stream.resync_count == 1
+
+
+async def test_authentication_waits_for_the_auth_reply(market: Market) -> None:
+    stream = _stream(market)
+    socket = FakeSocket()
+    for frame in ("not json", "[1, 2]", {"op": "pong"}, {"op": "auth", "success": True}):
+        socket.push(frame)
+    await stream._authenticate(socket)
+    assert socket.sent[0]["op"] == "auth" and socket.sent[0]["args"][0] == "test-key"
+
+    socket.push({"op": "auth", "success": False, "ret_msg": "Params Error"})
+    with pytest.raises(RuntimeError, match="Params Error"):
+        await stream._authenticate(socket)
+
+
+async def test_stream_follows_the_exchange_across_reconnects(market: Market) -> None:
+    def on_send(socket: FakeSocket, message: Dict[str, Any]) -> None:
+        op = message.get("op")
+        if op in ("auth", "subscribe"):
+            socket.push({"op": op, "success": True, "ret_msg": ""})
+        if op == "subscribe":
+            market.account.listeners.append(
+                lambda topic, data: socket.push(json.dumps({"topic": topic, "data": data}))
+            )
+
+    server = FakeServer(on_send)
+    executor = market.executor(market.instruments())
+    stream = _stream(market, executor, server)
+    executions: List[Execution] = []
+    stream.add_listener("execution", executions.append)
+    symbol = market.symbols[0]
+    link_id = order_link_id(symbol, LEG_ENTRY_LONG, 0)
+
+    stream.start()
+    try:
+        await eventually(lambda: stream.ledger.synced)
+        assert server.connections[0].sent[1] == {"op": "subscribe", "args": ["order", "execution", "position"]}
+
+        market.exchange.place(market.account, _entry(symbol))
+        await eventually(lambda: link_id in executor.open_orders)
+        market.move(symbol, 98)
+        await eventually(lambda: stream.ledger.position(symbol).long.size == Decimal("0.5"))
+        assert [(item.order_link_id, item.qty) for item in executions] == [(link_id, Decimal("0.5"))]
+        assert link_id not in executor.open_orders and link_id not in stream.ledger.orders
+        assert executor.link_id_for(symbol, LEG_ENTRY_LONG) == order_link_id(symbol, LEG_ENTRY_LONG, 1)
+
+        server.connections[0].drop()
+        await eventually(lambda: stream.resync_count == 2 and stream.ledger.synced)
+        assert len(server.connections) == 2
+        assert stream.ledger.position(symbol).long.size == Decimal("0.5")
+    finally:
+        await stream.stop()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from app.services.rate_limiter import DEFAULT_ENDPOINT_LIMITS, DEFAULT_LIMIT, RateLimiter, TokenBucket
+
+pytestmark = pytest.mark.anyio
+
+
+def test_bucket_serves_its_burst_then_refuses() -> None:
+    bucket = TokenBucket(rate=0.001, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.available < 1
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity() -> None:
+    bucket = TokenBucket(rate=1000, capacity=2)
+    assert bucket.try_acquire(2)
+    time.sleep(0.01)
+    assert bucket.available == pytest.approx(2)
+
+
+async def test_acquire_waits_for_tokens() -> None:
+    bucket = TokenBucket(rate=100, capacity=1)
+    await bucket.acquire()
+    started = time.perf_counter()
+    await bucket.acquire()
+    assert time.perf_counter() - started >= 0.005
+
+
+async def test_acquire_caps_a_request_larger_than_the_bucket() -> None:
+    bucket = TokenBucket(rate=0.001, capacity=2)
+    await asyncio.wait_for(bucket.acquire(5), timeout=1)
+    assert bucket.available < 1
+
+
+async def test_waiters_are_served_in_order() -> None:
+    bucket = TokenBucket(rate=200, capacity=1)
+    bucket.try_acquire()
+    served: List[int] = []
+
+    async def waiter(index: int) -> None:
+        await bucket.acquire()
+        served.append(index)
+
+    await asyncio.gather(*(waiter(index) for index in range(5)))
+    assert served == [0, 1, 2, 3, 4]
+
+
+def test_limiter_keeps_one_bucket_per_path() -> None:
+    limiter = RateLimiter()
+    batch = limiter.bucket("/v5/order/create-batch")
+    assert limiter.bucket("/v5/order/create-batch") is batch
+    assert (batch.rate, batch.capacity) == DEFAULT_ENDPOINT_LIMITS["/v5/order/create-batch"]
+    assert limiter.bucket("/v5/order/amend-batch") is not batch
+
+    unknown = limiter.bucket("/v5/market/tickers")
+    assert (unknown.rate, unknown.capacity) == DEFAULT_LIMIT
+
+
+async def test_exhausting_one_path_leaves_the_others_alone() -> None:
+    limiter = RateLimiter({"/v5/order/create-batch": (0.001, 1)})
+    await limiter.acquire("/v5/order/create-batch")
+    assert not limiter.bucket("/v5/order/create-batch").try_acquire()
+    await asyncio.wait_for(limiter.acquire("/v5/order/cancel-batch"), timeout=1)
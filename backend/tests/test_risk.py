@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+import pytest
+
+from app.models.instrument import Instrument
+from app.services.order_plan import POSITION_IDX_LONG, POSITION_IDX_SHORT
+from app.services.private_stream import PositionLedger, PositionSide, SymbolPosition
+from app.services.risk import (
+    LONG,
+    RISK_ACCOUNT_LIMIT,
+    RISK_OK,
+    RISK_SIDE_LIMIT,
+    RISK_SYMBOL_LIMIT,
+    RISK_TOTAL_LIMIT,
+    RiskEngine,
+    RiskLimits,
+)
+from tests.sim import Market
+
+pytestmark = pytest.mark.anyio
+
+
+def _risk(
+    market: Market, limits: Optional[RiskLimits] = None, **entries: int
+) -> Tuple[RiskEngine, Dict[str, Instrument]]:
+    """Risk engine over the market's instruments; ``entries`` overrides the entry size per symbol."""
+    instruments = market.instruments()
+    for symbol, volume in entries.items():
+        instruments[symbol] = instruments[symbol].model_copy(update={"entry_volume_usdt": Decimal(volume)})
+    return market.executor(instruments, limits)._risk, instruments
+
+
+def _resize(risk: RiskEngine, instrument: Instrument, volume: int) -> None:
+    resized = instrument.model_copy(update={"entry_volume_usdt": Decimal(volume)})
+    risk._engine.on_instruments_changed({instrument.symbol: resized})
+    risk._engine.recompute_all()
+
+
+async def test_disabled_limits_admit_everything(market: Market) -> None:
+    risk, _ = _risk(market)
+    assert not risk.enabled
+    assert risk.planned == [0.0, 0.0]  # nothing counts before it is admitted
+    for symbol in market.symbols:
+        assert risk.check(symbol, POSITION_IDX_LONG) == RISK_OK
+    assert risk.planned == pytest.approx([150.0, 0.0])
+    assert risk.gross == pytest.approx(150.0)
+
+
+async def test_an_oversized_symbol_does_not_block_the_others(market: Market) -> None:
+    first, second, third = market.symbols
+    risk, instruments = _risk(market, RiskLimits(side_usdt=100), **{first: 1000, second: 10, third: 10})
+    assert risk.check(first, POSITION_IDX_LONG) == RISK_SIDE_LIMIT
+    assert risk.check(second, POSITION_IDX_LONG) == RISK_OK
+    assert risk.check(third, POSITION_IDX_LONG) == RISK_OK
+    assert risk.planned == pytest.approx([20.0, 0.0])
+    assert risk.check(first, POSITION_IDX_LONG) == RISK_SIDE_LIMIT
+    assert risk.symbol_exposure(first, LONG) == 0.0
+
+    _resize(risk, instruments[first], 50)
+    assert risk.check(first, POSITION_IDX_LONG) == RISK_OK
+    assert risk.planned == pytest.approx([70.0, 0.0])
+
+
+async def test_admitted_plans_follow_plan_changes(market: Market) -> None:
+    first = market.symbols[0]
+    risk, instruments = _risk(market, RiskLimits(side_usdt=100))
+    assert risk.check(first, POSITION_IDX_SHORT) == RISK_OK
+    _resize(risk, instruments[first], 80)
+    assert risk.planned == pytest.approx([0.0, 80.0])
+    # Growing past the limit takes the side out again on the next check.
+    _resize(risk, instruments[first], 120)
+    assert risk.check(first, POSITION_IDX_SHORT) == RISK_SIDE_LIMIT
+    assert risk.planned == pytest.approx([0.0, 0.0])
+
+
+async def test_symbol_side_limit(market: Market) -> None:
+    first, second = market.symbols[:2]
+    risk, _ = _risk(market, RiskLimits(symbol_side_usdt=60), **{first: 70})
+    assert risk.check(first, POSITION_IDX_LONG) == RISK_SYMBOL_LIMIT
+    assert risk.check(second, POSITION_IDX_LONG) == RISK_OK
+
+
+async def test_positions_are_marked_to_the_last_price(market: Market) -> None:
+    first, second = market.symbols[:2]
+    risk, _ = _risk(market, RiskLimits(account_usdt=150))
+    risk.on_position(SymbolPosition(first, long=PositionSide(size=Decimal(1), avg_price=Decimal(100))))
+    assert risk.positions == pytest.approx([100.0, 0.0])
+
+    slot = risk._book.update(first, last=110.0)
+    risk.on_tick(first, slot)
+    assert risk.positions == pytest.approx([110.0, 0.0])
+    assert risk.symbol_exposure(first, LONG) == pytest.approx(110.0)
+    assert risk.check(second, POSITION_IDX_SHORT) == RISK_ACCOUNT_LIMIT
+
+    slot = risk._book.update(first, last=90.0)
+    risk.on_tick(first, slot)
+    assert risk.check(second, POSITION_IDX_SHORT) == RISK_OK
+
+
+async def test_resync_and_rebuild_agree_with_the_running_totals(market: Market) -> None:
+    first, second = market.symbols[:2]
+    risk, instruments = _risk(market, RiskLimits(side_usdt=500))
+    for symbol in market.symbols:
+        risk.check(symbol, POSITION_IDX_LONG)
+    risk.check(second, POSITION_IDX_SHORT)
+    ledger = PositionLedger()
+    ledger.reset(
+        [
+            {"symbol": first, "positionIdx": 1, "size": "2", "avgPrice": "100"},
+            {"symbol": second, "positionIdx": 2, "size": "1", "avgPrice": "100"},
+        ],
+        [],
+    )
+    risk.on_resync(ledger)
+    _resize(risk, instruments[second], 20)
+    running = (list(risk.planned), list(risk.positions), risk.total_gross)
+
+    risk.rebuild()
+    assert running == pytest.approx(([120.0, 20.0], [200.0, 100.0], 440.0))
+    assert (risk.planned, risk.positions, risk.total_gross) == pytest.approx(running)
+
+
+async def test_total_limit_spans_accounts(market: Market) -> None:
+    first, second = market.symbols[:2]
+    risk, _ = _risk(market)
+    other = RiskEngine("other", risk._engine, risk._book, RiskLimits(total_usdt=80), risk._totals)
+    other.rebuild()
+    assert risk.check(first, POSITION_IDX_LONG) == RISK_OK
+    assert other.check(second, POSITION_IDX_LONG) == RISK_TOTAL_LIMIT
+    assert other.total_gross == pytest.approx(50.0)
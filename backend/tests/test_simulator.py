@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import itertools
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.bybit_client import BybitAPIError
+from app.simulator.exchange import (
+    MAKER_FEE,
+    RET_DUPLICATE_LINK_ID,
+    RET_OK,
+    RET_ORDER_NOT_FOUND,
+    RET_PARAMS,
+    RET_REDUCE_ONLY_ZERO,
+    TAKER_FEE,
+    Exchange,
+    SimAccount,
+)
+from app.simulator.instruments import synthetic_instrument
+from app.simulator.paths import SyntheticPath
+from app.simulator.server import create_simulator_app
+from tests.sim import API_KEY, START_PRICE, Market, ScriptedPath
+
+pytestmark = pytest.mark.anyio
+
+SYMBOL = "C0001USDT"  # tick 0.001, qty step 0.1, min notional 5
+
+
+class Desk:
+    """One-symbol exchange recording the private events of a single account."""
+
+    def __init__(self) -> None:
+        self.path = ScriptedPath({SYMBOL: START_PRICE})
+        self.exchange = Exchange([synthetic_instrument(1)], self.path)
+        self.account: SimAccount = self.exchange.account(API_KEY)
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.account.listeners.append(lambda topic, data: self.events.extend((topic, item) for item in data))
+
+    def move(self, price: str) -> None:
+        self.path.push({SYMBOL: Decimal(price)})
+        self.exchange.step()
+
+    def place(self, **request: Any) -> Tuple[int, str, Dict[str, Any]]:
+        fields = {"symbol": SYMBOL, "side": "Buy", "orderType": "Limit", "qty": "1", "positionIdx": 1}
+        return self.exchange.place(self.account, {**fields, **request})
+
+    def topics(self) -> List[str]:
+        return [topic for topic, _ in self.events]
+
+    def executions(self) -> List[Dict[str, Any]]:
+        return [item for topic, item in self.events if topic == "execution"]
+
+    def position(self, position_idx: int = 1) -> Any:
+        return self.account.position(SYMBOL, position_idx)
+
+
+def test_crossing_limit_order_fills_as_taker_at_the_quote() -> None:
+    desk = Desk()
+    code, _, ack = desk.place(price="101", orderLinkId="a")
+    assert code == RET_OK and ack["orderLinkId"] == "a"
+    assert desk.topics() == ["order", "execution", "order", "position"]
+    (execution,) = desk.executions()
+    assert (execution["execPrice"], execution["isMaker"]) == ("100.001", False)
+    assert Decimal(execution["execFee"]) == Decimal("100.001") * TAKER_FEE
+    assert desk.events[2][1]["orderStatus"] == "Filled"
+    assert (desk.position().size, desk.position().avg_price) == (Decimal(1), Decimal("100.001"))
+    assert not desk.account.open
+
+
+def test_resting_limit_order_fills_at_its_price_once_reached() -> None:
+    desk = Desk()
+    desk.place(price="99")
+    desk.move("99.5")
+    assert not desk.executions()
+    desk.move("98")
+    (execution,) = desk.executions()
+    assert (execution["execPrice"], execution["isMaker"]) == ("99", True)
+    assert Decimal(execution["execFee"]) == Decimal(99) * MAKER_FEE
+    assert desk.position().size == Decimal(1)
+
+
+def test_conditional_order_fires_at_the_last_price_when_crossed() -> None:
+    desk = Desk()
+    desk.place(price="101")  # long 1 @ 100.001
+    code, _, _ = desk.place(
+        side="Sell", orderType="Market", triggerPrice="95", triggerDirection=2, reduceOnly=True, orderLinkId="sl"
+    )
+    assert code == RET_OK
+    assert desk.account.find({"orderLinkId": "sl"}).status == "Untriggered"
+    desk.move("96")
+    assert len(desk.executions()) == 1
+    desk.move("94.5")
+    assert desk.executions()[-1]["execPrice"] == "94.5"
+    assert desk.position().size == 0
+    assert desk.position().realised_pnl < Decimal("-5.5")
+
+
+def test_reduce_only_orders_need_a_position_to_reduce() -> None:
+    desk = Desk()
+    assert desk.place(side="Sell", price="102", reduceOnly=True)[0] == RET_REDUCE_ONLY_ZERO
+    assert desk.place(side="Buy", price="98", reduceOnly=True)[0] == RET_PARAMS  # would increase the long
+
+    # A conditional one is accepted, but is deactivated if it fires while flat.
+    assert desk.place(side="Sell", orderType="Market", triggerPrice="95", triggerDirection=2, reduceOnly=True)[0] == 0
+    desk.move("94")
+    assert not desk.executions()
+    topic, order = desk.events[-1]
+    assert (topic, order["orderStatus"]) == ("order", "Deactivated")
+
+
+def test_order_link_ids_are_single_use() -> None:
+    desk = Desk()
+    assert desk.place(price="90", orderLinkId="a")[0] == RET_OK
+    assert desk.place(price="91", orderLinkId="a")[0] == RET_DUPLICATE_LINK_ID
+    assert desk.exchange.cancel(desk.account, {"symbol": SYMBOL, "orderLinkId": "a"})[0] == RET_OK
+    assert desk.place(price="91", orderLinkId="a")[0] == RET_DUPLICATE_LINK_ID
+
+
+def test_amend_and_cancel_of_unknown_orders() -> None:
+    desk = Desk()
+    missing = {"symbol": SYMBOL, "orderLinkId": "missing", "qty": "2"}
+    for operation in (desk.exchange.amend, desk.exchange.cancel):
+        assert operation(desk.account, missing)[0] == RET_ORDER_NOT_FOUND
+    desk.place(price="90", orderLinkId="a")
+    assert desk.exchange.amend(desk.account, {"symbol": "C0002USDT", "orderLinkId": "a"})[0] == RET_ORDER_NOT_FOUND
+    assert desk.exchange.amend(desk.account, {"symbol": SYMBOL, "orderLinkId": "a", "qty": "0"})[0] == RET_PARAMS
+
+
+def test_amend_across_the_quote_fills() -> None:
+    desk = Desk()
+    desk.place(price="90", orderLinkId="a")
+    assert desk.exchange.amend(desk.account, {"symbol": SYMBOL, "orderLinkId": "a", "price": "100.5"})[0] == RET_OK
+    assert desk.executions()[0]["execPrice"] == "100.001"
+
+
+def test_orders_outside_the_filters_are_rejected() -> None:
+    desk = Desk()
+    assert desk.place(price="100", qty="0.01")[0] == RET_PARAMS  # below the minimum qty
+    assert desk.place(price="10", qty="0.1")[0] == RET_PARAMS  # below the minimum notional
+    assert desk.place(side="Sell", price="200000")[0] == RET_PARAMS  # above the maximum price
+    assert desk.place(price="90", positionIdx=0)[0] == RET_PARAMS
+
+
+def test_synthetic_path_is_reproducible() -> None:
+    ticks = {"AUSDT": Decimal("0.01"), "BUSDT": Decimal("0.5")}
+    first = list(itertools.islice(SyntheticPath(ticks, seed=7), 50))
+    assert first == list(itertools.islice(SyntheticPath(ticks, seed=7), 50))
+    assert first != list(itertools.islice(SyntheticPath(ticks, seed=8), 50))
+    for step in first:
+        assert all(price > 0 and price % ticks[symbol] == 0 for symbol, price in step.items())
+
+
+def test_same_path_and_requests_produce_the_same_fills() -> None:
+    def run() -> List[Tuple[str, Dict[str, Any]]]:
+        items = [synthetic_instrument(1), synthetic_instrument(2)]
+        ticks = {item["symbol"]: Decimal(item["priceFilter"]["tickSize"]) for item in items}
+        exchange = Exchange(items, SyntheticPath(ticks, seed=3, volatility=0.01, start={SYMBOL: START_PRICE}))
+        account = exchange.account(API_KEY)
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        account.listeners.append(lambda topic, data: events.extend((topic, item) for item in data))
+        for offset in range(1, 6):
+            for side, price, position_idx in (("Buy", START_PRICE - offset, 1), ("Sell", START_PRICE + offset, 2)):
+                request = {"symbol": SYMBOL, "side": side, "qty": "1", "price": str(price), "positionIdx": position_idx}
+                exchange.place(account, request)
+        for _ in range(200):
+            exchange.step()
+        return events
+
+    events = run()
+    assert any(topic == "execution" for topic, _ in events)
+    assert events == run()
+
+
+async def test_batches_over_the_limit_are_refused(market: Market) -> None:
+    request = {"symbol": market.symbols[0], "side": "Buy", "qty": "1", "price": "90", "positionIdx": 1}
+    with pytest.raises(BybitAPIError) as error:
+        await market.client.place_batch_orders([{**request, "orderLinkId": f"o-{index}"} for index in range(21)])
+    assert error.value.ret_code == RET_PARAMS
+    assert not market.account.open
+
+
+async def test_positions_are_read_across_pages(market: Market) -> None:
+    for symbol in market.symbols:
+        for side, position_idx in (("Buy", 1), ("Sell", 2)):
+            request = {"symbol": symbol, "side": side, "orderType": "Market", "qty": "1", "positionIdx": position_idx}
+            market.exchange.place(market.account, request)
+    result = await market.client.get_positions(limit=4)
+    assert len(result["list"]) == 4 and result["nextPageCursor"]
+    positions = await market.client.get_all_positions()
+    assert sorted((item["symbol"], item["positionIdx"]) for item in positions) == [
+        (symbol, position_idx) for symbol in market.symbols for position_idx in (1, 2)
+    ]
+
+
+def _client(market: Market) -> TestClient:
+    return TestClient(create_simulator_app(market.exchange), headers={"X-BAPI-API-KEY": API_KEY})
+
+
+async def test_requests_without_a_key_are_refused(market: Market) -> None:
+    with TestClient(create_simulator_app(market.exchange)) as client:
+        reply = client.get("/v5/position/list").json()
+    assert reply["retCode"] == 10003
+
+
+async def test_streams_tickers_and_private_events(market: Market) -> None:
+    symbol = market.symbols[0]
+    with _client(market) as client:
+        with client.websocket_connect("/v5/public/linear") as public:
+            public.send_json({"op": "subscribe", "args": [f"tickers.{symbol}"]})
+            frames = [public.receive_json(), public.receive_json()]
+            snapshot = next(frame for frame in frames if frame.get("topic"))
+            assert snapshot["data"]["lastPrice"] == "100"
+
+            market.path.push({symbol: Decimal("101")})
+            assert client.post("/sim/step").json()["steps"] == 2
+            assert public.receive_json()["data"]["lastPrice"] == "101"
+
+        with client.websocket_connect("/v5/private") as private:
+            private.send_json({"op": "subscribe", "args": ["order"]})
+            assert private.receive_json()["ret_msg"] == "Request not authorized"
+            private.send_json({"op": "auth", "args": [API_KEY, 0, "signature"]})
+            assert private.receive_json()["success"] is True
+            private.send_json({"op": "subscribe", "args": ["order"]})
+            assert private.receive_json()["success"] is True
+
+            request = {"symbol": symbol, "side": "Buy", "qty": "1", "price": "90", "positionIdx": 1, "orderLinkId": "a"}
+            assert client.post("/v5/order/create", json=request).json()["retCode"] == RET_OK
+            frame = private.receive_json()
+            assert frame["topic"] == "order"
+            assert [(item["orderLinkId"], item["orderStatus"]) for item in frame["data"]] == [("a", "New")]